@@ -13,10 +13,56 @@ class Settings(BaseSettings):
     api_key_header: str = "X-API-Key"
     default_api_key: str = "dev-key-change-me"
     max_concurrent_runs: int = 4
+    worker_processes: int = 4
+    scheduler_interval_seconds: float = 2.0
+    scheduler_aging_per_minute: float = 1.0
+    scheduler_fair_share_weight: float = 2.0
+    scheduler_starvation_seconds: int = 600
+    preemption_enabled: bool = True
+    run_owner_stale_seconds: int = 30
+    cancel_grace_seconds: int = 30
+    retry_max_attempts: int = 3
+    retry_backoff_seconds: float = 30.0
+    retry_backoff_max_seconds: float = 600.0
+    sweep_max_trials: int = 256
+    checkpoint_interval_steps: int = 50
+    checkpoint_keep_last: int = 3
+    checkpoint_max_pending: int = 2
     checkpoint_dir: str = "./checkpoints"
     model_registry_dir: str = "./model_registry"
     cluster_heartbeat_interval: int = 30
+    node_stale_after_seconds: int = 90
     run_timeout_seconds: int = 86400
+    run_stall_seconds: int = 3600
+    eval_workers: int = 4
+    # "process" for CPU-bound scorers, "thread" for ones that wait on I/O.
+    eval_executor: str = "process"
+    # "simulated", or "local" to score accuracy, perplexity and coherence by
+    # running the model (services/inference.py).
+    eval_backend: str = "simulated"
+    # int8 dynamic quantization for the local backend on CPU.
+    eval_quantize: bool = False
+    eval_max_batch_tokens: int = 4096
+    eval_max_batch_size: int = 32
+    eval_max_new_tokens: int = 16
+    eval_builtin_samples: int = 64
+    # Optional directory of {benchmark}.jsonl prompt sets for the local backend.
+    eval_benchmark_dir: str = ""
+    eval_batch_max_models: int = 200
+    # Default cap on one batch's units queued on the eval pool at once.
+    eval_batch_max_inflight: int = 8
+    eval_batch_poll_seconds: float = 0.5
+    eval_sample_dir: str = "./eval_samples"
+    eval_sample_block_rows: int = 256
+    eval_sample_compression: int = 6
+    eval_bootstrap_resamples: int = 2000
+    # Significance level for flagging a regression.
+    eval_regression_alpha: float = 0.05
+    memory_check_enabled: bool = True
+    # Share of a GPU's memory a run's estimate may plan to use.
+    memory_headroom: float = 0.9
+    model_cache_budget_mb: int = 32768
+    model_cache_mmap: bool = True
 
     class Config:
         env_file = ".env"
@@ -36,6 +82,11 @@ RECIPE_DEFAULTS = {
         "num_epochs": 1,
         "warmup_ratio": 0.03,
         "max_seq_length": 2048,
+        "early_stopping": {
+            "plateau_patience": 300,
+            "on_divergence": "stop",
+            "on_plateau": "stop",
+        },
     },
     "dpo": {
         "beta": 0.1,
@@ -45,6 +96,13 @@ RECIPE_DEFAULTS = {
         "num_epochs": 1,
         "max_prompt_length": 512,
         "max_length": 1024,
+        "early_stopping": {
+            # Preference loss starts near ln 2 and moves slowly.
+            "plateau_patience": 500,
+            "plateau_min_delta": 0.005,
+            "on_divergence": "stop",
+            "on_plateau": "flag",
+        },
     },
     "rlhf": {
         "reward_model": None,
@@ -53,5 +111,21 @@ RECIPE_DEFAULTS = {
         "batch_size": 4,
         "kl_penalty": 0.2,
         "clip_range": 0.2,
+        "early_stopping": {
+            # PPO losses are noisy and can be negative; only flag.
+            "ewma_alpha": 0.02,
+            "divergence_factor": 5.0,
+            "spike_sigma": 8.0,
+            "on_divergence": "flag",
+            "on_plateau": "flag",
+        },
     },
 }
+
+# Hourly price per GPU, and throughput relative to an A100-80GB used to
+# carry measured throughput over to a type that has no history yet.
+GPU_TYPES = {
+    "A100-80GB": {"rate_per_hour": 2.50, "relative_throughput": 1.0},
+    "A100-40GB": {"rate_per_hour": 1.80, "relative_throughput": 0.95},
+    "H100": {"rate_per_hour": 4.00, "relative_throughput": 2.2},
+}
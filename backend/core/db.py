@@ -40,12 +40,59 @@ CREATE TABLE IF NOT EXISTS runs (
     tags TEXT DEFAULT '[]',
     error_message TEXT,
     retry_count INTEGER DEFAULT 0,
+    retry_after TEXT,
+    cancel_reason TEXT,
+    tenant_id TEXT DEFAULT 'default',
+    queued_at TEXT,
+    checkpoint_path TEXT,
+    resume_step INTEGER DEFAULT 0,
+    preempted_count INTEGER DEFAULT 0,
+    preempted_at TEXT,
+    preempted_seconds REAL DEFAULT 0,
+    gpu_seconds REAL DEFAULT 0,
+    lost_gpu_seconds REAL DEFAULT 0,
+    saved_gpu_seconds REAL DEFAULT 0,
+    health TEXT DEFAULT 'healthy',
+    fingerprint TEXT,
+    reused_from TEXT,
+    estimated_memory_gb REAL,
     started_at TEXT,
     completed_at TEXT,
     created_at TEXT NOT NULL,
     FOREIGN KEY (dataset_id) REFERENCES datasets(id)
 );
 
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status);
+CREATE INDEX IF NOT EXISTS idx_runs_fingerprint ON runs(fingerprint, status);
+
+CREATE TABLE IF NOT EXISTS cluster_nodes (
+    node_id TEXT PRIMARY KEY,
+    gpu_count INTEGER NOT NULL,
+    gpu_type TEXT NOT NULL,
+    status TEXT DEFAULT 'healthy',
+    gpu_utilization REAL DEFAULT 0,
+    memory_utilization REAL DEFAULT 0,
+    last_heartbeat REAL DEFAULT 0,
+    failure_count INTEGER DEFAULT 0,
+    gpu_assignments TEXT DEFAULT '[]',
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_cluster_nodes_version ON cluster_nodes(version);
+
+CREATE TABLE IF NOT EXISTS active_runs (
+    run_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    nodes TEXT DEFAULT '[]',
+    num_gpus INTEGER NOT NULL,
+    admitted_at TEXT NOT NULL,
+    heartbeat_ts REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    FOREIGN KEY (run_id) REFERENCES runs(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_active_runs_owner ON active_runs(owner);
+
 CREATE TABLE IF NOT EXISTS run_metrics (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     run_id TEXT NOT NULL,
@@ -59,6 +106,183 @@ CREATE TABLE IF NOT EXISTS run_metrics (
     FOREIGN KEY (run_id) REFERENCES runs(id)
 );
 
+CREATE TABLE IF NOT EXISTS eval_results (
+    eval_id TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    suite TEXT,
+    benchmark TEXT NOT NULL,
+    score REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    threshold REAL,
+    cached INTEGER DEFAULT 0,
+    details TEXT,
+    completed_at TEXT,
+    PRIMARY KEY (eval_id, benchmark),
+    FOREIGN KEY (eval_id) REFERENCES evals(id)
+);
+
+CREATE TABLE IF NOT EXISTS eval_samples (
+    eval_id TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    sample_ids TEXT NOT NULL,
+    scores BLOB NOT NULL,
+    PRIMARY KEY (eval_id, benchmark),
+    FOREIGN KEY (eval_id) REFERENCES evals(id)
+);
+
+CREATE TABLE IF NOT EXISTS eval_sample_blocks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    eval_id TEXT NOT NULL,
+    file_eval_id TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    first_sample TEXT NOT NULL,
+    last_sample TEXT NOT NULL,
+    FOREIGN KEY (eval_id) REFERENCES evals(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_eval_sample_blocks_sample
+    ON eval_sample_blocks(eval_id, first_sample);
+
+CREATE INDEX IF NOT EXISTS idx_eval_results_benchmark ON eval_results(benchmark, score);
+CREATE INDEX IF NOT EXISTS idx_eval_results_model ON eval_results(model_id, benchmark, completed_at);
+
+CREATE TABLE IF NOT EXISTS leaderboard (
+    model_id TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    score REAL NOT NULL,
+    eval_id TEXT NOT NULL,
+    suite TEXT,
+    completed_at TEXT,
+    name TEXT,
+    version TEXT,
+    base_model TEXT,
+    recipe TEXT,
+    model_status TEXT,
+    PRIMARY KEY (model_id, benchmark)
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard(benchmark, score);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_status ON leaderboard(benchmark, model_status, score);
+
+CREATE TABLE IF NOT EXISTS leaderboard_overall (
+    model_id TEXT NOT NULL,
+    suite TEXT NOT NULL,
+    overall_score REAL,
+    eval_id TEXT NOT NULL,
+    completed_at TEXT,
+    name TEXT,
+    version TEXT,
+    base_model TEXT,
+    recipe TEXT,
+    model_status TEXT,
+    PRIMARY KEY (model_id, suite)
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_overall_score ON leaderboard_overall(overall_score);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_overall_suite ON leaderboard_overall(suite, overall_score);
+
+CREATE TABLE IF NOT EXISTS eval_cache (
+    key TEXT PRIMARY KEY,
+    artifact_hash TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    version TEXT NOT NULL,
+    threshold REAL,
+    result TEXT NOT NULL,
+    eval_id TEXT,
+    hits INTEGER DEFAULT 0,
+    last_hit_at TEXT,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_eval_cache_artifact ON eval_cache(artifact_hash);
+
+CREATE TABLE IF NOT EXISTS throughput_stats (
+    recipe TEXT NOT NULL,
+    base_model TEXT NOT NULL,
+    gpu_type TEXT NOT NULL,
+    batch_bucket INTEGER NOT NULL DEFAULT 1,
+    points INTEGER DEFAULT 0,
+    total REAL DEFAULT 0,
+    total_sq REAL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (recipe, base_model, gpu_type, batch_bucket)
+);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    loss REAL,
+    size_bytes INTEGER DEFAULT 0,
+    created_at TEXT NOT NULL,
+    FOREIGN KEY (run_id) REFERENCES runs(id),
+    UNIQUE(run_id, step)
+);
+
+CREATE TABLE IF NOT EXISTS run_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    message TEXT DEFAULT '',
+    details TEXT DEFAULT '{}',
+    created_at TEXT NOT NULL,
+    FOREIGN KEY (run_id) REFERENCES runs(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_run_events_run ON run_events(run_id);
+
+CREATE TABLE IF NOT EXISTS sweeps (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    base_model TEXT NOT NULL,
+    dataset_id TEXT NOT NULL,
+    recipe TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    search_space TEXT DEFAULT '{}',
+    config TEXT DEFAULT '{}',
+    num_gpus INTEGER DEFAULT 1,
+    priority INTEGER DEFAULT 0,
+    max_concurrent_trials INTEGER DEFAULT 4,
+    min_steps INTEGER DEFAULT 100,
+    reduction_factor INTEGER DEFAULT 3,
+    status TEXT DEFAULT 'running',
+    best_run_id TEXT,
+    tenant_id TEXT DEFAULT 'default',
+    completed_at TEXT,
+    created_at TEXT NOT NULL,
+    FOREIGN KEY (dataset_id) REFERENCES datasets(id)
+);
+
+CREATE TABLE IF NOT EXISTS sweep_trials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sweep_id TEXT NOT NULL,
+    trial_index INTEGER NOT NULL,
+    params TEXT DEFAULT '{}',
+    run_id TEXT,
+    status TEXT DEFAULT 'pending',
+    rung INTEGER DEFAULT 0,
+    step INTEGER DEFAULT 0,
+    loss REAL,
+    error_message TEXT,
+    FOREIGN KEY (sweep_id) REFERENCES sweeps(id),
+    UNIQUE(sweep_id, trial_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sweep_trials_run ON sweep_trials(run_id);
+
+CREATE TABLE IF NOT EXISTS sweep_rungs (
+    sweep_id TEXT NOT NULL,
+    rung INTEGER NOT NULL,
+    trial_index INTEGER NOT NULL,
+    loss REAL NOT NULL,
+    PRIMARY KEY (sweep_id, rung, trial_index)
+);
+
 CREATE TABLE IF NOT EXISTS models (
     id TEXT PRIMARY KEY,
     run_id TEXT NOT NULL,
@@ -84,13 +308,54 @@ CREATE TABLE IF NOT EXISTS evals (
     results TEXT DEFAULT '[]',
     regression_baseline_id TEXT,
     overall_score REAL,
+    progress TEXT,
+    batch_id TEXT,
     started_at TEXT,
     completed_at TEXT,
     created_at TEXT NOT NULL,
     FOREIGN KEY (model_id) REFERENCES models(id)
 );
+
+CREATE INDEX IF NOT EXISTS idx_evals_batch ON evals(batch_id);
+
+CREATE TABLE IF NOT EXISTS eval_batches (
+    id TEXT PRIMARY KEY,
+    suite TEXT DEFAULT 'default',
+    benchmarks TEXT NOT NULL,
+    status TEXT DEFAULT 'queued',
+    total_units INTEGER NOT NULL,
+    completed_units INTEGER DEFAULT 0,
+    cached_units INTEGER DEFAULT 0,
+    failed_units INTEGER DEFAULT 0,
+    max_concurrent_units INTEGER NOT NULL,
+    started_at TEXT,
+    completed_at TEXT,
+    created_at TEXT NOT NULL
+);
 """
 
+# Columns added after the initial schema; applied to existing databases.
+MIGRATIONS = [
+    ("runs", "tenant_id", "TEXT DEFAULT 'default'"),
+    ("runs", "queued_at", "TEXT"),
+    ("runs", "checkpoint_path", "TEXT"),
+    ("runs", "resume_step", "INTEGER DEFAULT 0"),
+    ("runs", "preempted_count", "INTEGER DEFAULT 0"),
+    ("runs", "preempted_at", "TEXT"),
+    ("runs", "preempted_seconds", "REAL DEFAULT 0"),
+    ("runs", "gpu_seconds", "REAL DEFAULT 0"),
+    ("runs", "lost_gpu_seconds", "REAL DEFAULT 0"),
+    ("runs", "retry_after", "TEXT"),
+    ("runs", "cancel_reason", "TEXT"),
+    ("runs", "saved_gpu_seconds", "REAL DEFAULT 0"),
+    ("runs", "health", "TEXT DEFAULT 'healthy'"),
+    ("runs", "fingerprint", "TEXT"),
+    ("runs", "reused_from", "TEXT"),
+    ("runs", "estimated_memory_gb", "REAL"),
+    ("evals", "progress", "TEXT"),
+    ("evals", "batch_id", "TEXT"),
+]
+
 
 def get_connection() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_PATH)
@@ -100,9 +365,85 @@ def get_connection() -> sqlite3.Connection:
     return conn
 
 
+def _apply_migrations(conn: sqlite3.Connection):
+    # The throughput key gained the batch size; the stats are only a running
+    # sum, so an old table is dropped rather than rekeyed.
+    columns = {r["name"] for r in conn.execute("PRAGMA table_info(throughput_stats)")}
+    if columns and "batch_bucket" not in columns:
+        conn.execute("DROP TABLE throughput_stats")
+    for table, column, ddl in MIGRATIONS:
+        columns = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+        if columns and column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _backfill_eval_results(conn: sqlite3.Connection):
+    # Evals finished before eval_results existed only have the JSON blob.
+    conn.execute(
+        """INSERT OR IGNORE INTO eval_results
+           (eval_id, model_id, suite, benchmark, score, passed, threshold,
+            cached, details, completed_at)
+           SELECT e.id, e.model_id, e.suite,
+                  json_extract(j.value, '$.benchmark'),
+                  json_extract(j.value, '$.score'),
+                  json_extract(j.value, '$.passed'),
+                  json_extract(j.value, '$.threshold'),
+                  COALESCE(json_extract(j.value, '$.details.cached'), 0),
+                  json_extract(j.value, '$.details'),
+                  e.completed_at
+           FROM evals e, json_each(e.results) j
+           WHERE e.completed_at IS NOT NULL
+             AND NOT EXISTS (SELECT 1 FROM eval_results r WHERE r.eval_id = e.id)"""
+    )
+
+
+def _backfill_leaderboard(conn: sqlite3.Connection):
+    # Rebuilt from history only when empty; afterwards evals and status
+    # changes keep it current.
+    if conn.execute("SELECT 1 FROM leaderboard LIMIT 1").fetchone():
+        return
+    conn.execute(
+        """INSERT OR IGNORE INTO leaderboard
+           (model_id, benchmark, score, eval_id, suite, completed_at,
+            name, version, base_model, recipe, model_status)
+           SELECT model_id, benchmark, score, eval_id, suite, completed_at,
+                  name, version, base_model, recipe, model_status
+           FROM (
+               SELECT r.*, m.name, m.version, m.base_model, m.recipe,
+                      m.status AS model_status,
+                      ROW_NUMBER() OVER (
+                          PARTITION BY r.model_id, r.benchmark
+                          ORDER BY r.completed_at DESC
+                      ) AS rn
+               FROM eval_results r JOIN models m ON m.id = r.model_id
+               WHERE r.passed = 1
+           ) WHERE rn = 1"""
+    )
+    conn.execute(
+        """INSERT OR IGNORE INTO leaderboard_overall
+           (model_id, suite, overall_score, eval_id, completed_at,
+            name, version, base_model, recipe, model_status)
+           SELECT model_id, suite, overall_score, id, completed_at,
+                  name, version, base_model, recipe, model_status
+           FROM (
+               SELECT e.*, m.name, m.version, m.base_model, m.recipe,
+                      m.status AS model_status,
+                      ROW_NUMBER() OVER (
+                          PARTITION BY e.model_id, e.suite
+                          ORDER BY e.completed_at DESC
+                      ) AS rn
+               FROM evals e JOIN models m ON m.id = e.model_id
+               WHERE e.status = 'passed'
+           ) WHERE rn = 1"""
+    )
+
+
 def init_db():
     conn = get_connection()
+    _apply_migrations(conn)
     conn.executescript(SCHEMA_SQL)
+    _backfill_eval_results(conn)
+    _backfill_leaderboard(conn)
     conn.commit()
     conn.close()
 
@@ -123,7 +464,10 @@ def deserialize_json(raw: str):
 
 def row_to_dict(row: sqlite3.Row) -> dict:
     d = dict(row)
-    for key in ("tags", "config", "eval_scores", "results"):
+    for key in (
+        "tags", "config", "eval_scores", "results", "details", "params",
+        "search_space", "progress", "benchmarks",
+    ):
         if key in d and isinstance(d[key], str):
             d[key] = deserialize_json(d[key])
     if "pii_checked" in d:
@@ -31,6 +31,39 @@ class EvalStatus(str, Enum):
     ERROR = "error"
 
 
+class EvalBatchStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    ERROR = "error"
+
+
+class SweepStrategy(str, Enum):
+    GRID = "grid"
+    RANDOM = "random"
+
+
+class SweepStatus(str, Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+
+class TrialStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    PRUNED = "pruned"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class ReusePolicy(str, Enum):
+    NEVER = "never"
+    RETURN = "return"
+    CLONE = "clone"
+
+
 class RecipeType(str, Enum):
     LORA_SFT = "lora_sft"
     DPO = "dpo"
@@ -79,6 +112,17 @@ class RunLaunch(BaseModel):
     num_gpus: int = 1
     priority: int = 0
     tags: list[str] = Field(default_factory=list)
+    # What to do when a completed run with the same fingerprint exists.
+    reuse: ReusePolicy = ReusePolicy.NEVER
+
+
+class RunEstimate(BaseModel):
+    base_model: str
+    dataset_id: str
+    recipe: RecipeType = RecipeType.LORA_SFT
+    config_overrides: dict = Field(default_factory=dict)
+    num_gpus: int = 1
+    gpu_type: Optional[str] = None
 
 
 class RunMetrics(BaseModel):
@@ -105,11 +149,98 @@ class RunRecord(BaseModel):
     metrics: list[RunMetrics] = Field(default_factory=list)
     error_message: Optional[str] = None
     retry_count: int = 0
+    retry_after: Optional[str] = None
+    cancel_reason: Optional[str] = None
+    tenant_id: str = "default"
+    queued_at: Optional[str] = None
+    checkpoint_path: Optional[str] = None
+    resume_step: int = 0
+    preempted_count: int = 0
+    preempted_seconds: float = 0.0
+    gpu_seconds: float = 0.0
+    lost_gpu_seconds: float = 0.0
+    saved_gpu_seconds: float = 0.0
+    health: str = "healthy"
+    fingerprint: Optional[str] = None
+    reused_from: Optional[str] = None
+    estimated_memory_gb: Optional[float] = None
+    progress: Optional[float] = None
+    eta_seconds: Optional[float] = None
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
     created_at: str = ""
 
 
+class CheckpointRecord(BaseModel):
+    run_id: str
+    step: int
+    path: str
+    loss: Optional[float] = None
+    size_bytes: int = 0
+    created_at: str = ""
+
+
+class RunEvent(BaseModel):
+    run_id: str
+    kind: str
+    message: str = ""
+    details: dict = Field(default_factory=dict)
+    created_at: str = ""
+
+
+# --- Sweep schemas ---
+
+class SweepCreate(BaseModel):
+    name: str
+    base_model: str
+    dataset_id: str
+    recipe: RecipeType = RecipeType.LORA_SFT
+    strategy: SweepStrategy = SweepStrategy.GRID
+    # key -> list of values, {"values": [...]}, or {"min", "max", "log"} (random only)
+    search_space: dict
+    num_trials: Optional[int] = None
+    seed: Optional[int] = None
+    config_overrides: dict = Field(default_factory=dict)
+    num_gpus: int = 1
+    priority: int = 0
+    max_concurrent_trials: int = 4
+    min_steps: int = 100
+    reduction_factor: int = 3
+
+
+class SweepTrial(BaseModel):
+    trial_index: int
+    params: dict
+    run_id: Optional[str] = None
+    status: TrialStatus
+    rung: int = 0
+    step: int = 0
+    loss: Optional[float] = None
+    error_message: Optional[str] = None
+
+
+class SweepRecord(BaseModel):
+    id: str
+    name: str
+    base_model: str
+    dataset_id: str
+    recipe: str
+    strategy: SweepStrategy
+    search_space: dict
+    config: dict
+    num_gpus: int
+    priority: int
+    max_concurrent_trials: int
+    min_steps: int
+    reduction_factor: int
+    status: SweepStatus
+    best_run_id: Optional[str] = None
+    tenant_id: str = "default"
+    completed_at: Optional[str] = None
+    created_at: str = ""
+    trials: list[SweepTrial] = Field(default_factory=list)
+
+
 # --- Model registry schemas ---
 
 class ModelPromote(BaseModel):
@@ -143,6 +274,7 @@ class EvalRun(BaseModel):
     suite: str = "default"
     benchmarks: list[str] = Field(default_factory=list)
     regression_baseline_id: Optional[str] = None
+    force_refresh: bool = False
 
 
 class EvalResult(BaseModel):
@@ -161,9 +293,36 @@ class EvalRecord(BaseModel):
     results: list[EvalResult] = Field(default_factory=list)
     regression_baseline_id: Optional[str] = None
     overall_score: Optional[float] = None
+    progress: Optional[dict] = None
+    batch_id: Optional[str] = None
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    created_at: str = ""
+
+
+class EvalBatchRun(BaseModel):
+    model_ids: list[str] = Field(min_length=1)
+    suite: str = "default"
+    benchmarks: list[str] = Field(default_factory=list)
+    force_refresh: bool = False
+    # Cap on this batch's (model, benchmark) units queued on the eval pool.
+    max_concurrent_units: Optional[int] = Field(None, ge=1)
+
+
+class EvalBatchRecord(BaseModel):
+    id: str
+    suite: str
+    benchmarks: list[str]
+    status: EvalBatchStatus
+    total_units: int
+    completed_units: int = 0
+    cached_units: int = 0
+    failed_units: int = 0
+    max_concurrent_units: int
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
     created_at: str = ""
+    evals: list[EvalRecord] = Field(default_factory=list)
 
 
 # --- API response wrappers ---
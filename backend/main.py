@@ -2,7 +2,9 @@
 # https://www.linkedin.com/in/ahmadghazinazer
 
 import sys
+import asyncio
 import logging
+from typing import Optional
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -12,8 +14,8 @@ from fastapi.responses import JSONResponse
 from config import settings
 from core.db import init_db
 from core.exceptions import ForgeError
-from routers import datasets, runs, models, evals
-from services import cluster_service
+from routers import datasets, runs, sweeps, models, evals, leaderboard
+from services import cluster_service, estimator, eval_executor, training_service
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,9 +27,16 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    cluster_service.load_cluster()
+    training_service.start_workers()
+    eval_executor.start()
+    monitor = asyncio.create_task(cluster_service.monitor_heartbeats())
     logger.info("forge-ml v%s started", settings.version)
     yield
     logger.info("forge-ml shutting down")
+    monitor.cancel()
+    training_service.stop_workers()
+    eval_executor.shutdown()
 
 
 app = FastAPI(
@@ -56,8 +65,10 @@ async def forge_error_handler(request, exc: ForgeError):
 
 app.include_router(datasets.router)
 app.include_router(runs.router)
+app.include_router(sweeps.router)
 app.include_router(models.router)
 app.include_router(evals.router)
+app.include_router(leaderboard.router)
 
 
 @app.get("/")
@@ -79,9 +90,19 @@ def cluster_status():
     return cluster_service.get_cluster_status()
 
 
+@app.get("/cluster/workers")
+def cluster_workers():
+    return training_service.worker_stats()
+
+
 @app.get("/cluster/cost")
-def cluster_cost(num_gpus: int = 1, hours: float = 1.0):
-    return cluster_service.estimate_cost(num_gpus, hours)
+def cluster_cost(num_gpus: int = 1, hours: float = 1.0, gpu_type: Optional[str] = None):
+    return cluster_service.estimate_cost(num_gpus, hours, gpu_type)
+
+
+@app.get("/cluster/throughput")
+def cluster_throughput(recipe: Optional[str] = None, base_model: Optional[str] = None):
+    return estimator.history(recipe, base_model)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+
+from recipes.distributed import should_stop
+
+
+def stop_callback(token):
+    """Trainer callback that ends training once `token.is_set()` is true."""
+    from transformers import TrainerCallback
+
+    class StopOnRequest(TrainerCallback):
+        def _check(self, control):
+            if should_stop(token):
+                control.should_training_stop = True
+                control.should_save = False
+            return control
+
+        def on_substep_end(self, args, state, control, **kwargs):
+            return self._check(control)
+
+        def on_step_end(self, args, state, control, **kwargs):
+            return self._check(control)
+
+    return StopOnRequest()
@@ -0,0 +1,280 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import copy
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "checkpoint.json"
+
+
+@dataclass
+class CheckpointInfo:
+    step: int
+    path: str
+    loss: Optional[float] = None
+    size_bytes: int = 0
+    created_at: float = 0.0
+
+
+def _to_host(obj):
+    # Detached CPU copies, so training can keep mutating the live tensors
+    # while the writer thread serializes the snapshot.
+    try:
+        import torch
+    except ImportError:
+        torch = None
+
+    if torch is not None and isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _to_host(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_host(v) for v in obj)
+    return copy.deepcopy(obj)
+
+
+def _json_default(obj):
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    return str(obj)
+
+
+def _write_file(path: str, payload):
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(payload, f, default=_json_default)
+    elif path.endswith(".safetensors"):
+        from safetensors.torch import save_file
+        save_file({k: v.contiguous() for k, v in payload.items()}, path)
+    else:
+        import torch
+        torch.save(payload, path)
+
+
+def _read_file(path: str):
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+    if path.endswith(".safetensors"):
+        from safetensors.torch import load_file
+        return load_file(path)
+    import torch
+    return torch.load(path, map_location="cpu", weights_only=False)
+
+
+def load_checkpoint(path: str) -> dict:
+    return {
+        name: _read_file(os.path.join(path, name))
+        for name in os.listdir(path)
+        if name != META_FILE and not name.startswith(".")
+    }
+
+
+class CheckpointManager:
+    """Snapshots training state to host memory and writes it on a background thread."""
+
+    def __init__(
+        self,
+        run_id: str,
+        root: Optional[str] = None,
+        keep_last: Optional[int] = None,
+        keep_best: bool = True,
+        on_saved: Optional[Callable[[dict], None]] = None,
+    ):
+        self.run_dir = os.path.join(root or settings.checkpoint_dir, run_id)
+        self.keep_last = keep_last if keep_last is not None else settings.checkpoint_keep_last
+        self.keep_best = keep_best
+        self._on_saved = on_saved
+        # Bounded so a slow disk applies backpressure instead of piling up
+        # snapshots in host memory.
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.checkpoint_max_pending)
+        self._checkpoints: list[CheckpointInfo] = self._scan()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self.snapshot_seconds = 0.0
+        self.write_seconds = 0.0
+        self.errors = 0
+
+    def _scan(self) -> list[CheckpointInfo]:
+        # Pick up checkpoints from earlier attempts so retention spans retries.
+        found = []
+        if not os.path.isdir(self.run_dir):
+            return found
+        for name in os.listdir(self.run_dir):
+            if not name.startswith("."):
+                continue
+            # Left by a writer that died mid-save: a temp dir is incomplete,
+            # while a copy moved aside is restored if its replacement never
+            # landed.
+            stale = os.path.join(self.run_dir, name)
+            final = os.path.join(self.run_dir, name[1:].rsplit(".", 1)[0])
+            if name.endswith(".old") and not os.path.exists(final):
+                os.replace(stale, final)
+            else:
+                shutil.rmtree(stale, ignore_errors=True)
+        for name in os.listdir(self.run_dir):
+            if name.startswith(".") or name.endswith(".tmp"):
+                continue
+            meta_path = os.path.join(self.run_dir, name, META_FILE)
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    found.append(CheckpointInfo(**json.load(f)))
+        return sorted(found, key=lambda c: c.step)
+
+    def save(self, step: int, files: dict, loss: Optional[float] = None):
+        start = time.perf_counter()
+        snapshot = _to_host(files)
+        self.snapshot_seconds += time.perf_counter() - start
+
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="checkpoint-writer", daemon=True,
+            )
+            self._writer.start()
+        self._queue.put((step, snapshot, loss))
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception:
+                self.errors += 1
+                logger.exception("Checkpoint write failed in %s", self.run_dir)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, step: int, files: dict, loss: Optional[float]):
+        start = time.perf_counter()
+        path = os.path.join(self.run_dir, f"checkpoint-{step}")
+        tmp_path = os.path.join(self.run_dir, f".checkpoint-{step}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for name, payload in files.items():
+            _write_file(os.path.join(tmp_path, name), payload)
+        size = sum(
+            os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path)
+        )
+        info = CheckpointInfo(
+            step=step, path=path, loss=loss, size_bytes=size, created_at=time.time(),
+        )
+        _write_file(os.path.join(tmp_path, META_FILE), asdict(info))
+
+        # Readers only ever see complete checkpoints, and an earlier copy of
+        # this step stays on disk until its replacement is in place.
+        old_path = os.path.join(self.run_dir, f".checkpoint-{step}.old")
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        self.write_seconds += time.perf_counter() - start
+
+        with self._lock:
+            self._checkpoints = [c for c in self._checkpoints if c.step != step]
+            self._checkpoints.append(info)
+            self._checkpoints.sort(key=lambda c: c.step)
+            removed = self._apply_retention()
+
+        if self._on_saved is not None:
+            self._on_saved({**asdict(info), "removed": [c.path for c in removed]})
+
+    def _retained(self) -> set[int]:
+        keep = {c.step for c in self._checkpoints[-self.keep_last:]} if self.keep_last else set()
+        scored = [c for c in self._checkpoints if c.loss is not None]
+        if self.keep_best and scored:
+            keep.add(min(scored, key=lambda c: c.loss).step)
+        if self._checkpoints:
+            keep.add(self._checkpoints[-1].step)
+        return keep
+
+    def _apply_retention(self) -> list[CheckpointInfo]:
+        keep = self._retained()
+        removed = [c for c in self._checkpoints if c.step not in keep]
+        for info in removed:
+            shutil.rmtree(info.path, ignore_errors=True)
+        self._checkpoints = [c for c in self._checkpoints if c.step in keep]
+        return removed
+
+    def latest(self) -> Optional[CheckpointInfo]:
+        with self._lock:
+            return self._checkpoints[-1] if self._checkpoints else None
+
+    def best(self) -> Optional[CheckpointInfo]:
+        with self._lock:
+            scored = [c for c in self._checkpoints if c.loss is not None]
+            return min(scored, key=lambda c: c.loss) if scored else None
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkpoints": len(self._checkpoints),
+                "bytes_on_disk": sum(c.size_bytes for c in self._checkpoints),
+                "snapshot_seconds": round(self.snapshot_seconds, 4),
+                "write_seconds": round(self.write_seconds, 4),
+                "errors": self.errors,
+            }
+
+
+def trainer_files(model, optimizer=None, lr_scheduler=None, state=None) -> dict:
+    """Checkpoint contents in the layout Trainer(resume_from_checkpoint=...) reads."""
+    files = {}
+    if hasattr(model, "peft_config"):
+        from peft import get_peft_model_state_dict
+
+        files["adapter_model.safetensors"] = get_peft_model_state_dict(model)
+        files["adapter_config.json"] = model.peft_config["default"].to_dict()
+    else:
+        files["pytorch_model.bin"] = model.state_dict()
+    if optimizer is not None:
+        files["optimizer.pt"] = optimizer.state_dict()
+    if lr_scheduler is not None:
+        files["scheduler.pt"] = lr_scheduler.state_dict()
+    if state is not None:
+        files["trainer_state.json"] = asdict(state)
+    return files
+
+
+def trainer_callback(manager: CheckpointManager, every_steps: int):
+    from transformers import TrainerCallback
+
+    class AsyncCheckpointCallback(TrainerCallback):
+        def on_step_end(self, args, state, control, model=None, optimizer=None,
+                        lr_scheduler=None, **kwargs):
+            if every_steps <= 0 or state.global_step % every_steps:
+                return
+            losses = [h["loss"] for h in state.log_history if "loss" in h]
+            manager.save(
+                state.global_step,
+                trainer_files(model, optimizer, lr_scheduler, state),
+                loss=losses[-1] if losses else None,
+            )
+
+        def on_train_end(self, args, state, control, **kwargs):
+            manager.close()
+
+    return AsyncCheckpointCallback()
@@ -0,0 +1,281 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Metrics that add up across ranks; everything else is averaged.
+SUM_METRICS = {"throughput_samples_sec", "samples", "tokens"}
+# How long surviving ranks get to exit after another rank fails.
+FAILURE_GRACE_SECONDS = 10.0
+
+
+@dataclass
+class RankSpec:
+    rank: int
+    local_rank: int
+    node_id: str
+    device: int
+
+
+@dataclass
+class DistributedContext:
+    rank: int
+    local_rank: int
+    world_size: int
+    backend: str
+    device: str
+
+    @property
+    def is_main(self) -> bool:
+        return self.rank == 0
+
+
+def plan_ranks(allocation: dict[str, list[int]]) -> list[RankSpec]:
+    """One rank per allocated GPU, numbered by node id then device index."""
+    specs = []
+    for node_id in sorted(allocation):
+        for local_rank, device in enumerate(sorted(allocation[node_id])):
+            specs.append(RankSpec(len(specs), local_rank, node_id, device))
+    return specs
+
+
+def default_backend() -> str:
+    import torch
+
+    return "nccl" if torch.cuda.is_available() else "gloo"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def is_distributed() -> bool:
+    try:
+        import torch.distributed as dist
+    except ImportError:
+        return False
+    return dist.is_available() and dist.is_initialized()
+
+
+def should_stop(stop) -> bool:
+    """Whether any rank was asked to stop; every rank must call it together."""
+    requested = stop is not None and stop.is_set()
+    if not is_distributed():
+        return requested
+    import torch
+    import torch.distributed as dist
+
+    # One rank leaving a collective alone would hang the others.
+    flag = torch.tensor([1.0 if requested else 0.0], device=_collective_device())
+    dist.all_reduce(flag, op=dist.ReduceOp.MAX)
+    return bool(flag.item())
+
+
+def _collective_device():
+    import torch
+    import torch.distributed as dist
+
+    if dist.get_backend() == "nccl":
+        return torch.device("cuda", torch.cuda.current_device())
+    return torch.device("cpu")
+
+
+def shard(dataset, ctx: DistributedContext):
+    """This rank's contiguous share of a dataset or sequence."""
+    if ctx.world_size == 1:
+        return dataset
+    if hasattr(dataset, "shard"):
+        return dataset.shard(num_shards=ctx.world_size, index=ctx.rank, contiguous=True)
+    per_rank, extra = divmod(len(dataset), ctx.world_size)
+    start = ctx.rank * per_rank + min(ctx.rank, extra)
+    return dataset[start:start + per_rank + (1 if ctx.rank < extra else 0)]
+
+
+def reduce_metrics(ctx: DistributedContext, metrics: dict) -> Optional[dict]:
+    """Combine one step's metrics across ranks; only rank 0 gets the result."""
+    if ctx.world_size == 1:
+        return metrics
+    import torch
+    import torch.distributed as dist
+
+    keys = sorted(k for k, v in metrics.items() if isinstance(v, (int, float)))
+    values = torch.tensor([float(metrics[k]) for k in keys], device=_collective_device())
+    dist.reduce(values, dst=0, op=dist.ReduceOp.SUM)
+    if not ctx.is_main:
+        return None
+    combined = dict(metrics)
+    for key, total in zip(keys, values.tolist()):
+        combined[key] = total if key in SUM_METRICS else total / ctx.world_size
+    return combined
+
+
+def _run_rank(
+    spec: RankSpec, world_size: int, local_world_size: int, backend: str,
+    master_addr: str, master_port: int, target: Callable, args: tuple, stop, results,
+):
+    import torch
+    import torch.distributed as dist
+
+    os.environ.update(
+        RANK=str(spec.rank),
+        LOCAL_RANK=str(spec.local_rank),
+        WORLD_SIZE=str(world_size),
+        LOCAL_WORLD_SIZE=str(local_world_size),
+        MASTER_ADDR=master_addr,
+        MASTER_PORT=str(master_port),
+    )
+    device = "cpu"
+    if backend == "nccl":
+        torch.cuda.set_device(spec.device)
+        device = f"cuda:{spec.device}"
+    else:
+        # Ranks share the host's cores instead of oversubscribing them.
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // local_world_size))
+    dist.init_process_group(backend, rank=spec.rank, world_size=world_size)
+    ctx = DistributedContext(spec.rank, spec.local_rank, world_size, backend, device)
+    try:
+        results.put((spec.rank, target(ctx, stop, *args), None))
+    except BaseException as e:
+        logger.exception("Rank %d failed", spec.rank)
+        results.put((spec.rank, None, f"{type(e).__name__}: {e}"))
+    finally:
+        dist.destroy_process_group()
+
+
+def _forward_stop(stop, event, done: threading.Event):
+    while not done.wait(0.5):
+        if stop.is_set():
+            event.set()
+            return
+
+
+def launch(
+    target: Callable,
+    args: tuple = (),
+    allocation: Optional[dict[str, list[int]]] = None,
+    world_size: Optional[int] = None,
+    node_id: Optional[str] = None,
+    backend: Optional[str] = None,
+    master_addr: str = "127.0.0.1",
+    master_port: Optional[int] = None,
+    stop=None,
+):
+    """Run target(ctx, stop, *args) in one process per rank; returns rank 0's result.
+
+    Ranks come from a cluster allocation (node id -> GPU indices), or from
+    world_size for a single host. With node_id only that node's ranks start
+    here, and the other nodes launch theirs against the same master.
+    """
+    import torch.multiprocessing as mp
+
+    specs = plan_ranks(allocation) if allocation else [
+        RankSpec(r, r, "local", r) for r in range(world_size or 1)
+    ]
+    local = [s for s in specs if node_id is None or s.node_id == node_id]
+    backend = backend or default_backend()
+    master_port = master_port or _free_port()
+
+    spawn = mp.get_context("spawn")
+    results = spawn.Queue()
+    stop_event = spawn.Event()
+    procs = [
+        spawn.Process(
+            target=_run_rank,
+            args=(s, len(specs), len(local), backend, master_addr, master_port,
+                  target, args, stop_event, results),
+        )
+        for s in local
+    ]
+    logger.info(
+        "Launching %d of %d ranks (%s) on %s",
+        len(local), len(specs), backend, node_id or "this host",
+    )
+    for p in procs:
+        p.start()
+
+    done = threading.Event()
+    if stop is not None:
+        threading.Thread(
+            target=_forward_stop, args=(stop, stop_event, done), daemon=True,
+        ).start()
+
+    outputs, errors = {}, {}
+    failed_at = None
+    try:
+        while len(outputs) + len(errors) < len(local):
+            try:
+                rank, value, error = results.get(timeout=1.0)
+            except queue.Empty:
+                for s, p in zip(local, procs):
+                    if not p.is_alive() and s.rank not in outputs and s.rank not in errors:
+                        errors[s.rank] = f"exited with code {p.exitcode}"
+            else:
+                if error is None:
+                    outputs[rank] = value
+                else:
+                    errors[rank] = error
+            if errors and failed_at is None:
+                failed_at = time.monotonic()
+            if failed_at and time.monotonic() - failed_at > FAILURE_GRACE_SECONDS:
+                # Survivors are blocked in a collective with the failed rank.
+                break
+    finally:
+        done.set()
+        for p in procs:
+            if failed_at:
+                p.join(timeout=1.0)
+                if p.is_alive():
+                    p.terminate()
+            p.join()
+
+    if errors:
+        # The first failure is the cause; later ones are peers losing it.
+        rank, error = next(iter(errors.items()))
+        raise RuntimeError(f"Rank {rank} of {len(specs)} failed: {error}")
+    return outputs.get(0)
+
+
+def _recipe_rank(ctx: DistributedContext, stop, recipe_name: str, recipe, dataset, run_id):
+    from recipes.checkpoint_manager import CheckpointManager
+
+    if recipe_name == "dpo":
+        from recipes.dpo import run_dpo as run
+    elif recipe_name == "rlhf":
+        from recipes.rlhf import run_rlhf as run
+    else:
+        from recipes.lora_sft import run_sft as run
+    # The trainers shard batches with their own distributed samplers once
+    # the process group exists; only rank 0 writes checkpoints.
+    checkpoints = CheckpointManager(run_id) if run_id and ctx.is_main else None
+    return run(recipe, dataset, checkpoints=checkpoints, stop=stop)
+
+
+def train(
+    recipe_name: str,
+    recipe,
+    dataset,
+    allocation: Optional[dict[str, list[int]]] = None,
+    node_id: Optional[str] = None,
+    stop=None,
+    run_id: Optional[str] = None,
+):
+    """Run a recipe data-parallel across a run's allocated GPUs.
+
+    Not yet called by the worker, whose training job is simulated; this is
+    the entry point a real recipe path would use with the job's allocation.
+    """
+    return launch(
+        _recipe_rank, (recipe_name, recipe, dataset, run_id),
+        allocation=allocation, node_id=node_id, stop=stop,
+    )
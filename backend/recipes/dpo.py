@@ -4,6 +4,12 @@
 import os
 import logging
 from dataclasses import dataclass
+from typing import Optional
+
+from recipes.callbacks import stop_callback
+from recipes.checkpoint_manager import CheckpointManager, trainer_callback
+from recipes import memory
+from recipes.model_cache import load_base_model, load_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +26,17 @@ class DPORecipeConfig:
     max_length: int = 1024
     output_dir: str = "./out"
     logging_steps: int = 10
+    save_steps: int = 200
     lora_r: int = 16
     lora_alpha: int = 32
     lora_dropout: float = 0.05
+    target_modules: list[str] = None
+    resume_from_checkpoint: Optional[str] = None
+    probe_batch_size: bool = False
+
+    def __post_init__(self):
+        if self.target_modules is None:
+            self.target_modules = ["c_attn", "c_proj"]
 
 
 def build_dpo_config(recipe: DPORecipeConfig) -> dict:
@@ -34,38 +48,40 @@ def build_dpo_config(recipe: DPORecipeConfig) -> dict:
 
 
 def prepare_dpo_model(recipe: DPORecipeConfig):
-    from transformers import AutoModelForCausalLM, AutoTokenizer
     from peft import LoraConfig, get_peft_model
 
-    tokenizer = AutoTokenizer.from_pretrained(recipe.base_model)
-    if tokenizer.pad_token is None:
-        tokenizer.pad_token = tokenizer.eos_token
-
-    model = AutoModelForCausalLM.from_pretrained(
-        recipe.base_model, torch_dtype="auto",
-    )
+    tokenizer = load_tokenizer(recipe.base_model)
+    model = load_base_model(recipe.base_model, torch_dtype="auto")
 
     lora_config = LoraConfig(
         r=recipe.lora_r,
         lora_alpha=recipe.lora_alpha,
         lora_dropout=recipe.lora_dropout,
-        target_modules=["c_attn", "c_proj"],
+        target_modules=recipe.target_modules,
         bias="none",
         task_type="CAUSAL_LM",
     )
     model = get_peft_model(model, lora_config)
 
-    ref_model = AutoModelForCausalLM.from_pretrained(
-        recipe.base_model, torch_dtype="auto",
-    )
+    ref_model = load_base_model(recipe.base_model, torch_dtype="auto")
 
     return model, ref_model, tokenizer
 
 
-def run_dpo(recipe: DPORecipeConfig, train_dataset):
+def run_dpo(
+    recipe: DPORecipeConfig,
+    train_dataset,
+    checkpoints: Optional[CheckpointManager] = None,
+    stop=None,
+):
     from trl import DPOTrainer, DPOConfig
 
     model, ref_model, tokenizer = prepare_dpo_model(recipe)
+    if recipe.probe_batch_size:
+        # Chosen and rejected completions share each forward pass.
+        recipe = memory.probe_batch_size(
+            recipe, memory.oom_probe(model, recipe.max_length, copies=2)
+        )
 
     os.makedirs(recipe.output_dir, exist_ok=True)
 
@@ -79,23 +95,33 @@ def run_dpo(recipe: DPORecipeConfig, train_dataset):
         max_prompt_length=recipe.max_prompt_length,
         max_length=recipe.max_length,
         logging_steps=recipe.logging_steps,
+        save_steps=recipe.save_steps,
+        save_strategy="no" if checkpoints else "steps",
         fp16=True,
         remove_unused_columns=False,
         report_to="none",
     )
 
+    callbacks = []
+    if checkpoints is not None:
+        callbacks.append(trainer_callback(checkpoints, recipe.save_steps))
+    if stop is not None:
+        callbacks.append(stop_callback(stop))
+
     trainer = DPOTrainer(
         model=model,
         ref_model=ref_model,
         args=training_args,
         train_dataset=train_dataset,
         tokenizer=tokenizer,
+        callbacks=callbacks,
     )
-    trainer.train()
+    trainer.train(resume_from_checkpoint=recipe.resume_from_checkpoint)
 
     adapter_path = os.path.join(recipe.output_dir, "dpo_adapter")
-    model.save_pretrained(adapter_path)
-    tokenizer.save_pretrained(adapter_path)
-    logger.info("DPO adapter saved to %s", adapter_path)
+    if trainer.is_world_process_zero():
+        model.save_pretrained(adapter_path)
+        tokenizer.save_pretrained(adapter_path)
+        logger.info("DPO adapter saved to %s", adapter_path)
 
     return adapter_path
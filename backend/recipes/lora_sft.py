@@ -4,6 +4,12 @@
 import os
 import logging
 from dataclasses import dataclass
+from typing import Optional
+
+from recipes.callbacks import stop_callback
+from recipes.checkpoint_manager import CheckpointManager, trainer_callback
+from recipes import memory
+from recipes.model_cache import load_base_model, load_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +31,8 @@ class LoraRecipeConfig:
     output_dir: str = "./out"
     logging_steps: int = 20
     save_steps: int = 200
+    resume_from_checkpoint: Optional[str] = None
+    probe_batch_size: bool = False
 
     def __post_init__(self):
         if self.target_modules is None:
@@ -45,16 +53,10 @@ def build_lora_config(recipe: LoraRecipeConfig):
 
 
 def prepare_model(recipe: LoraRecipeConfig):
-    from transformers import AutoModelForCausalLM, AutoTokenizer
     from peft import get_peft_model
 
-    tokenizer = AutoTokenizer.from_pretrained(recipe.base_model)
-    if tokenizer.pad_token is None:
-        tokenizer.pad_token = tokenizer.eos_token
-
-    model = AutoModelForCausalLM.from_pretrained(
-        recipe.base_model, torch_dtype="auto",
-    )
+    tokenizer = load_tokenizer(recipe.base_model)
+    model = load_base_model(recipe.base_model, torch_dtype="auto")
 
     lora_config = build_lora_config(recipe)
     model = get_peft_model(model, lora_config)
@@ -69,7 +71,7 @@ def prepare_model(recipe: LoraRecipeConfig):
     return model, tokenizer
 
 
-def build_training_args(recipe: LoraRecipeConfig):
+def build_training_args(recipe: LoraRecipeConfig, async_checkpoints: bool = False):
     from transformers import TrainingArguments
 
     os.makedirs(recipe.output_dir, exist_ok=True)
@@ -82,29 +84,47 @@ def build_training_args(recipe: LoraRecipeConfig):
         warmup_ratio=recipe.warmup_ratio,
         logging_steps=recipe.logging_steps,
         save_steps=recipe.save_steps,
+        save_strategy="no" if async_checkpoints else "steps",
         fp16=True,
         remove_unused_columns=False,
         report_to="none",
     )
 
 
-def run_sft(recipe: LoraRecipeConfig, dataset):
+def run_sft(
+    recipe: LoraRecipeConfig,
+    dataset,
+    checkpoints: Optional[CheckpointManager] = None,
+    stop=None,
+):
     from transformers import Trainer
 
     model, tokenizer = prepare_model(recipe)
-    args = build_training_args(recipe)
+    if recipe.probe_batch_size:
+        recipe = memory.probe_batch_size(
+            recipe, memory.oom_probe(model, recipe.max_seq_length)
+        )
+    args = build_training_args(recipe, async_checkpoints=checkpoints is not None)
+
+    callbacks = []
+    if checkpoints is not None:
+        callbacks.append(trainer_callback(checkpoints, recipe.save_steps))
+    if stop is not None:
+        callbacks.append(stop_callback(stop))
 
     trainer = Trainer(
         model=model,
         args=args,
         train_dataset=dataset,
         tokenizer=tokenizer,
+        callbacks=callbacks,
     )
-    trainer.train()
+    trainer.train(resume_from_checkpoint=recipe.resume_from_checkpoint)
 
     adapter_path = os.path.join(recipe.output_dir, "lora_adapter")
-    model.save_pretrained(adapter_path)
-    tokenizer.save_pretrained(adapter_path)
-    logger.info("Adapter saved to %s", adapter_path)
+    if trainer.is_world_process_zero():
+        model.save_pretrained(adapter_path)
+        tokenizer.save_pretrained(adapter_path)
+        logger.info("Adapter saved to %s", adapter_path)
 
     return adapter_path
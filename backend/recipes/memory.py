@@ -0,0 +1,310 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, asdict, fields, replace
+from functools import lru_cache
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+DTYPE_BYTES = {"fp32": 4, "float32": 4, "fp16": 2, "float16": 2, "bf16": 2, "bfloat16": 2, "auto": 2}
+# fp32 master copy, gradient and two Adam moments per trainable parameter.
+TRAINABLE_BYTES = 16
+# CUDA context, allocator fragmentation and framework workspaces.
+OVERHEAD_BYTES = 1.5 * GB
+# Stored activations per token per layer, in units of hidden size, for a
+# transformer block with memory-efficient attention (Korthikanti et al., 2022,
+# without the quadratic attention-score term).
+ACTIVATION_FACTOR = 34
+GATED_MLP_MODELS = {"llama", "mistral", "mixtral", "qwen2", "gemma", "gemma2", "phi3"}
+
+
+@dataclass
+class ModelShape:
+    hidden_size: int
+    num_layers: int
+    num_heads: int
+    num_kv_heads: int
+    intermediate_size: int
+    vocab_size: int
+    gated_mlp: bool = False
+
+    @property
+    def num_params(self) -> int:
+        h, i = self.hidden_size, self.intermediate_size
+        kv = h * self.num_kv_heads // self.num_heads
+        attention = 2 * h * h + 2 * h * kv
+        mlp = (3 if self.gated_mlp else 2) * h * i
+        return self.num_layers * (attention + mlp) + self.vocab_size * h
+
+
+KNOWN_SHAPES = {
+    "gpt2": ModelShape(768, 12, 12, 12, 3072, 50257),
+    "gpt2-medium": ModelShape(1024, 24, 16, 16, 4096, 50257),
+    "gpt2-large": ModelShape(1280, 36, 20, 20, 5120, 50257),
+    "gpt2-xl": ModelShape(1600, 48, 25, 25, 6400, 50257),
+}
+
+
+@dataclass
+class MemoryEstimate:
+    weights_gb: float
+    trainable_gb: float
+    activations_gb: float
+    extra_models_gb: float
+    overhead_gb: float
+    total_gb: float
+    batch_size: int
+    gradient_accumulation_steps: int
+    trainable_params: int
+    model_params: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _shape_from_config(cfg: dict) -> ModelShape:
+    h = cfg.get("hidden_size") or cfg["n_embd"]
+    heads = cfg.get("num_attention_heads") or cfg["n_head"]
+    return ModelShape(
+        hidden_size=h,
+        num_layers=cfg.get("num_hidden_layers") or cfg["n_layer"],
+        num_heads=heads,
+        num_kv_heads=cfg.get("num_key_value_heads") or heads,
+        intermediate_size=cfg.get("intermediate_size") or cfg.get("n_inner") or 4 * h,
+        vocab_size=cfg["vocab_size"],
+        gated_mlp=cfg.get("model_type", "") in GATED_MLP_MODELS,
+    )
+
+
+def _config_path(model_id: str) -> Optional[str]:
+    # A local checkout, or the hub cache's snapshot for the main revision.
+    local = os.path.join(model_id, "config.json")
+    if os.path.isfile(local):
+        return local
+    hub = os.environ.get("HF_HUB_CACHE") or os.path.join(
+        os.environ.get("HF_HOME") or os.path.expanduser("~/.cache/huggingface"), "hub",
+    )
+    repo = os.path.join(hub, "models--" + model_id.replace("/", "--"))
+    try:
+        with open(os.path.join(repo, "refs", "main")) as f:
+            revisions = [f.read().strip()]
+    except OSError:
+        snapshots = os.path.join(repo, "snapshots")
+        revisions = sorted(os.listdir(snapshots)) if os.path.isdir(snapshots) else []
+    for revision in revisions:
+        path = os.path.join(repo, "snapshots", revision, "config.json")
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _shape_from_name(model_id: str) -> Optional[ModelShape]:
+    # "...-7b-..." style names: a standard decoder with a 128-wide head, whose
+    # depth is hidden/128 (params ~ 12 * layers * hidden^2).
+    match = re.search(r"(\d+(?:\.\d+)?)[bB](?![a-zA-Z])", model_id)
+    if not match:
+        return None
+    params = float(match.group(1)) * 1e9
+    h = int(round((params * 128 / 12) ** (1 / 3) / 128)) * 128
+    return ModelShape(h, h // 128, h // 128, h // 128, 4 * h, 32000)
+
+
+@lru_cache(maxsize=256)
+def model_shape(model_id: str) -> Optional[ModelShape]:
+    name = model_id.rstrip("/").split("/")[-1].lower()
+    if name in KNOWN_SHAPES:
+        return KNOWN_SHAPES[name]
+    # Runs in the API process at launch time, so read config.json directly
+    # rather than importing transformers, and never reach for the network.
+    path = _config_path(model_id)
+    if path is not None:
+        try:
+            with open(path) as f:
+                return _shape_from_config(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Unreadable model config %s: %s", path, e)
+    return _shape_from_name(model_id)
+
+
+def _module_dims(name: str, shape: ModelShape) -> list[tuple[int, int]]:
+    h, i = shape.hidden_size, shape.intermediate_size
+    kv = h * shape.num_kv_heads // shape.num_heads
+    return {
+        "c_attn": [(h, 3 * h)],
+        "c_proj": [(h, h), (i, h)],
+        "c_fc": [(h, i)],
+        "q_proj": [(h, h)],
+        "k_proj": [(h, kv)],
+        "v_proj": [(h, kv)],
+        "o_proj": [(h, h)],
+        "gate_proj": [(h, i)],
+        "up_proj": [(h, i)],
+        "down_proj": [(i, h)],
+        "query_key_value": [(h, 3 * h)],
+        "dense": [(h, h)],
+        "fc1": [(h, i)],
+        "fc2": [(i, h)],
+        "out_proj": [(h, h)],
+    }.get(name, [(h, h)])
+
+
+def lora_params(shape: ModelShape, r: int, target_modules: list[str]) -> int:
+    per_layer = sum(
+        r * (d_in + d_out)
+        for module in target_modules
+        for d_in, d_out in _module_dims(module, shape)
+    )
+    return shape.num_layers * per_layer
+
+
+def _activation_bytes(shape: ModelShape, batch: int, seq: int) -> float:
+    per_layer = ACTIVATION_FACTOR * batch * seq * shape.hidden_size
+    # Logits are upcast to fp32 for the loss.
+    logits = 4 * batch * seq * shape.vocab_size
+    return shape.num_layers * per_layer + logits
+
+
+def _kv_cache_bytes(shape: ModelShape, batch: int, seq: int, dtype_bytes: int) -> float:
+    kv = shape.hidden_size * shape.num_kv_heads // shape.num_heads
+    return 2 * shape.num_layers * kv * seq * batch * dtype_bytes
+
+
+def estimate(recipe, dtype: str = "fp16") -> Optional[MemoryEstimate]:
+    """Per-GPU training memory for a LoRA, DPO or RLHF recipe config."""
+    shape = model_shape(recipe.base_model)
+    if shape is None:
+        return None
+    dtype_bytes = DTYPE_BYTES.get(dtype, 2)
+    batch = recipe.batch_size
+    kind = type(recipe).__name__
+
+    if kind == "LoraRecipeConfig":
+        trainable = lora_params(shape, recipe.r, recipe.target_modules)
+        activations = _activation_bytes(shape, batch, recipe.max_seq_length)
+        extra = 0.0
+    elif kind == "DPORecipeConfig":
+        trainable = lora_params(shape, recipe.lora_r, recipe.target_modules)
+        # Chosen and rejected go through the policy together; the frozen
+        # reference model is a second copy of the weights, forward only.
+        activations = _activation_bytes(shape, 2 * batch, recipe.max_length)
+        extra = shape.num_params * dtype_bytes
+    elif kind == "RLHFRecipeConfig":
+        trainable = lora_params(shape, recipe.lora_r, recipe.target_modules)
+        seq = 2 * recipe.max_length
+        activations = _activation_bytes(shape, batch, seq)
+        extra = _kv_cache_bytes(shape, batch, seq, dtype_bytes)
+        reward = model_shape(recipe.reward_model) if recipe.reward_model else None
+        if reward is not None:
+            extra += reward.num_params * dtype_bytes
+    else:
+        raise ValueError(f"No memory model for {kind}")
+
+    weights = shape.num_params * dtype_bytes
+    trainable_bytes = trainable * TRAINABLE_BYTES
+    total = weights + trainable_bytes + activations + extra + OVERHEAD_BYTES
+    return MemoryEstimate(
+        weights_gb=round(weights / GB, 2),
+        trainable_gb=round(trainable_bytes / GB, 2),
+        activations_gb=round(activations / GB, 2),
+        extra_models_gb=round(extra / GB, 2),
+        overhead_gb=round(OVERHEAD_BYTES / GB, 2),
+        total_gb=round(total / GB, 2),
+        batch_size=batch,
+        gradient_accumulation_steps=getattr(recipe, "gradient_accumulation_steps", 1),
+        trainable_params=trainable,
+        model_params=shape.num_params,
+    )
+
+
+def _micro_batches(recipe) -> list[int]:
+    # Divisors of the effective batch, so accumulation keeps it exact.
+    effective = recipe.batch_size * getattr(recipe, "gradient_accumulation_steps", 1)
+    return [d for d in range(1, effective + 1) if effective % d == 0]
+
+
+def _with_micro_batch(recipe, micro: int):
+    if not hasattr(recipe, "gradient_accumulation_steps"):
+        return replace(recipe, batch_size=micro)
+    effective = recipe.batch_size * recipe.gradient_accumulation_steps
+    return replace(recipe, batch_size=micro, gradient_accumulation_steps=effective // micro)
+
+
+def fit_batch_size(recipe, gpu_memory_gb: float, dtype: str = "fp16"):
+    """Largest micro-batch up to the configured one whose estimate fits.
+
+    Returns (recipe, estimate); recipe is None if even a micro-batch of one
+    does not fit, and estimate is None if the model's shape is unknown.
+    """
+    current = estimate(recipe, dtype)
+    if current is None or current.total_gb <= gpu_memory_gb:
+        return recipe, current
+    if not hasattr(recipe, "gradient_accumulation_steps"):
+        # PPO's batch is a rollout size, not a micro-batch to accumulate.
+        return None, current
+    for micro in reversed([m for m in _micro_batches(recipe) if m < recipe.batch_size]):
+        candidate = _with_micro_batch(recipe, micro)
+        fitted = estimate(candidate, dtype)
+        if fitted.total_gb <= gpu_memory_gb:
+            return candidate, fitted
+    return None, estimate(_with_micro_batch(recipe, 1), dtype)
+
+
+def probe_batch_size(recipe, try_step: Callable[[int], bool]):
+    """Binary-search the largest micro-batch for which try_step succeeds."""
+    candidates = _micro_batches(recipe)
+    lo, hi, best = 0, len(candidates) - 1, None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if try_step(candidates[mid]):
+            best, lo = candidates[mid], mid + 1
+        else:
+            hi = mid - 1
+    if best is None:
+        raise MemoryError(f"A micro-batch of 1 does not fit for {recipe.base_model}")
+    logger.info(
+        "Probed micro-batch %d (configured %d) for %s",
+        best, recipe.batch_size, recipe.base_model,
+    )
+    return _with_micro_batch(recipe, best)
+
+
+def oom_probe(model, seq_len: int, copies: int = 1) -> Callable[[int], bool]:
+    """try_step for probe_batch_size: one forward/backward at full length."""
+    import torch
+
+    vocab = model.config.vocab_size
+    device = next(model.parameters()).device
+
+    def try_step(micro: int) -> bool:
+        ids = torch.randint(0, vocab, (micro * copies, seq_len), device=device)
+        try:
+            model(input_ids=ids, labels=ids).loss.backward()
+            return True
+        except (torch.cuda.OutOfMemoryError, RuntimeError) as e:
+            if "out of memory" not in str(e).lower():
+                raise
+            return False
+        finally:
+            model.zero_grad(set_to_none=True)
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    return try_step
+
+
+def recipe_config(recipe: str, base_model: str, config: dict):
+    """The recipe's config dataclass from a run's merged config dict."""
+    if recipe == "dpo":
+        from recipes.dpo import DPORecipeConfig as cls
+    elif recipe == "rlhf":
+        from recipes.rlhf import RLHFRecipeConfig as cls
+    else:
+        from recipes.lora_sft import LoraRecipeConfig as cls
+    names = {f.name for f in fields(cls)}
+    return cls(base_model=base_model, **{k: v for k, v in config.items() if k in names})
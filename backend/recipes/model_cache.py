@@ -0,0 +1,261 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import copy
+import json
+import mmap
+import os
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_SAFETENSORS_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+@dataclass
+class CacheEntry:
+    value: object
+    size_bytes: int
+    hits: int = 0
+
+
+class ModelCache:
+    """Process-wide LRU cache of frozen base models and tokenizers."""
+
+    def __init__(self, budget_bytes: int, use_mmap: bool = True):
+        self.budget_bytes = budget_bytes
+        self.use_mmap = use_mmap
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[tuple, threading.Lock] = {}
+
+    def _lookup(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        self.hits += 1
+        return entry
+
+    def get_or_load(self, key: tuple, loader: Callable[[], tuple[object, int]]):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.value
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Per-key lock so concurrent runs on the same base model load it once.
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry.value
+
+            value, size_bytes = loader()
+
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = CacheEntry(value=value, size_bytes=size_bytes)
+                self.used_bytes += size_bytes
+                self._evict()
+                self._load_locks.pop(key, None)
+        return value
+
+    def _evict(self):
+        while self.used_bytes > self.budget_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            self.used_bytes -= entry.size_bytes
+            self.evictions += 1
+            logger.info(
+                "Evicted %s from model cache (%.1f MB)",
+                key, entry.size_bytes / 1024 ** 2,
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "used_mb": round(self.used_bytes / 1024 ** 2, 1),
+                "budget_mb": round(self.budget_bytes / 1024 ** 2, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "keys": [list(k) for k in self._entries],
+            }
+
+
+_cache = ModelCache(
+    budget_bytes=settings.model_cache_budget_mb * 1024 ** 2,
+    use_mmap=settings.model_cache_mmap,
+)
+
+
+def _tensor_bytes(module) -> int:
+    seen = set()
+    total = 0
+    for t in list(module.parameters()) + list(module.buffers()):
+        if id(t) in seen:
+            continue
+        seen.add(id(t))
+        total += t.numel() * t.element_size()
+    return total
+
+
+def _safetensors_files(model_id: str) -> list[str]:
+    if os.path.isdir(model_id):
+        resolve = lambda name: os.path.join(model_id, name)
+    else:
+        from huggingface_hub import try_to_load_from_cache
+        resolve = lambda name: try_to_load_from_cache(model_id, name)
+
+    index_path = resolve("model.safetensors.index.json")
+    if isinstance(index_path, str) and os.path.exists(index_path):
+        with open(index_path) as f:
+            shards = sorted(set(json.load(f)["weight_map"].values()))
+        root = os.path.dirname(index_path)
+        return [os.path.join(root, s) for s in shards]
+
+    single = resolve("model.safetensors")
+    if isinstance(single, str) and os.path.exists(single):
+        return [single]
+    return []
+
+
+def _mmap_safetensors(path: str) -> dict:
+    import torch
+
+    with open(path, "rb") as f:
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len))
+        # Copy-on-write mapping: pages stay shared with the page cache (and
+        # with other worker processes) unless someone writes to them.
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_len
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype_name = _SAFETENSORS_DTYPES.get(info["dtype"])
+        begin, end = info["data_offsets"]
+        if dtype_name is None or end == begin:
+            continue
+        dtype = getattr(torch, dtype_name)
+        count = (end - begin) // torch.empty((), dtype=dtype).element_size()
+        tensor = torch.frombuffer(buf, dtype=dtype, count=count, offset=data_start + begin)
+        tensors[name] = tensor.view(info["shape"])
+    return tensors
+
+
+def _attach_mmapped_weights(model, model_id: str) -> int:
+    files = _safetensors_files(model_id)
+    if not files:
+        return 0
+
+    mapped = {}
+    for path in files:
+        mapped.update(_mmap_safetensors(path))
+
+    prefix = getattr(model, "base_model_prefix", "")
+    shared = 0
+    for name, param in model.named_parameters():
+        src = mapped.get(name)
+        if src is None and prefix and name.startswith(prefix + "."):
+            src = mapped.get(name[len(prefix) + 1:])
+        if src is None or src.shape != param.shape or src.dtype != param.dtype:
+            continue
+        param.data = src
+        shared += src.numel() * src.element_size()
+    return shared
+
+
+def _load_model(model_id: str, torch_dtype, task: str):
+    if task == "sequence_classification":
+        from transformers import AutoModelForSequenceClassification as model_cls
+    else:
+        from transformers import AutoModelForCausalLM as model_cls
+
+    model = model_cls.from_pretrained(
+        model_id, torch_dtype=torch_dtype, low_cpu_mem_usage=True,
+    )
+    model.eval()
+    for p in model.parameters():
+        p.requires_grad_(False)
+
+    if _cache.use_mmap:
+        try:
+            shared = _attach_mmapped_weights(model, model_id)
+            if shared:
+                logger.info(
+                    "Memory-mapped %.1f MB of %s weights", shared / 1024 ** 2, model_id,
+                )
+        except Exception as exc:
+            logger.warning("Could not memory-map weights for %s: %s", model_id, exc)
+
+    return model, _tensor_bytes(model)
+
+
+def _load_tokenizer(model_id: str):
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer, 0
+
+
+def _view(model):
+    # New module tree whose parameters and buffers are the cached tensors, so
+    # PEFT can wrap layers per run without copying or mutating the base.
+    memo = {id(t): t for t in list(model.parameters()) + list(model.buffers())}
+    return copy.deepcopy(model, memo)
+
+
+def load_base_model(model_id: str, torch_dtype="auto", task: str = "causal_lm"):
+    key = ("model", model_id, str(torch_dtype), task)
+    base = _cache.get_or_load(key, lambda: _load_model(model_id, torch_dtype, task))
+    return _view(base)
+
+
+def load_tokenizer(model_id: str):
+    return _cache.get_or_load(("tokenizer", model_id), lambda: _load_tokenizer(model_id))
+
+
+def load_cached(key: tuple, loader: Callable[[], tuple[object, int]]):
+    """Cache a model derived from a base (e.g. with an adapter applied) under the same budget."""
+    return _cache.get_or_load(key, loader)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
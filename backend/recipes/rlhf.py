@@ -4,6 +4,11 @@
 import os
 import logging
 from dataclasses import dataclass
+from typing import Optional
+
+from recipes.checkpoint_manager import CheckpointManager, trainer_files
+from recipes.distributed import should_stop
+from recipes.model_cache import load_base_model, load_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -20,26 +25,26 @@ class RLHFRecipeConfig:
     max_length: int = 512
     output_dir: str = "./out"
     logging_steps: int = 10
+    save_steps: int = 50
     lora_r: int = 16
     lora_alpha: int = 32
+    target_modules: list[str] = None
+
+    def __post_init__(self):
+        if self.target_modules is None:
+            self.target_modules = ["c_attn", "c_proj"]
 
 
 def prepare_rlhf_models(recipe: RLHFRecipeConfig):
-    from transformers import AutoModelForCausalLM, AutoTokenizer
     from peft import LoraConfig, get_peft_model
 
-    tokenizer = AutoTokenizer.from_pretrained(recipe.base_model)
-    if tokenizer.pad_token is None:
-        tokenizer.pad_token = tokenizer.eos_token
-
-    model = AutoModelForCausalLM.from_pretrained(
-        recipe.base_model, torch_dtype="auto",
-    )
+    tokenizer = load_tokenizer(recipe.base_model)
+    model = load_base_model(recipe.base_model, torch_dtype="auto")
 
     lora_config = LoraConfig(
         r=recipe.lora_r,
         lora_alpha=recipe.lora_alpha,
-        target_modules=["c_attn", "c_proj"],
+        target_modules=recipe.target_modules,
         bias="none",
         task_type="CAUSAL_LM",
     )
@@ -47,9 +52,8 @@ def prepare_rlhf_models(recipe: RLHFRecipeConfig):
 
     reward_model = None
     if recipe.reward_model:
-        from transformers import AutoModelForSequenceClassification
-        reward_model = AutoModelForSequenceClassification.from_pretrained(
-            recipe.reward_model, torch_dtype="auto",
+        reward_model = load_base_model(
+            recipe.reward_model, torch_dtype="auto", task="sequence_classification",
         )
 
     return model, reward_model, tokenizer
@@ -68,7 +72,12 @@ def build_ppo_config(recipe: RLHFRecipeConfig):
     )
 
 
-def run_rlhf(recipe: RLHFRecipeConfig, prompt_dataset):
+def run_rlhf(
+    recipe: RLHFRecipeConfig,
+    prompt_dataset,
+    checkpoints: Optional[CheckpointManager] = None,
+    stop=None,
+):
     from trl import PPOTrainer
 
     model, reward_model, tokenizer = prepare_rlhf_models(recipe)
@@ -84,8 +93,14 @@ def run_rlhf(recipe: RLHFRecipeConfig, prompt_dataset):
         dataset=prompt_dataset,
     )
 
+    step = 0
     for epoch in range(recipe.ppo_epochs):
+        if should_stop(stop):
+            break
         for batch in trainer.dataloader:
+            if should_stop(stop):
+                logger.info("Stop requested; ending PPO at step %d", step)
+                break
             query_tensors = batch["input_ids"]
 
             response_tensors = trainer.generate(
@@ -104,10 +119,23 @@ def run_rlhf(recipe: RLHFRecipeConfig, prompt_dataset):
             stats = trainer.step(query_tensors, response_tensors, rewards)
             logger.info("PPO epoch %d stats: %s", epoch, stats)
 
+            step += 1
+            if checkpoints is not None and step % recipe.save_steps == 0:
+                loss = stats.get("ppo/loss/total")
+                checkpoints.save(
+                    step,
+                    trainer_files(model, optimizer=trainer.optimizer),
+                    loss=float(loss) if loss is not None else None,
+                )
+
+    if checkpoints is not None:
+        checkpoints.close()
+
     adapter_path = os.path.join(recipe.output_dir, "rlhf_adapter")
-    model.save_pretrained(adapter_path)
-    tokenizer.save_pretrained(adapter_path)
-    logger.info("RLHF adapter saved to %s", adapter_path)
+    if trainer.accelerator.is_main_process:
+        model.save_pretrained(adapter_path)
+        tokenizer.save_pretrained(adapter_path)
+        logger.info("RLHF adapter saved to %s", adapter_path)
 
     return adapter_path
 
@@ -3,9 +3,11 @@
 
 from typing import Optional
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 
-from core.schemas import EvalRun, EvalRecord, PaginatedResponse
-from services import eval_service
+from core.db import serialize_json
+from core.schemas import EvalRun, EvalRecord, EvalBatchRun, EvalBatchRecord, PaginatedResponse
+from services import eval_cache, eval_service, sample_store
 
 router = APIRouter(prefix="/evals", tags=["evals"])
 
@@ -15,16 +17,37 @@ def run_eval(payload: EvalRun):
     return eval_service.run_eval(payload)
 
 
+@router.post("/batches", response_model=EvalBatchRecord, status_code=201)
+def run_eval_batch(payload: EvalBatchRun):
+    return eval_service.run_eval_batch(payload)
+
+
+@router.get("/batches/{batch_id}", response_model=EvalBatchRecord)
+def get_eval_batch(batch_id: str):
+    return eval_service.get_eval_batch(batch_id)
+
+
+@router.get("/batches/{batch_id}/stream")
+def stream_eval_batch(batch_id: str):
+    return StreamingResponse(
+        eval_service.stream_eval_batch(batch_id), media_type="application/x-ndjson",
+    )
+
+
 @router.get("", response_model=PaginatedResponse)
 def list_evals(
     model_id: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
+    benchmark: Optional[str] = Query(None),
+    min_score: Optional[float] = Query(None),
+    passed: Optional[bool] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
 ):
     offset = (page - 1) * page_size
     evals, total = eval_service.list_evals(
-        model_id=model_id, status=status,
+        model_id=model_id, status=status, benchmark=benchmark,
+        min_score=min_score, passed=passed,
         limit=page_size, offset=offset,
     )
     return PaginatedResponse(
@@ -33,11 +56,70 @@ def list_evals(
     )
 
 
+@router.get("/benchmarks")
+def benchmark_summary(
+    model_status: Optional[str] = Query(None),
+    since: Optional[str] = Query(None),
+):
+    return eval_service.benchmark_summary(model_status=model_status, since=since)
+
+
+@router.get("/benchmarks/{benchmark}/trend")
+def benchmark_trend(
+    benchmark: str,
+    model_id: Optional[str] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+):
+    return eval_service.benchmark_trend(benchmark, model_id=model_id, days=days)
+
+
+@router.get("/cache/stats")
+def eval_cache_stats():
+    return eval_cache.stats()
+
+
 @router.get("/{eval_id}", response_model=EvalRecord)
 def get_eval(eval_id: str):
     return eval_service.get_eval(eval_id)
 
 
+@router.get("/{eval_id}/samples")
+def list_samples(
+    eval_id: str,
+    benchmark: Optional[str] = Query(None),
+    failed: Optional[bool] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    return sample_store.page(
+        eval_id, benchmark=benchmark, failed=failed, cursor=cursor, limit=limit,
+    )
+
+
+@router.get("/{eval_id}/samples/stream")
+def stream_samples(
+    eval_id: str,
+    benchmark: Optional[str] = Query(None),
+    failed: Optional[bool] = Query(None),
+    cursor: Optional[str] = Query(None),
+):
+    samples = sample_store.iter_samples(eval_id, benchmark=benchmark, failed=failed, cursor=cursor)
+    return StreamingResponse(
+        (serialize_json({**record, "cursor": position}) + "\n" for position, record in samples),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/{eval_id}/samples/{sample_id}")
+def get_sample(eval_id: str, sample_id: str, benchmark: Optional[str] = Query(None)):
+    return sample_store.get_sample(eval_id, sample_id, benchmark=benchmark)
+
+
+@router.get("/{eval_id}/lineage")
+def compare_lineage(eval_id: str):
+    return eval_service.compare_lineage(eval_id)
+
+
 @router.get("/{eval_id}/compare/{baseline_id}")
 def compare_evals(eval_id: str, baseline_id: str):
     return eval_service.compare_evals(eval_id, baseline_id)
@@ -0,0 +1,24 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+from typing import Optional
+from fastapi import APIRouter, Query
+
+from services import leaderboard_service
+
+router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+
+
+@router.get("")
+def get_leaderboard(
+    benchmark: Optional[str] = Query(None),
+    suite: Optional[str] = Query(None),
+    base_model: Optional[str] = Query(None),
+    recipe: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=200),
+):
+    return leaderboard_service.top(
+        benchmark=benchmark, suite=suite, base_model=base_model,
+        recipe=recipe, status=status, limit=limit,
+    )
@@ -2,29 +2,39 @@
 # https://www.linkedin.com/in/ahmadghazinazer
 
 from typing import Optional
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 
-from core.schemas import RunLaunch, RunRecord, RunMetrics, PaginatedResponse
+from core.auth import get_tenant_id
+from core.schemas import (
+    RunLaunch, RunRecord, RunMetrics, CheckpointRecord, RunEvent, RunEstimate,
+    PaginatedResponse,
+)
 from services import training_service
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 
 
 @router.post("/launch", response_model=RunRecord, status_code=201)
-def launch_run(payload: RunLaunch):
-    return training_service.launch_run(payload)
+def launch_run(payload: RunLaunch, tenant_id: str = Depends(get_tenant_id)):
+    return training_service.launch_run(payload, tenant_id=tenant_id)
+
+
+@router.post("/estimate")
+def estimate_run(payload: RunEstimate):
+    return training_service.estimate_run(payload)
 
 
 @router.get("", response_model=PaginatedResponse)
 def list_runs(
     status: Optional[str] = Query(None),
     recipe: Optional[str] = Query(None),
+    fingerprint: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
 ):
     offset = (page - 1) * page_size
     runs, total = training_service.list_runs(
-        status=status, recipe=recipe,
+        status=status, recipe=recipe, fingerprint=fingerprint,
         limit=page_size, offset=offset,
     )
     return PaginatedResponse(
@@ -33,6 +43,11 @@ def list_runs(
     )
 
 
+@router.get("/queue")
+def get_queue():
+    return training_service.queue_status()
+
+
 @router.get("/{run_id}", response_model=RunRecord)
 def get_run(run_id: str):
     return training_service.get_run(run_id)
@@ -46,6 +61,16 @@ def get_run_metrics(
     return training_service.get_run_metrics(run_id, last_n=last_n)
 
 
+@router.get("/{run_id}/checkpoints", response_model=list[CheckpointRecord])
+def get_run_checkpoints(run_id: str):
+    return training_service.get_run_checkpoints(run_id)
+
+
+@router.get("/{run_id}/events", response_model=list[RunEvent])
+def get_run_events(run_id: str):
+    return training_service.get_run_events(run_id)
+
+
 @router.post("/{run_id}/cancel", response_model=RunRecord)
-def cancel_run(run_id: str):
-    return training_service.cancel_run(run_id)
+def cancel_run(run_id: str, reason: Optional[str] = Query(None, max_length=500)):
+    return training_service.cancel_run(run_id, reason=reason)
@@ -0,0 +1,42 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+
+from core.auth import get_tenant_id
+from core.schemas import SweepCreate, SweepRecord, PaginatedResponse
+from services import sweep_service
+
+router = APIRouter(prefix="/sweeps", tags=["sweeps"])
+
+
+@router.post("", response_model=SweepRecord, status_code=201)
+def create_sweep(payload: SweepCreate, tenant_id: str = Depends(get_tenant_id)):
+    return sweep_service.create_sweep(payload, tenant_id=tenant_id)
+
+
+@router.get("", response_model=PaginatedResponse)
+def list_sweeps(
+    status: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+):
+    offset = (page - 1) * page_size
+    sweeps, total = sweep_service.list_sweeps(
+        status=status, limit=page_size, offset=offset,
+    )
+    return PaginatedResponse(
+        items=[s.model_dump() for s in sweeps],
+        total=total, page=page, page_size=page_size,
+    )
+
+
+@router.get("/{sweep_id}", response_model=SweepRecord)
+def get_sweep(sweep_id: str):
+    return sweep_service.get_sweep(sweep_id)
+
+
+@router.post("/{sweep_id}/cancel", response_model=SweepRecord)
+def cancel_sweep(sweep_id: str):
+    return sweep_service.cancel_sweep(sweep_id)
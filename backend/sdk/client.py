@@ -1,6 +1,7 @@
 # Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
 # https://www.linkedin.com/in/ahmadghazinazer
 
+import json
 import httpx
 from typing import Optional
 
@@ -65,8 +66,33 @@ class ForgeClient:
             params["last_n"] = last_n
         return self._handle(self._client.get(f"/runs/{run_id}/metrics", params=params))
 
-    def cancel_run(self, run_id: str) -> dict:
-        return self._handle(self._client.post(f"/runs/{run_id}/cancel"))
+    def cancel_run(self, run_id: str, reason: Optional[str] = None) -> dict:
+        params = {"reason": reason} if reason else {}
+        return self._handle(self._client.post(f"/runs/{run_id}/cancel", params=params))
+
+    # sweeps
+
+    def create_sweep(
+        self, name: str, base_model: str, dataset_id: str, search_space: dict,
+        strategy: str = "grid", recipe: str = "lora_sft", **kwargs,
+    ) -> dict:
+        payload = {
+            "name": name, "base_model": base_model, "dataset_id": dataset_id,
+            "search_space": search_space, "strategy": strategy, "recipe": recipe, **kwargs,
+        }
+        return self._handle(self._client.post("/sweeps", json=payload))
+
+    def list_sweeps(self, status: Optional[str] = None, page: int = 1) -> dict:
+        params = {"page": page}
+        if status:
+            params["status"] = status
+        return self._handle(self._client.get("/sweeps", params=params))
+
+    def get_sweep(self, sweep_id: str) -> dict:
+        return self._handle(self._client.get(f"/sweeps/{sweep_id}"))
+
+    def cancel_sweep(self, sweep_id: str) -> dict:
+        return self._handle(self._client.post(f"/sweeps/{sweep_id}/cancel"))
 
     # models
 
@@ -91,6 +117,23 @@ class ForgeClient:
             payload["benchmarks"] = benchmarks
         return self._handle(self._client.post("/evals/run", json=payload))
 
+    def run_eval_batch(self, model_ids: list, suite: str = "default", benchmarks: Optional[list] = None, **kwargs) -> dict:
+        payload = {"model_ids": model_ids, "suite": suite, **kwargs}
+        if benchmarks:
+            payload["benchmarks"] = benchmarks
+        return self._handle(self._client.post("/evals/batches", json=payload))
+
+    def get_eval_batch(self, batch_id: str) -> dict:
+        return self._handle(self._client.get(f"/evals/batches/{batch_id}"))
+
+    def stream_eval_batch(self, batch_id: str):
+        """Yield batch events as each unit, eval and finally the batch completes."""
+        with self._client.stream("GET", f"/evals/batches/{batch_id}/stream", timeout=None) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if line:
+                    yield json.loads(line)
+
     def list_evals(self, model_id: Optional[str] = None, page: int = 1) -> dict:
         params = {"page": page}
         if model_id:
@@ -100,10 +143,60 @@ class ForgeClient:
     def get_eval(self, eval_id: str) -> dict:
         return self._handle(self._client.get(f"/evals/{eval_id}"))
 
+    def compare_evals(self, eval_id: str, baseline_id: str) -> dict:
+        return self._handle(self._client.get(f"/evals/{eval_id}/compare/{baseline_id}"))
+
+    def list_samples(self, eval_id: str, benchmark: Optional[str] = None, failed: Optional[bool] = None,
+                     cursor: Optional[str] = None, limit: int = 100) -> dict:
+        params = {"limit": limit}
+        for key, value in (("benchmark", benchmark), ("failed", failed), ("cursor", cursor)):
+            if value is not None:
+                params[key] = value
+        return self._handle(self._client.get(f"/evals/{eval_id}/samples", params=params))
+
+    def stream_samples(self, eval_id: str, **filters):
+        """Yield an eval's per-sample records without paging."""
+        params = {k: v for k, v in filters.items() if v is not None}
+        with self._client.stream("GET", f"/evals/{eval_id}/samples/stream", params=params, timeout=None) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def get_sample(self, eval_id: str, sample_id: str, benchmark: Optional[str] = None) -> dict:
+        params = {"benchmark": benchmark} if benchmark else {}
+        return self._handle(self._client.get(f"/evals/{eval_id}/samples/{sample_id}", params=params))
+
+    def compare_lineage(self, eval_id: str) -> dict:
+        return self._handle(self._client.get(f"/evals/{eval_id}/lineage"))
+
+    def benchmark_summary(self, model_status: Optional[str] = None) -> list:
+        params = {"model_status": model_status} if model_status else {}
+        return self._handle(self._client.get("/evals/benchmarks", params=params))
+
+    def benchmark_trend(self, benchmark: str, model_id: Optional[str] = None, days: int = 30) -> list:
+        params = {"days": days}
+        if model_id:
+            params["model_id"] = model_id
+        return self._handle(self._client.get(f"/evals/benchmarks/{benchmark}/trend", params=params))
+
+    def leaderboard(self, benchmark: Optional[str] = None, limit: int = 10, **filters) -> dict:
+        params = {"limit": limit, **filters}
+        if benchmark:
+            params["benchmark"] = benchmark
+        return self._handle(self._client.get("/leaderboard", params=params))
+
     # cluster
 
     def cluster_status(self) -> dict:
         return self._handle(self._client.get("/cluster/status"))
 
-    def estimate_cost(self, num_gpus: int, hours: float) -> dict:
-        return self._handle(self._client.get("/cluster/cost", params={"num_gpus": num_gpus, "hours": hours}))
+    def estimate_cost(self, num_gpus: int, hours: float, gpu_type: Optional[str] = None) -> dict:
+        params = {"num_gpus": num_gpus, "hours": hours}
+        if gpu_type:
+            params["gpu_type"] = gpu_type
+        return self._handle(self._client.get("/cluster/cost", params=params))
+
+    def estimate_run(self, base_model: str, dataset_id: str, recipe: str = "lora_sft", **kwargs) -> dict:
+        payload = {"base_model": base_model, "dataset_id": dataset_id, "recipe": recipe, **kwargs}
+        return self._handle(self._client.post("/runs/estimate", json=payload))
@@ -1,16 +1,37 @@
 # Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
 # https://www.linkedin.com/in/ahmadghazinazer
 
-import uuid
+import asyncio
+import json
 import time
 import random
+import threading
 import logging
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Callable, Optional
+
+from config import settings, GPU_TYPES
+from core.db import get_connection
 
 logger = logging.getLogger(__name__)
 
 
+GPU_MEMORY_GB = {
+    "A100-80GB": 80,
+    "A100-40GB": 40,
+    "H100": 80,
+    "A100": 40,
+}
+
+NODE_FIELDS = (
+    "status", "gpu_utilization", "memory_utilization",
+    "last_heartbeat", "failure_count", "gpu_assignments",
+)
+COMMIT_ATTEMPTS = 8
+# Failed checks that take a node offline; as many net good checks bring it back.
+OFFLINE_AFTER_FAILURES = 3
+
+
 @dataclass
 class NodeInfo:
     node_id: str
@@ -20,8 +41,22 @@ class NodeInfo:
     gpu_utilization: float = 0.0
     memory_utilization: float = 0.0
     last_heartbeat: float = 0.0
-    assigned_run_id: Optional[str] = None
     failure_count: int = 0
+    gpu_assignments: list[Optional[str]] = field(default_factory=list)
+    free_gpus: int = 0
+
+    def __post_init__(self):
+        if not self.gpu_assignments:
+            self.gpu_assignments = [None] * self.gpu_count
+        self.free_gpus = sum(1 for a in self.gpu_assignments if a is None)
+
+    @property
+    def gpu_memory_gb(self) -> int:
+        return GPU_MEMORY_GB.get(self.gpu_type, 0)
+
+    @property
+    def assigned_run_ids(self) -> list[str]:
+        return sorted({a for a in self.gpu_assignments if a is not None})
 
 
 @dataclass
@@ -30,133 +65,611 @@ class ClusterState:
     total_gpus: int = 0
     available_gpus: int = 0
     cost_per_gpu_hour: float = 2.50
+    allocations: dict[str, dict[str, list[int]]] = field(default_factory=dict)
+    # gpu_type -> free GPU count -> healthy node ids with exactly that many free
+    free_index: dict[str, dict[int, set[str]]] = field(default_factory=dict)
+    free_by_type: dict[str, int] = field(default_factory=dict)
+    # When persistent, the cluster_nodes table is the source of truth and
+    # this state is a cache of it as of synced_version.
+    persistent: bool = False
+    synced_version: int = 0
+    versions: dict[str, int] = field(default_factory=dict)
 
 
 _cluster = ClusterState()
+_lock = threading.RLock()
+
+OfflineListener = Callable[[str, list[str], float], None]
+_offline_listeners: list[OfflineListener] = []
+_pending_offline: list[tuple] = []
+
+DEFAULT_NODES = [
+    ("node-01", 8, "A100-80GB"),
+    ("node-02", 8, "A100-80GB"),
+    ("node-03", 4, "A100-40GB"),
+    ("node-04", 4, "H100"),
+]
+
+
+def _index_add(node: NodeInfo):
+    if node.status != "healthy" or node.free_gpus == 0:
+        return
+    buckets = _cluster.free_index.setdefault(node.gpu_type, {})
+    buckets.setdefault(node.free_gpus, set()).add(node.node_id)
+
+
+def _index_remove(node: NodeInfo):
+    buckets = _cluster.free_index.get(node.gpu_type, {})
+    bucket = buckets.get(node.free_gpus)
+    if bucket is None or node.node_id not in bucket:
+        return
+    bucket.discard(node.node_id)
+    if not bucket:
+        del buckets[node.free_gpus]
+
+
+def _schedulable(node: NodeInfo) -> int:
+    return node.free_gpus if node.status == "healthy" else 0
+
+
+def _update_node(node: NodeInfo, mutate):
+    # Every change to a node's free count or health goes through here so the
+    # bucket index and the capacity counters stay in step.
+    before = _schedulable(node)
+    _index_remove(node)
+    mutate(node)
+    node.free_gpus = sum(1 for a in node.gpu_assignments if a is None)
+    _index_add(node)
+    delta = _schedulable(node) - before
+    _cluster.available_gpus += delta
+    _cluster.free_by_type[node.gpu_type] = _cluster.free_by_type.get(node.gpu_type, 0) + delta
+
+
+def _reindex_allocations(node_id: str, old: list, new: list):
+    for i, (before, after) in enumerate(zip(old, new)):
+        if before == after:
+            continue
+        if before is not None:
+            run_allocation = _cluster.allocations.get(before, {})
+            gpus = run_allocation.get(node_id, [])
+            if i in gpus:
+                gpus.remove(i)
+            if not gpus:
+                run_allocation.pop(node_id, None)
+            if not run_allocation:
+                _cluster.allocations.pop(before, None)
+        if after is not None:
+            gpus = _cluster.allocations.setdefault(after, {}).setdefault(node_id, [])
+            gpus.append(i)
+            gpus.sort()
+
+
+def _fields(node: NodeInfo, **changes) -> dict:
+    fields = {name: getattr(node, name) for name in NODE_FIELDS}
+    fields["gpu_assignments"] = list(node.gpu_assignments)
+    fields.update(changes)
+    return fields
+
+
+def _apply(node: NodeInfo, fields: dict):
+    old = list(node.gpu_assignments)
+    was_offline = node.status == "offline"
+
+    def mutate(n: NodeInfo):
+        for name in NODE_FIELDS:
+            setattr(n, name, fields[name])
+        n.gpu_assignments = list(fields["gpu_assignments"])
+
+    _update_node(node, mutate)
+    _reindex_allocations(node.node_id, old, node.gpu_assignments)
+    if not was_offline and node.status == "offline":
+        _pending_offline.append((node.node_id, node.assigned_run_ids, node.last_heartbeat))
+
+
+def _reset():
+    _cluster.nodes.clear()
+    _cluster.allocations.clear()
+    _cluster.free_index.clear()
+    _cluster.free_by_type.clear()
+    _cluster.versions.clear()
+    _cluster.available_gpus = 0
+    _cluster.total_gpus = 0
+    _cluster.synced_version = 0
+
+
+def init_cluster(node_configs: list[tuple[str, int, str]]):
+    with _lock:
+        _reset()
+        _cluster.persistent = False
+        for node_id, gpus, gpu_type in node_configs:
+            node = NodeInfo(
+                node_id=node_id,
+                gpu_count=gpus,
+                gpu_type=gpu_type,
+                last_heartbeat=time.time(),
+                gpu_utilization=random.uniform(0, 0.3),
+                memory_utilization=random.uniform(0.1, 0.4),
+            )
+            _cluster.nodes[node_id] = node
+            _index_add(node)
+            _cluster.available_gpus += node.free_gpus
+            _cluster.free_by_type[gpu_type] = _cluster.free_by_type.get(gpu_type, 0) + node.free_gpus
+        _cluster.total_gpus = sum(n.gpu_count for n in _cluster.nodes.values())
 
 
 def _init_simulated_cluster():
-    node_configs = [
-        ("node-01", 8, "A100-80GB"),
-        ("node-02", 8, "A100-80GB"),
-        ("node-03", 4, "A100-40GB"),
-        ("node-04", 4, "H100"),
-    ]
-    for node_id, gpus, gpu_type in node_configs:
-        _cluster.nodes[node_id] = NodeInfo(
-            node_id=node_id,
-            gpu_count=gpus,
-            gpu_type=gpu_type,
-            last_heartbeat=time.time(),
-            gpu_utilization=random.uniform(0, 0.3),
-            memory_utilization=random.uniform(0.1, 0.4),
-        )
-    _cluster.total_gpus = sum(n.gpu_count for n in _cluster.nodes.values())
-    _cluster.available_gpus = _cluster.total_gpus
+    init_cluster(DEFAULT_NODES)
 
 
 _init_simulated_cluster()
 
 
+def load_cluster(node_configs: Optional[list[tuple[str, int, str]]] = None):
+    """Use the shared database as the source of truth for nodes and allocations."""
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT COUNT(*) FROM cluster_nodes").fetchone()[0] == 0:
+            now = time.time()
+            conn.executemany(
+                """INSERT INTO cluster_nodes
+                   (node_id, gpu_count, gpu_type, status, gpu_utilization,
+                    memory_utilization, last_heartbeat, failure_count,
+                    gpu_assignments, version)
+                   VALUES (?, ?, ?, 'healthy', ?, ?, ?, 0, ?, 1)""",
+                [
+                    (
+                        node_id, gpus, gpu_type, random.uniform(0, 0.3),
+                        random.uniform(0.1, 0.4), now, json.dumps([None] * gpus),
+                    )
+                    for node_id, gpus, gpu_type in node_configs or DEFAULT_NODES
+                ],
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    with _lock:
+        _reset()
+        _cluster.persistent = True
+        _sync()
+        _pending_offline.clear()
+        logger.info(
+            "Loaded %d nodes (%d/%d GPUs free) at cluster version %d",
+            len(_cluster.nodes), _cluster.available_gpus,
+            _cluster.total_gpus, _cluster.synced_version,
+        )
+
+
+def _sync():
+    if not _cluster.persistent:
+        return
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM cluster_nodes WHERE version > ? ORDER BY version",
+            (_cluster.synced_version,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    with _lock:
+        for row in rows:
+            node_id = row["node_id"]
+            if row["version"] <= _cluster.versions.get(node_id, 0):
+                continue
+            node = _cluster.nodes.get(node_id)
+            if node is None:
+                # Enters as offline so _apply counts its capacity exactly once.
+                node = NodeInfo(node_id, row["gpu_count"], row["gpu_type"], status="offline")
+                _cluster.nodes[node_id] = node
+                _cluster.total_gpus += node.gpu_count
+            _apply(node, {
+                "status": row["status"],
+                "gpu_utilization": row["gpu_utilization"],
+                "memory_utilization": row["memory_utilization"],
+                "last_heartbeat": row["last_heartbeat"],
+                "failure_count": row["failure_count"],
+                "gpu_assignments": json.loads(row["gpu_assignments"]),
+            })
+            _cluster.versions[node_id] = row["version"]
+            _cluster.synced_version = max(_cluster.synced_version, row["version"])
+
+
+def _commit(changes: dict[str, dict]) -> bool:
+    if not _cluster.persistent:
+        for node_id, fields in changes.items():
+            _apply(_cluster.nodes[node_id], fields)
+        return True
+
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute(
+            "SELECT COALESCE(MAX(version), 0) + 1 FROM cluster_nodes"
+        ).fetchone()[0]
+        for node_id, fields in changes.items():
+            cur = conn.execute(
+                """UPDATE cluster_nodes SET status = ?, gpu_utilization = ?,
+                   memory_utilization = ?, last_heartbeat = ?, failure_count = ?,
+                   gpu_assignments = ?, version = ?
+                   WHERE node_id = ? AND version = ?""",
+                (
+                    fields["status"], fields["gpu_utilization"],
+                    fields["memory_utilization"], fields["last_heartbeat"],
+                    fields["failure_count"], json.dumps(fields["gpu_assignments"]),
+                    version, node_id, _cluster.versions.get(node_id, 0),
+                ),
+            )
+            if cur.rowcount == 0:
+                conn.rollback()
+                return False
+        conn.commit()
+    finally:
+        conn.close()
+    _sync()
+    return True
+
+
+def _transact(build: Callable[[], dict[str, dict]]) -> Optional[dict[str, dict]]:
+    # Optimistic update: plan against the synced view, write only if no
+    # other process changed those nodes since, otherwise resync and replan.
+    for _ in range(COMMIT_ATTEMPTS):
+        with _lock:
+            _sync()
+            changes = build()
+            if not changes or _commit(changes):
+                return changes
+    logger.warning("Cluster update abandoned after %d version conflicts", COMMIT_ATTEMPTS)
+    return None
+
+
+def refresh():
+    with _lock:
+        _sync()
+    _drain_offline()
+
+
 def get_cluster_status() -> dict:
-    healthy = sum(1 for n in _cluster.nodes.values() if n.status == "healthy")
-    degraded = sum(1 for n in _cluster.nodes.values() if n.status == "degraded")
-    offline = sum(1 for n in _cluster.nodes.values() if n.status == "offline")
+    refresh()
+    with _lock:
+        nodes = list(_cluster.nodes.values())
+        healthy = sum(1 for n in nodes if n.status == "healthy")
+        degraded = sum(1 for n in nodes if n.status == "degraded")
+        offline = sum(1 for n in nodes if n.status == "offline")
 
-    avg_util = 0.0
-    if _cluster.nodes:
-        avg_util = sum(
-            n.gpu_utilization for n in _cluster.nodes.values()
-        ) / len(_cluster.nodes)
+        avg_util = 0.0
+        if nodes:
+            avg_util = sum(n.gpu_utilization for n in nodes) / len(nodes)
 
-    return {
-        "total_nodes": len(_cluster.nodes),
-        "healthy": healthy,
-        "degraded": degraded,
-        "offline": offline,
-        "total_gpus": _cluster.total_gpus,
-        "available_gpus": _cluster.available_gpus,
-        "avg_gpu_utilization": round(avg_util, 2),
-        "cost_per_gpu_hour": _cluster.cost_per_gpu_hour,
-        "nodes": [
-            {
-                "node_id": n.node_id,
-                "gpu_count": n.gpu_count,
-                "gpu_type": n.gpu_type,
-                "status": n.status,
-                "gpu_utilization": round(n.gpu_utilization, 2),
-                "memory_utilization": round(n.memory_utilization, 2),
-                "assigned_run_id": n.assigned_run_id,
-                "failure_count": n.failure_count,
-            }
-            for n in _cluster.nodes.values()
-        ],
-    }
+        return {
+            "total_nodes": len(nodes),
+            "healthy": healthy,
+            "degraded": degraded,
+            "offline": offline,
+            "total_gpus": _cluster.total_gpus,
+            "available_gpus": _cluster.available_gpus,
+            "avg_gpu_utilization": round(avg_util, 2),
+            "cost_per_gpu_hour": _cluster.cost_per_gpu_hour,
+            "state_version": _cluster.synced_version,
+            "nodes": [
+                {
+                    "node_id": n.node_id,
+                    "gpu_count": n.gpu_count,
+                    "gpu_type": n.gpu_type,
+                    "gpu_memory_gb": n.gpu_memory_gb,
+                    "status": n.status,
+                    "free_gpus": n.free_gpus,
+                    "gpu_utilization": round(n.gpu_utilization, 2),
+                    "memory_utilization": round(n.memory_utilization, 2),
+                    "assigned_run_id": (n.assigned_run_ids or [None])[0],
+                    "assigned_run_ids": n.assigned_run_ids,
+                    "failure_count": n.failure_count,
+                }
+                for n in nodes
+            ],
+        }
 
 
-def allocate_gpus(run_id: str, num_gpus: int) -> list[str]:
-    allocated = []
-    for node in _cluster.nodes.values():
-        if node.status != "healthy" or node.assigned_run_id is not None:
-            continue
-        if node.gpu_count >= num_gpus - len(allocated):
-            allocated.append(node.node_id)
-            node.assigned_run_id = run_id
-            node.gpu_utilization = random.uniform(0.7, 0.95)
-            node.memory_utilization = random.uniform(0.6, 0.9)
-            if len(allocated) * node.gpu_count >= num_gpus:
+def _eligible_types(gpu_type: Optional[str], min_memory_gb: Optional[float]) -> list[str]:
+    types = [gpu_type] if gpu_type else list(_cluster.free_by_type)
+    if min_memory_gb:
+        types = [t for t in types if GPU_MEMORY_GB.get(t, 0) >= min_memory_gb]
+    return types
+
+
+def _plan(gpu_type: str, num_gpus: int) -> Optional[list[tuple[str, int]]]:
+    buckets = _cluster.free_index.get(gpu_type, {})
+    if _cluster.free_by_type.get(gpu_type, 0) < num_gpus:
+        return None
+
+    sizes = sorted(buckets)
+    used: set[str] = set()
+    plan = []
+    remaining = num_gpus
+
+    def pick(size: int) -> Optional[str]:
+        for node_id in buckets.get(size, ()):
+            if node_id not in used:
+                return node_id
+        return None
+
+    while remaining > 0:
+        # Best fit: the emptiest-possible node that still holds the rest.
+        node_id = None
+        for size in sizes:
+            if size >= remaining:
+                node_id = pick(size)
+                if node_id is not None:
+                    plan.append((node_id, remaining))
+                    used.add(node_id)
+                    remaining = 0
+                    break
+        if remaining == 0:
+            break
+
+        # Gang allocation: consume the fullest free node and keep going.
+        for size in reversed(sizes):
+            node_id = pick(size)
+            if node_id is not None:
                 break
+        if node_id is None:
+            return None
+        take = _cluster.nodes[node_id].free_gpus
+        plan.append((node_id, take))
+        used.add(node_id)
+        remaining -= take
+
+    return plan
+
+
+def _plan_cost(plan: list[tuple[str, int]]) -> tuple[int, int]:
+    leftover = sum(_cluster.nodes[n].free_gpus - take for n, take in plan)
+    return len(plan), leftover
+
+
+def allocate_gpus(
+    run_id: str,
+    num_gpus: int,
+    gpu_type: Optional[str] = None,
+    min_memory_gb: Optional[float] = None,
+) -> list[str]:
+    if num_gpus <= 0:
+        return []
+
+    def build() -> dict[str, dict]:
+        if run_id in _cluster.allocations or _cluster.available_gpus < num_gpus:
+            return {}
+
+        best = None
+        for t in _eligible_types(gpu_type, min_memory_gb):
+            plan = _plan(t, num_gpus)
+            if plan is not None and (best is None or _plan_cost(plan) < _plan_cost(best)):
+                best = plan
+        if best is None:
+            return {}
+
+        changes = {}
+        for node_id, take in best:
+            node = _cluster.nodes[node_id]
+            assignments = list(node.gpu_assignments)
+            for i in [i for i, a in enumerate(assignments) if a is None][:take]:
+                assignments[i] = run_id
+            busy = 1 - (node.free_gpus - take) / node.gpu_count
+            changes[node_id] = _fields(
+                node,
+                gpu_assignments=assignments,
+                gpu_utilization=min(1.0, busy * random.uniform(0.8, 0.95)),
+                memory_utilization=min(1.0, busy * random.uniform(0.7, 0.9)),
+            )
+        return changes
+
+    _transact(build)
+    _drain_offline()
+    with _lock:
+        return list(_cluster.allocations.get(run_id, {}))
+
+
+def gpu_type_of(node_ids: list[str]) -> Optional[str]:
+    with _lock:
+        types = {_cluster.nodes[n].gpu_type for n in node_ids if n in _cluster.nodes}
+    return types.pop() if len(types) == 1 else None
+
+
+def gpu_types() -> list[str]:
+    with _lock:
+        return sorted({n.gpu_type for n in _cluster.nodes.values()})
+
+
+def get_allocation(run_id: str) -> dict[str, list[int]]:
+    with _lock:
+        return {n: list(g) for n, g in _cluster.allocations.get(run_id, {}).items()}
+
+
+def allocated_run_ids() -> list[str]:
+    with _lock:
+        _sync()
+        return list(_cluster.allocations)
+
 
-    _cluster.available_gpus = sum(
-        n.gpu_count for n in _cluster.nodes.values()
-        if n.assigned_run_id is None and n.status == "healthy"
+def gpu_memory_options(
+    num_gpus: int,
+    gpu_type: Optional[str] = None,
+    min_memory_gb: Optional[float] = None,
+) -> list[int]:
+    """Per-GPU memory sizes, ascending, of the types that can hold num_gpus."""
+    with _lock:
+        _sync()
+        capacity: dict[int, int] = {}
+        for n in _cluster.nodes.values():
+            if n.status == "offline" or (gpu_type and n.gpu_type != gpu_type):
+                continue
+            capacity[n.gpu_memory_gb] = capacity.get(n.gpu_memory_gb, 0) + n.gpu_count
+    # Same rule as can_fit: a minimum admits every GPU at least that large.
+    return sorted(
+        m for m in capacity
+        if m >= (min_memory_gb or 0)
+        and sum(c for size, c in capacity.items() if size >= m) >= num_gpus
     )
-    return allocated
+
+
+def can_fit(
+    num_gpus: int,
+    gpu_type: Optional[str] = None,
+    min_memory_gb: Optional[float] = None,
+) -> bool:
+    with _lock:
+        _sync()
+        types = [gpu_type] if gpu_type else {n.gpu_type for n in _cluster.nodes.values()}
+        capacity = sum(
+            n.gpu_count for n in _cluster.nodes.values()
+            if n.gpu_type in types and n.status != "offline"
+            and n.gpu_memory_gb >= (min_memory_gb or 0)
+        )
+        return num_gpus <= capacity
+
+
+def can_place_after_release(
+    num_gpus: int,
+    run_ids: list[str],
+    gpu_type: Optional[str] = None,
+    min_memory_gb: Optional[float] = None,
+) -> bool:
+    with _lock:
+        freed: dict[str, int] = {}
+        for run_id in run_ids:
+            for node_id, gpus in _cluster.allocations.get(run_id, {}).items():
+                node = _cluster.nodes[node_id]
+                if node.status == "healthy":
+                    freed[node.gpu_type] = freed.get(node.gpu_type, 0) + len(gpus)
+        # Gang placement spans any nodes of one type, so per-type free
+        # counts decide feasibility exactly.
+        return any(
+            _cluster.free_by_type.get(t, 0) + freed.get(t, 0) >= num_gpus
+            for t in _eligible_types(gpu_type, min_memory_gb)
+        )
 
 
 def release_gpus(run_id: str):
-    for node in _cluster.nodes.values():
-        if node.assigned_run_id == run_id:
-            node.assigned_run_id = None
-            node.gpu_utilization = random.uniform(0, 0.1)
-            node.memory_utilization = random.uniform(0.1, 0.2)
-
-    _cluster.available_gpus = sum(
-        n.gpu_count for n in _cluster.nodes.values()
-        if n.assigned_run_id is None and n.status == "healthy"
-    )
+    def build() -> dict[str, dict]:
+        changes = {}
+        for node_id, gpus in _cluster.allocations.get(run_id, {}).items():
+            node = _cluster.nodes[node_id]
+            fields = _fields(node, gpu_assignments=[
+                None if a == run_id else a for a in node.gpu_assignments
+            ])
+            if node.free_gpus + len(gpus) >= node.gpu_count:
+                fields["gpu_utilization"] = random.uniform(0, 0.1)
+                fields["memory_utilization"] = random.uniform(0.1, 0.2)
+            changes[node_id] = fields
+        return changes
 
+    _transact(build)
+    _drain_offline()
+
+
+def on_node_offline(callback: OfflineListener):
+    _offline_listeners.append(callback)
+
+
+def _drain_offline():
+    # Fires for transitions this process wrote and for ones it synced from
+    # other processes; each listener acts only on the runs it owns.
+    with _lock:
+        events = list(_pending_offline)
+        _pending_offline.clear()
+    for node_id, run_ids, last_heartbeat in events:
+        for callback in _offline_listeners:
+            try:
+                callback(node_id, run_ids, last_heartbeat)
+            except Exception:
+                logger.exception("Offline handler failed for node %s", node_id)
 
-def check_node_health(node_id: str) -> dict:
-    node = _cluster.nodes.get(node_id)
-    if not node:
-        return {"error": f"Node '{node_id}' not found"}
 
+def check_node_health(node_id: str) -> dict:
     healthy = random.random() > 0.05
-    if not healthy:
-        node.failure_count += 1
-        if node.failure_count >= 3:
-            node.status = "offline"
-            logger.warning("Node %s marked offline after %d failures", node_id, node.failure_count)
-        else:
-            node.status = "degraded"
-    else:
-        if node.failure_count > 0 and node.status == "degraded":
-            node.failure_count = max(0, node.failure_count - 1)
-            if node.failure_count == 0:
-                node.status = "healthy"
-        node.last_heartbeat = time.time()
 
-    return {
-        "node_id": node.node_id,
-        "status": node.status,
-        "failure_count": node.failure_count,
-        "healthy": node.status == "healthy",
-    }
+    def build() -> dict[str, dict]:
+        node = _cluster.nodes.get(node_id)
+        if node is None:
+            return {}
+        if not healthy:
+            failures = min(node.failure_count + 1, OFFLINE_AFTER_FAILURES)
+            status = (
+                "offline" if failures >= OFFLINE_AFTER_FAILURES or node.status == "offline"
+                else "degraded"
+            )
+            if status == "offline" and node.status != "offline":
+                logger.warning("Node %s marked offline: %d failed health checks", node_id, failures)
+            return {node_id: _fields(node, failure_count=failures, status=status)}
+
+        # Each good check works off one failure, offline nodes included, so a
+        # node marked offline for a stale heartbeat is back on its next one.
+        failures, status = max(0, node.failure_count - 1), node.status
+        if failures == 0 and status != "healthy":
+            if status == "offline":
+                logger.info("Node %s back online", node_id)
+            status = "healthy"
+        return {node_id: _fields(
+            node, failure_count=failures, status=status, last_heartbeat=time.time(),
+        )}
+
+    _transact(build)
+    _drain_offline()
+    with _lock:
+        node = _cluster.nodes.get(node_id)
+        if not node:
+            return {"error": f"Node '{node_id}' not found"}
+        return {
+            "node_id": node.node_id,
+            "status": node.status,
+            "failure_count": node.failure_count,
+            "healthy": node.status == "healthy",
+        }
+
+
+async def run_health_checks(stale_after: Optional[float] = None) -> list[dict]:
+    stale_after = stale_after or settings.node_stale_after_seconds
+    await asyncio.to_thread(refresh)
+    with _lock:
+        node_ids = list(_cluster.nodes)
+    results = await asyncio.gather(
+        *(asyncio.to_thread(check_node_health, node_id) for node_id in node_ids)
+    )
+
+    def build() -> dict[str, dict]:
+        now = time.time()
+        changes = {}
+        for node in _cluster.nodes.values():
+            silent_for = now - node.last_heartbeat
+            if node.status != "offline" and silent_for > stale_after:
+                logger.warning(
+                    "Node %s marked offline: no heartbeat for %.0fs", node.node_id, silent_for,
+                )
+                changes[node.node_id] = _fields(node, status="offline")
+        return changes
+
+    await asyncio.to_thread(_transact, build)
+    await asyncio.to_thread(_drain_offline)
+    return list(results)
+
+
+async def monitor_heartbeats(interval: Optional[float] = None):
+    interval = interval or settings.cluster_heartbeat_interval
+    logger.info("Heartbeat monitor running every %ss", interval)
+    while True:
+        try:
+            await run_health_checks()
+        except Exception:
+            logger.exception("Heartbeat pass failed")
+        await asyncio.sleep(interval)
 
 
-def estimate_cost(num_gpus: int, estimated_hours: float) -> dict:
-    gpu_cost = num_gpus * estimated_hours * _cluster.cost_per_gpu_hour
+def estimate_cost(
+    num_gpus: int, estimated_hours: float, gpu_type: Optional[str] = None,
+) -> dict:
+    rate = GPU_TYPES.get(gpu_type, {}).get("rate_per_hour", _cluster.cost_per_gpu_hour)
+    gpu_cost = num_gpus * estimated_hours * rate
     overhead = gpu_cost * 0.15
     return {
         "gpu_cost": round(gpu_cost, 2),
@@ -165,6 +678,7 @@ def estimate_cost(num_gpus: int, estimated_hours: float) -> dict:
         "breakdown": {
             "num_gpus": num_gpus,
             "hours": estimated_hours,
-            "rate_per_gpu_hour": _cluster.cost_per_gpu_hour,
+            "gpu_type": gpu_type,
+            "rate_per_gpu_hour": rate,
         },
     }
@@ -0,0 +1,178 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import math
+from datetime import datetime
+from typing import Optional
+
+from core.db import get_connection, now_iso
+from recipes import memory
+from services import cluster_service
+from config import GPU_TYPES
+
+DEFAULT_SEQ_LEN = 512
+# Tokens/sec per A100 for a 1B-parameter model, used before any history exists.
+BASELINE_TOKENS_PER_GPU_SEC = 14000.0
+# Measurements needed before a GPU type's history is trusted over scaling.
+MIN_POINTS = 20
+ETA_WINDOW = 20
+
+
+def seq_len(config: dict) -> int:
+    return config.get("max_seq_length") or config.get("max_length") or DEFAULT_SEQ_LEN
+
+
+def effective_batch(config: dict) -> int:
+    return (config.get("batch_size") or 1) * (config.get("gradient_accumulation_steps") or 1)
+
+
+def batch_bucket(config: dict) -> int:
+    # Throughput moves with batch size, so history is kept per power-of-two
+    # bucket of the effective batch rather than pooled across them.
+    return 1 << (effective_batch(config) - 1).bit_length()
+
+
+def _model_billions(base_model: str) -> Optional[float]:
+    shape = memory.model_shape(base_model)
+    return shape.num_params / 1e9 if shape else None
+
+
+def _relative(gpu_type: str) -> float:
+    return GPU_TYPES.get(gpu_type, {}).get("relative_throughput", 1.0)
+
+
+def record(
+    recipe: str, base_model: str, gpu_type: str, config: dict,
+    num_gpus: int, metrics: list[dict],
+):
+    # Per-GPU tokens/sec, so runs of different widths and sequence lengths
+    # feed one running sum per (recipe, model, GPU type, batch bucket).
+    tokens = seq_len(config)
+    values = [
+        m["throughput_samples_sec"] * tokens / max(num_gpus, 1)
+        for m in metrics if m.get("throughput_samples_sec")
+    ]
+    if not values:
+        return
+    conn = get_connection()
+    try:
+        conn.execute(
+            """INSERT INTO throughput_stats
+               (recipe, base_model, gpu_type, batch_bucket, points, total,
+                total_sq, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (recipe, base_model, gpu_type, batch_bucket) DO UPDATE SET
+                   points = points + excluded.points,
+                   total = total + excluded.total,
+                   total_sq = total_sq + excluded.total_sq,
+                   updated_at = excluded.updated_at""",
+            (
+                recipe, base_model, gpu_type, batch_bucket(config), len(values), sum(values),
+                sum(v * v for v in values), now_iso(),
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def history(
+    recipe: Optional[str] = None,
+    base_model: Optional[str] = None,
+    bucket: Optional[int] = None,
+) -> list[dict]:
+    query = "SELECT * FROM throughput_stats WHERE 1=1"
+    params = []
+    if recipe:
+        query += " AND recipe = ?"
+        params.append(recipe)
+    if base_model:
+        query += " AND base_model = ?"
+        params.append(base_model)
+    if bucket:
+        query += " AND batch_bucket = ?"
+        params.append(bucket)
+    conn = get_connection()
+    try:
+        rows = conn.execute(query + " ORDER BY points DESC", params).fetchall()
+    finally:
+        conn.close()
+
+    stats = []
+    for r in rows:
+        mean = r["total"] / r["points"]
+        variance = max(0.0, r["total_sq"] / r["points"] - mean * mean)
+        stats.append({
+            "recipe": r["recipe"],
+            "base_model": r["base_model"],
+            "gpu_type": r["gpu_type"],
+            "batch_bucket": r["batch_bucket"],
+            "points": r["points"],
+            "tokens_per_gpu_sec": round(mean, 2),
+            "stddev": round(math.sqrt(variance), 2),
+            "updated_at": r["updated_at"],
+        })
+    return stats
+
+
+def _tokens_per_gpu_sec(gpu_type: str, measured: dict[str, dict], base_model: str):
+    own = measured.get(gpu_type)
+    if own and own["points"] >= MIN_POINTS:
+        return own["tokens_per_gpu_sec"], "history", own["points"]
+    trusted = [s for s in measured.values() if s["points"] >= MIN_POINTS]
+    if trusted:
+        ref = max(trusted, key=lambda s: s["points"])
+        scaled = ref["tokens_per_gpu_sec"] * _relative(gpu_type) / _relative(ref["gpu_type"])
+        return scaled, f"scaled from {ref['gpu_type']}", ref["points"]
+    billions = _model_billions(base_model) or 7.0
+    return BASELINE_TOKENS_PER_GPU_SEC / billions * _relative(gpu_type), "default", 0
+
+
+def predict(
+    recipe: str,
+    base_model: str,
+    config: dict,
+    num_gpus: int,
+    row_count: int,
+    gpu_types: Optional[list[str]] = None,
+) -> list[dict]:
+    measured = {s["gpu_type"]: s for s in history(recipe, base_model, batch_bucket(config))}
+    tokens = seq_len(config)
+    total_samples = row_count * (config.get("num_epochs") or 1)
+
+    estimates = []
+    for gpu_type in gpu_types or cluster_service.gpu_types():
+        per_gpu, basis, points = _tokens_per_gpu_sec(gpu_type, measured, base_model)
+        samples_per_sec = per_gpu * num_gpus / tokens
+        hours = total_samples / samples_per_sec / 3600
+        cost = cluster_service.estimate_cost(num_gpus, round(hours, 4), gpu_type)
+        estimates.append({
+            "gpu_type": gpu_type,
+            "samples_per_sec": round(samples_per_sec, 2),
+            "hours": round(hours, 3),
+            "gpu_hours": round(hours * num_gpus, 3),
+            "total_estimated": cost["total_estimated"],
+            "cost": cost,
+            "basis": basis,
+            "history_points": points,
+            "effective_batch": effective_batch(config),
+        })
+    return sorted(estimates, key=lambda e: e["total_estimated"])
+
+
+def eta(metrics: list, num_epochs: float) -> tuple[Optional[float], Optional[float]]:
+    """(progress, seconds left) from the pace of the most recent metric points."""
+    if not metrics:
+        return None, None
+    last = metrics[-1]
+    progress = round(min(1.0, last.epoch / num_epochs), 4) if num_epochs else None
+    window = metrics[-ETA_WINDOW:]
+    if len(window) < 2 or not window[0].timestamp or not last.timestamp:
+        return progress, None
+    elapsed = (
+        datetime.fromisoformat(last.timestamp) - datetime.fromisoformat(window[0].timestamp)
+    ).total_seconds()
+    advanced = last.epoch - window[0].epoch
+    if elapsed <= 0 or advanced <= 0:
+        return progress, None
+    return progress, round(max(0.0, num_epochs - last.epoch) * elapsed / advanced, 1)
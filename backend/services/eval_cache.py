@@ -0,0 +1,142 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+
+from core.db import get_connection, now_iso, serialize_json, deserialize_json
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "refreshes": 0}
+
+
+def _signature(path: str) -> tuple:
+    if os.path.isfile(path):
+        st = os.stat(path)
+        return ((os.path.basename(path), st.st_size, st.st_mtime_ns),)
+    entries = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            full = os.path.join(root, name)
+            st = os.stat(full)
+            entries.append((os.path.relpath(full, path), st.st_size, st.st_mtime_ns))
+    return tuple(sorted(entries))
+
+
+@lru_cache(maxsize=1024)
+def _content_hash(path: str, signature: tuple) -> str:
+    # Keyed by the stat signature, so unchanged artifacts are hashed once.
+    h = hashlib.sha256()
+    for rel, _, _ in signature:
+        full = path if os.path.isfile(path) else os.path.join(path, rel)
+        h.update(rel.encode())
+        with open(full, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def artifact_hash(model: dict) -> str:
+    """Content hash of a model's artifact, or the fingerprint of the run that made it."""
+    path = model.get("artifact_path")
+    if path and os.path.exists(path):
+        return "sha256:" + _content_hash(path, _signature(path))
+    if model.get("fingerprint"):
+        return "run:" + model["fingerprint"]
+    return "model:" + model["id"]
+
+
+def cache_key(artifact: str, benchmark: str, version: str, threshold: float) -> str:
+    canonical = json.dumps(
+        [artifact, benchmark, version, threshold], separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def lookup(keys: dict[str, str]) -> dict[str, dict]:
+    """Cached results for {benchmark: key}, by benchmark."""
+    if not keys:
+        return {}
+    conn = get_connection()
+    try:
+        marks = ",".join("?" * len(keys))
+        rows = conn.execute(
+            f"SELECT key, result, eval_id FROM eval_cache WHERE key IN ({marks})",
+            list(keys.values()),
+        ).fetchall()
+        found = {r["key"]: r for r in rows}
+        if found:
+            conn.executemany(
+                "UPDATE eval_cache SET hits = hits + 1, last_hit_at = ? WHERE key = ?",
+                [(now_iso(), k) for k in found],
+            )
+            conn.commit()
+    finally:
+        conn.close()
+
+    cached = {}
+    for bench, key in keys.items():
+        row = found.get(key)
+        if row is not None:
+            result = deserialize_json(row["result"])
+            result["details"] = {
+                **result.get("details", {}), "cached": True, "cached_from": row["eval_id"],
+            }
+            cached[bench] = result
+    with _lock:
+        _stats["hits"] += len(cached)
+        _stats["misses"] += len(keys) - len(cached)
+    return cached
+
+
+def store(key: str, artifact: str, version: str, result: dict, eval_id: str):
+    conn = get_connection()
+    try:
+        conn.execute(
+            """INSERT INTO eval_cache
+               (key, artifact_hash, benchmark, version, threshold, result,
+                eval_id, hits, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)
+               ON CONFLICT (key) DO UPDATE SET
+                   result = excluded.result, eval_id = excluded.eval_id,
+                   created_at = excluded.created_at""",
+            (
+                key, artifact, result["benchmark"], version, result.get("threshold"),
+                serialize_json(result), eval_id, now_iso(),
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    with _lock:
+        _stats["stores"] += 1
+
+
+def note_refresh(count: int):
+    with _lock:
+        _stats["refreshes"] += count
+
+
+def stats() -> dict:
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            """SELECT COUNT(*) AS entries, COALESCE(SUM(hits), 0) AS lifetime_hits,
+                      COUNT(DISTINCT artifact_hash) AS artifacts
+               FROM eval_cache"""
+        ).fetchone()
+    finally:
+        conn.close()
+    with _lock:
+        session = dict(_stats)
+    lookups = session["hits"] + session["misses"]
+    return {
+        "entries": row["entries"],
+        "artifacts": row["artifacts"],
+        "lifetime_hits": row["lifetime_hits"],
+        **session,
+        "hit_rate": round(session["hits"] / lookups, 4) if lookups else None,
+    }
@@ -0,0 +1,189 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import logging
+import multiprocessing as mp
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import (
+    FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait,
+)
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+
+from core.db import now_iso
+from config import settings
+from services import inference
+
+logger = logging.getLogger(__name__)
+
+# (benchmark, result or None, error or None), as each benchmark finishes.
+ResultHandler = Callable[[str, Optional[dict], Optional[str]], None]
+# (unit key, benchmark, result or None, error or None), as each unit finishes.
+UnitHandler = Callable[[str, str, Optional[dict], Optional[str]], None]
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+
+def _seed(*parts: str) -> int:
+    return zlib.crc32("/".join(parts).encode())
+
+
+@lru_cache(maxsize=32)
+def load_benchmark(benchmark: str) -> tuple[tuple[str, ...], np.ndarray]:
+    """A benchmark's sample ids and per-sample difficulty.
+
+    Loaded once per worker and shared by every model it scores.
+    """
+    time.sleep(0.2)
+    rng = np.random.default_rng(_seed(benchmark))
+    n = int(rng.integers(100, 1000))
+    return tuple(f"{benchmark}-{i}" for i in range(n)), rng.normal(0.0, 0.2, n)
+
+
+def run_benchmark(benchmark: str, model: dict, threshold: float) -> dict:
+    """Score one benchmark; runs in a pool worker."""
+    if settings.eval_backend == "local" and benchmark in inference.BENCHMARKS:
+        return inference.run_benchmark(benchmark, model, threshold)
+
+    started = now_iso()
+    start = time.perf_counter()
+    sample_ids, difficulty = load_benchmark(benchmark)
+    time.sleep(random.uniform(0.05, 0.25))
+
+    # A model's skill on a benchmark is fixed; each run adds sampling noise.
+    skill = np.random.default_rng(_seed(model["id"], benchmark)).random()
+    rng = np.random.default_rng()
+    n = len(sample_ids)
+    if benchmark == "perplexity":
+        scores = (15.0 + 65.0 * skill) * np.exp(difficulty + rng.normal(0.0, 0.1, n))
+        score = float(scores.mean())
+        passed = score <= threshold
+        sample_passed = scores <= threshold
+        outputs = [""] * n
+    else:
+        p = np.clip(0.4 + 0.55 * skill - difficulty, 0.0, 1.0)
+        scores = (rng.random(n) < p).astype(np.float64)
+        score = float(scores.mean())
+        passed = score >= threshold
+        sample_passed = scores >= threshold
+        outputs = np.where(sample_passed, "A", rng.choice(["B", "C", "D"], n)).tolist()
+
+    return {
+        "benchmark": benchmark,
+        "score": round(score, 4),
+        "passed": passed,
+        "threshold": threshold,
+        "details": {
+            "samples_evaluated": len(sample_ids),
+            "started_at": started,
+            "completed_at": now_iso(),
+            "seconds": round(time.perf_counter() - start, 3),
+        },
+        # Per-sample records; eval_service stores them apart from the result.
+        "samples": {
+            "sample_id": list(sample_ids),
+            "output": outputs,
+            "score": scores.tolist(),
+            "latency_ms": rng.lognormal(np.log(40.0), 0.4, n).round(2).tolist(),
+            "passed": sample_passed.tolist(),
+        },
+    }
+
+
+def get_executor() -> Executor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Scorers are CPU-bound, so processes by default; threads suit
+            # scorers that wait on a remote model.
+            if settings.eval_executor == "thread":
+                _executor = ThreadPoolExecutor(
+                    settings.eval_workers, thread_name_prefix="forge-eval",
+                )
+            else:
+                _executor = ProcessPoolExecutor(
+                    settings.eval_workers, mp_context=mp.get_context("spawn"),
+                )
+            logger.info("Started %d %s eval workers", settings.eval_workers, settings.eval_executor)
+        return _executor
+
+
+def _warm():
+    if settings.eval_backend == "local":
+        import torch  # noqa: F401
+
+
+def start():
+    executor = get_executor()
+    # Process pools spawn workers on demand and import this module on first
+    # use; pay both before the first suite.
+    for _ in range(settings.eval_workers):
+        executor.submit(_warm)
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_units(
+    units: list[tuple[str, str, dict]],
+    thresholds: dict[str, float],
+    on_result: UnitHandler,
+    max_inflight: Optional[int] = None,
+):
+    """Run (key, benchmark, model) units on the shared pool, reporting each as it lands.
+
+    At most `max_inflight` units are queued on the pool at once, so a large
+    batch leaves room for other evals between its units.
+    """
+    executor = get_executor()
+    pending = iter(units)
+    inflight = {}
+
+    def submit_next() -> bool:
+        unit = next(pending, None)
+        if unit is None:
+            return False
+        key, bench, model = unit
+        future = executor.submit(run_benchmark, bench, model, thresholds.get(bench, 0.5))
+        inflight[future] = unit
+        return True
+
+    limit = max_inflight or len(units)
+    while len(inflight) < limit and submit_next():
+        pass
+    while inflight:
+        done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+        for future in done:
+            key, bench, model = inflight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error("Benchmark %s failed for %s: %s", bench, model["id"], e)
+                on_result(key, bench, None, f"{type(e).__name__}: {e}")
+            else:
+                on_result(key, bench, result, None)
+            submit_next()
+
+
+def run_suite(
+    model: dict,
+    benchmarks: list[str],
+    thresholds: dict[str, float],
+    on_result: ResultHandler,
+):
+    """Run benchmarks concurrently on the shared pool, reporting each as it lands."""
+    run_units(
+        [(bench, bench, model) for bench in benchmarks], thresholds,
+        lambda key, bench, result, error: on_result(bench, result, error),
+    )
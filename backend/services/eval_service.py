@@ -2,17 +2,25 @@
 # https://www.linkedin.com/in/ahmadghazinazer
 
 import uuid
-import random
 import threading
-import time
 import logging
-from typing import Optional
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
 
-from core.db import get_connection, now_iso, serialize_json, row_to_dict
+from config import settings
+from core.db import (
+    get_connection, now_iso, serialize_json, deserialize_json, row_to_dict,
+)
 from core.schemas import (
     EvalRun, EvalRecord, EvalResult, EvalStatus,
+    EvalBatchRun, EvalBatchRecord, EvalBatchStatus,
+)
+from core.exceptions import NotFoundError, ValidationError
+from services import (
+    eval_cache, eval_executor, eval_stats, inference, leaderboard_service, sample_store,
 )
-from core.exceptions import NotFoundError
 
 logger = logging.getLogger(__name__)
 
@@ -37,59 +45,313 @@ THRESHOLDS = {
     "logic_score": 0.55,
     "code_correctness": 0.50,
 }
+# Benchmarks where a lower score is better.
+LOWER_IS_BETTER = {"perplexity"}
+
+# Bump a benchmark's version when its dataset or scorer changes, so cached
+# results for it stop matching.
+BENCHMARK_VERSIONS: dict[str, str] = {}
+
+
+def _benchmark_version(benchmark: str) -> str:
+    version = BENCHMARK_VERSIONS.get(benchmark, "1")
+    # Real and simulated scores must never stand in for each other in the cache.
+    if settings.eval_backend == "local" and benchmark in inference.BENCHMARKS:
+        version += "+local-int8" if settings.eval_quantize else "+local"
+    return version
+
+
+def _cache_keys(conn, model_id: str, benchmarks: list[str]) -> tuple[dict, str, dict[str, str]]:
+    row = conn.execute(
+        """SELECT m.id, m.base_model, m.artifact_path, r.fingerprint
+           FROM models m LEFT JOIN runs r ON r.id = m.run_id WHERE m.id = ?""",
+        (model_id,),
+    ).fetchone()
+    model = dict(row)
+    artifact = eval_cache.artifact_hash(model)
+    return model, artifact, {
+        b: eval_cache.cache_key(
+            artifact, b, _benchmark_version(b), THRESHOLDS.get(b, 0.5),
+        )
+        for b in benchmarks
+    }
+
+
+@dataclass
+class _SuiteState:
+    eval_id: str
+    model: dict
+    benchmarks: list[str]
+    artifact: str
+    keys: dict[str, str]
+    cached: dict[str, dict]
+    progress: dict
+    results: list[dict] = field(default_factory=list)
+
+    @property
+    def model_id(self) -> str:
+        return self.model["id"]
+
+    @property
+    def missing(self) -> list[str]:
+        return [b for b in self.benchmarks if b not in self.cached]
+
+    @property
+    def done(self) -> bool:
+        return self.progress["completed"] == self.progress["total"]
+
+
+def _begin_suite(
+    conn, eval_id: str, model_id: str, benchmarks: list[str], force_refresh: bool,
+) -> _SuiteState:
+    """Mark an eval running and record its cached results."""
+    progress = {
+        "total": len(benchmarks),
+        "completed": 0,
+        "benchmarks": {b: {"status": "pending"} for b in benchmarks},
+    }
+    conn.execute(
+        "UPDATE evals SET status = ?, started_at = ?, progress = ? WHERE id = ?",
+        (EvalStatus.RUNNING.value, now_iso(), serialize_json(progress), eval_id),
+    )
+    conn.commit()
+
+    model, artifact, keys = _cache_keys(conn, model_id, benchmarks)
+    if force_refresh:
+        eval_cache.note_refresh(len(keys))
+        cached = {}
+    else:
+        cached = eval_cache.lookup(keys)
+    state = _SuiteState(eval_id, model, benchmarks, artifact, keys, cached, progress)
+    for bench, result in cached.items():
+        _record_result(conn, state, bench, result, None)
+    return state
+
+
+def _record_result(
+    conn, state: _SuiteState, bench: str, result: Optional[dict], error: Optional[str],
+    samples: Optional[dict] = None,
+):
+    progress = state.progress["benchmarks"][bench]
+    if samples is not None:
+        conn.execute(
+            """INSERT OR REPLACE INTO eval_samples (eval_id, benchmark, sample_ids, scores)
+               VALUES (?, ?, ?, ?)""",
+            (
+                state.eval_id, bench, serialize_json(samples["sample_id"]),
+                eval_stats.pack_scores(samples["score"]),
+            ),
+        )
+        sample_store.append(conn, state.eval_id, bench, samples)
+    elif error is None and bench in state.cached:
+        # A cached result reuses the per-sample records of the eval that computed it.
+        source = result["details"]["cached_from"]
+        conn.execute(
+            """INSERT OR IGNORE INTO eval_samples (eval_id, benchmark, sample_ids, scores)
+               SELECT ?, benchmark, sample_ids, scores FROM eval_samples
+               WHERE eval_id = ? AND benchmark = ?""",
+            (state.eval_id, source, bench),
+        )
+        sample_store.link(conn, state.eval_id, source, bench)
+    if error is None:
+        state.results.append(result)
+        progress.update(
+            status="cached" if bench in state.cached else "completed",
+            started_at=result["details"]["started_at"],
+            completed_at=result["details"]["completed_at"],
+            seconds=result["details"]["seconds"],
+        )
+    else:
+        progress.update(status="error", error=error, completed_at=now_iso())
+    state.progress["completed"] += 1
+    # Partial results are visible to GET /evals/{id} as they land.
+    conn.execute(
+        "UPDATE evals SET results = ?, progress = ? WHERE id = ?",
+        (serialize_json(state.results), serialize_json(state.progress), state.eval_id),
+    )
+    conn.commit()
+
+
+def _store_result(
+    conn, state: _SuiteState, bench: str, result: Optional[dict], error: Optional[str],
+):
+    """Record a freshly computed result and add it to the cache."""
+    samples = result.pop("samples", None) if error is None else None
+    _record_result(conn, state, bench, result, error, samples)
+    # Published only once the per-sample records it points at are committed,
+    # so a cache hit can always link them.
+    if error is None:
+        eval_cache.store(
+            state.keys[bench], state.artifact, _benchmark_version(bench),
+            result, state.eval_id,
+        )
 
 
-def _simulate_eval(eval_id: str, benchmarks: list[str]):
+def _finish_suite(conn, state: _SuiteState) -> str:
+    order = {b: i for i, b in enumerate(state.benchmarks)}
+    results = sorted(state.results, key=lambda r: order[r["benchmark"]])
+    errored = any(s["status"] == "error" for s in state.progress["benchmarks"].values())
+    all_passed = all(r["passed"] for r in results)
+    scores = [r["score"] for r in results if r["benchmark"] not in LOWER_IS_BETTER]
+    overall = sum(scores) / len(scores) if scores else 0.0
+
+    if errored:
+        status = EvalStatus.ERROR.value
+    else:
+        status = EvalStatus.PASSED.value if all_passed else EvalStatus.FAILED.value
+    completed = now_iso()
+    conn.execute(
+        """UPDATE evals SET status = ?, results = ?, overall_score = ?,
+           completed_at = ? WHERE id = ?""",
+        (status, serialize_json(results), round(overall, 4), completed, state.eval_id),
+    )
+    conn.executemany(
+        """INSERT OR REPLACE INTO eval_results
+           (eval_id, model_id, suite, benchmark, score, passed, threshold,
+            cached, details, completed_at)
+           SELECT id, model_id, suite, ?, ?, ?, ?, ?, ?, ? FROM evals WHERE id = ?""",
+        [
+            (
+                r["benchmark"], r["score"], r["passed"], r.get("threshold"),
+                bool(r["details"].get("cached")), serialize_json(r["details"]),
+                completed, state.eval_id,
+            )
+            for r in results
+        ],
+    )
+    leaderboard_service.record_eval(conn, state.eval_id)
+    conn.commit()
+    return status
+
+
+def _fail_suite(conn, eval_id: str, exc: Exception):
+    logger.error("Eval %s failed: %s", eval_id, exc)
+    conn.rollback()
+    conn.execute(
+        "UPDATE evals SET status = ? WHERE id = ?", (EvalStatus.ERROR.value, eval_id),
+    )
+    conn.commit()
+
+
+def _run_suite(
+    eval_id: str, model_id: str, benchmarks: list[str], force_refresh: bool = False,
+):
     conn = get_connection()
     try:
+        state = _begin_suite(conn, eval_id, model_id, benchmarks, force_refresh)
+        if state.missing:
+            eval_executor.run_suite(
+                state.model, state.missing, THRESHOLDS,
+                lambda bench, result, error: _store_result(conn, state, bench, result, error),
+            )
+        _finish_suite(conn, state)
+    except Exception as exc:
+        _fail_suite(conn, eval_id, exc)
+    finally:
+        conn.close()
+
+
+def _run_batch(
+    batch_id: str,
+    members: list[tuple[str, str]],
+    benchmarks: list[str],
+    force_refresh: bool,
+    max_inflight: int,
+):
+    """Run every (model, benchmark) unit of a batch on the shared eval pool.
+
+    Each member is an ordinary eval, finished through the same path as a
+    single run, so eval_results, the cache and the leaderboard see no
+    difference.
+    """
+    states: dict[str, _SuiteState] = {}
+    counts = {"completed": 0, "cached": 0, "failed": 0}
+
+    conn = get_connection()
+
+    def update_batch():
         conn.execute(
-            "UPDATE evals SET status = ?, started_at = ? WHERE id = ?",
-            (EvalStatus.RUNNING.value, now_iso(), eval_id),
+            """UPDATE eval_batches SET completed_units = ?, cached_units = ?,
+               failed_units = ? WHERE id = ?""",
+            (counts["completed"], counts["cached"], counts["failed"], batch_id),
         )
         conn.commit()
 
-        results = []
-        for bench in benchmarks:
-            time.sleep(0.05)
-            threshold = THRESHOLDS.get(bench, 0.5)
-
-            if bench == "perplexity":
-                score = random.uniform(15.0, 80.0)
-                passed = score <= threshold
-            else:
-                score = random.uniform(0.4, 0.95)
-                passed = score >= threshold
-
-            results.append({
-                "benchmark": bench,
-                "score": round(score, 4),
-                "passed": passed,
-                "threshold": threshold,
-                "details": {"samples_evaluated": random.randint(100, 1000)},
-            })
-
-        all_passed = all(r["passed"] for r in results)
-        scores = [r["score"] for r in results if r["benchmark"] != "perplexity"]
-        overall = sum(scores) / len(scores) if scores else 0.0
+    def finish(state: _SuiteState):
+        try:
+            _finish_suite(conn, state)
+        except Exception as exc:
+            _fail_suite(conn, state.eval_id, exc)
+
+    def on_result(eval_id: str, bench: str, result: Optional[dict], error: Optional[str]):
+        state = states[eval_id]
+        _store_result(conn, state, bench, result, error)
+        counts["completed"] += 1
+        if error is not None:
+            counts["failed"] += 1
+        if state.done:
+            finish(state)
+        update_batch()
 
-        status = EvalStatus.PASSED.value if all_passed else EvalStatus.FAILED.value
+    try:
         conn.execute(
-            """UPDATE evals SET status = ?, results = ?, overall_score = ?,
-               completed_at = ? WHERE id = ?""",
-            (status, serialize_json(results), round(overall, 4), now_iso(), eval_id),
+            "UPDATE eval_batches SET status = ?, started_at = ? WHERE id = ?",
+            (EvalBatchStatus.RUNNING.value, now_iso(), batch_id),
+        )
+        conn.commit()
+
+        for eval_id, model_id in members:
+            try:
+                state = _begin_suite(conn, eval_id, model_id, benchmarks, force_refresh)
+            except Exception as exc:
+                _fail_suite(conn, eval_id, exc)
+                counts["completed"] += len(benchmarks)
+                counts["failed"] += len(benchmarks)
+                continue
+            states[eval_id] = state
+            counts["completed"] += len(state.cached)
+            counts["cached"] += len(state.cached)
+            if state.done:
+                finish(state)
+        update_batch()
+
+        # Benchmark-major order keeps each worker on one benchmark's data
+        # across many models instead of reloading it per model.
+        units = [
+            (eval_id, bench, state.model)
+            for bench in benchmarks
+            for eval_id, state in states.items()
+            if bench not in state.cached
+        ]
+        eval_executor.run_units(units, THRESHOLDS, on_result, max_inflight)
+
+        conn.execute(
+            "UPDATE eval_batches SET status = ?, completed_at = ? WHERE id = ?",
+            (EvalBatchStatus.COMPLETED.value, now_iso(), batch_id),
         )
         conn.commit()
     except Exception as exc:
-        logger.error("Eval %s failed: %s", eval_id, exc)
+        logger.error("Eval batch %s failed: %s", batch_id, exc)
+        conn.rollback()
         conn.execute(
-            "UPDATE evals SET status = ? WHERE id = ?",
-            (EvalStatus.ERROR.value, eval_id),
+            "UPDATE evals SET status = ? WHERE batch_id = ? AND status IN (?, ?)",
+            (EvalStatus.ERROR.value, batch_id, EvalStatus.QUEUED.value, EvalStatus.RUNNING.value),
+        )
+        conn.execute(
+            "UPDATE eval_batches SET status = ?, completed_at = ? WHERE id = ?",
+            (EvalBatchStatus.ERROR.value, now_iso(), batch_id),
         )
         conn.commit()
     finally:
         conn.close()
 
 
+def _resolve_benchmarks(suite: str, benchmarks: list[str]) -> list[str]:
+    if not benchmarks:
+        benchmarks = BENCHMARK_REGISTRY.get(suite, BENCHMARK_REGISTRY["default"])
+    return list(dict.fromkeys(benchmarks))
+
+
 def run_eval(payload: EvalRun) -> EvalRecord:
     conn = get_connection()
     try:
@@ -99,10 +361,7 @@ def run_eval(payload: EvalRun) -> EvalRecord:
         if not model:
             raise NotFoundError("Model", payload.model_id)
 
-        benchmarks = payload.benchmarks
-        if not benchmarks:
-            benchmarks = BENCHMARK_REGISTRY.get(payload.suite, BENCHMARK_REGISTRY["default"])
-
+        benchmarks = _resolve_benchmarks(payload.suite, payload.benchmarks)
         eval_id = str(uuid.uuid4())[:12]
 
         conn.execute(
@@ -119,7 +378,9 @@ def run_eval(payload: EvalRun) -> EvalRecord:
         conn.commit()
 
         t = threading.Thread(
-            target=_simulate_eval, args=(eval_id, benchmarks), daemon=True
+            target=_run_suite,
+            args=(eval_id, payload.model_id, benchmarks, payload.force_refresh),
+            daemon=True,
         )
         t.start()
 
@@ -148,63 +409,441 @@ def get_eval(eval_id: str) -> EvalRecord:
         conn.close()
 
 
+def _lower_is_better_sql() -> str:
+    return ",".join(f"'{b}'" for b in sorted(LOWER_IS_BETTER))
+
+
+def _load_evals(conn, rows) -> list[EvalRecord]:
+    # Finished evals read their results from eval_results; only unfinished
+    # ones need the JSON blob with their partial results.
+    normalized = _normalized_results(
+        conn, [r["id"] for r in rows if r["completed_at"] is not None],
+    )
+    evals = []
+    for r in rows:
+        data = row_to_dict(r)
+        if r["completed_at"] is not None:
+            data["results"] = normalized.get(r["id"], [])
+        else:
+            data["results"] = [EvalResult(**res) for res in data.get("results") or []]
+        evals.append(EvalRecord(**data))
+    return evals
+
+
+def _normalized_results(conn, eval_ids: list[str]) -> dict[str, list[EvalResult]]:
+    if not eval_ids:
+        return {}
+    marks = ",".join("?" * len(eval_ids))
+    rows = conn.execute(
+        f"""SELECT eval_id, benchmark, score, passed, threshold, details
+            FROM eval_results WHERE eval_id IN ({marks}) ORDER BY rowid""",
+        eval_ids,
+    ).fetchall()
+    results: dict[str, list[EvalResult]] = {}
+    for r in rows:
+        results.setdefault(r["eval_id"], []).append(EvalResult(
+            benchmark=r["benchmark"], score=r["score"], passed=bool(r["passed"]),
+            threshold=r["threshold"], details=deserialize_json(r["details"]),
+        ))
+    return results
+
+
 def list_evals(
     model_id: Optional[str] = None,
     status: Optional[str] = None,
+    benchmark: Optional[str] = None,
+    min_score: Optional[float] = None,
+    passed: Optional[bool] = None,
     limit: int = 50,
     offset: int = 0,
 ) -> tuple[list[EvalRecord], int]:
     conn = get_connection()
     try:
-        query = "SELECT * FROM evals WHERE 1=1"
-        count_query = "SELECT COUNT(*) FROM evals WHERE 1=1"
+        where = " WHERE 1=1"
         params = []
 
         if model_id:
-            query += " AND model_id = ?"
-            count_query += " AND model_id = ?"
+            where += " AND model_id = ?"
             params.append(model_id)
         if status:
-            query += " AND status = ?"
-            count_query += " AND status = ?"
+            where += " AND status = ?"
             params.append(status)
+        if benchmark:
+            where += (
+                " AND EXISTS (SELECT 1 FROM eval_results r"
+                " WHERE r.eval_id = evals.id AND r.benchmark = ?"
+            )
+            params.append(benchmark)
+            if min_score is not None:
+                where += " AND r.score >= ?"
+                params.append(min_score)
+            if passed is not None:
+                where += " AND r.passed = ?"
+                params.append(int(passed))
+            where += ")"
+        else:
+            # Without a benchmark the filters apply to the eval as a whole.
+            if min_score is not None:
+                where += " AND overall_score >= ?"
+                params.append(min_score)
+            if passed is not None:
+                where += " AND status = ?"
+                params.append(EvalStatus.PASSED.value if passed else EvalStatus.FAILED.value)
+
+        total = conn.execute("SELECT COUNT(*) FROM evals" + where, params).fetchone()[0]
+        rows = conn.execute(
+            """SELECT id, model_id, suite, status, regression_baseline_id,
+                      overall_score, progress, batch_id, started_at, completed_at, created_at,
+                      CASE WHEN completed_at IS NULL THEN results END AS results
+               FROM evals""" + where + " ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return _load_evals(conn, rows), total
+    finally:
+        conn.close()
+
 
-        total = conn.execute(count_query, params).fetchone()[0]
-        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+def run_eval_batch(payload: EvalBatchRun) -> EvalBatchRecord:
+    model_ids = list(dict.fromkeys(payload.model_ids))
+    if len(model_ids) > settings.eval_batch_max_models:
+        raise ValidationError(
+            f"A batch takes at most {settings.eval_batch_max_models} models, got {len(model_ids)}"
+        )
+    benchmarks = _resolve_benchmarks(payload.suite, payload.benchmarks)
+    max_inflight = payload.max_concurrent_units or settings.eval_batch_max_inflight
+
+    conn = get_connection()
+    try:
+        marks = ",".join("?" * len(model_ids))
+        found = {
+            r["id"] for r in conn.execute(
+                f"SELECT id FROM models WHERE id IN ({marks})", model_ids,
+            )
+        }
+        missing = [m for m in model_ids if m not in found]
+        if missing:
+            raise NotFoundError("Model", ", ".join(missing))
+
+        batch_id = str(uuid.uuid4())[:12]
+        created = now_iso()
+        members = [(str(uuid.uuid4())[:12], model_id) for model_id in model_ids]
+        conn.execute(
+            """INSERT INTO eval_batches
+               (id, suite, benchmarks, status, total_units, max_concurrent_units, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (
+                batch_id, payload.suite, serialize_json(benchmarks),
+                EvalBatchStatus.QUEUED.value, len(members) * len(benchmarks),
+                max_inflight, created,
+            ),
+        )
+        conn.executemany(
+            """INSERT INTO evals
+               (id, model_id, suite, status, results, batch_id, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (
+                    eval_id, model_id, payload.suite, EvalStatus.QUEUED.value,
+                    serialize_json([]), batch_id, created,
+                )
+                for eval_id, model_id in members
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    t = threading.Thread(
+        target=_run_batch,
+        args=(batch_id, members, benchmarks, payload.force_refresh, max_inflight),
+        daemon=True,
+    )
+    t.start()
+    return get_eval_batch(batch_id)
+
+
+def get_eval_batch(batch_id: str) -> EvalBatchRecord:
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT * FROM eval_batches WHERE id = ?", (batch_id,)
+        ).fetchone()
+        if not row:
+            raise NotFoundError("Eval batch", batch_id)
+        rows = conn.execute(
+            """SELECT id, model_id, suite, status, regression_baseline_id,
+                      overall_score, progress, batch_id, started_at, completed_at,
+                      created_at, CASE WHEN completed_at IS NULL THEN results END AS results
+               FROM evals WHERE batch_id = ? ORDER BY rowid""",
+            (batch_id,),
+        ).fetchall()
+        return EvalBatchRecord(**row_to_dict(row), evals=_load_evals(conn, rows))
+    finally:
+        conn.close()
+
+
+def stream_eval_batch(batch_id: str) -> Iterator[str]:
+    """NDJSON events for a batch: one per finished unit, per finished eval, then the batch."""
+    conn = get_connection()
+    try:
+        if not conn.execute("SELECT 1 FROM eval_batches WHERE id = ?", (batch_id,)).fetchone():
+            raise NotFoundError("Eval batch", batch_id)
+    finally:
+        conn.close()
+    return _batch_events(batch_id)
+
+
+def _batch_events(batch_id: str) -> Iterator[str]:
+    seen: set[tuple[str, str]] = set()
+    finished: set[str] = set()
+    terminal = {EvalStatus.PASSED.value, EvalStatus.FAILED.value, EvalStatus.ERROR.value}
+    while True:
+        conn = get_connection()
+        try:
+            # Read the batch first: once it is done, every member eval is too.
+            batch = row_to_dict(conn.execute(
+                "SELECT * FROM eval_batches WHERE id = ?", (batch_id,)
+            ).fetchone())
+            rows = conn.execute(
+                """SELECT id, model_id, status, overall_score, progress, results
+                   FROM evals WHERE batch_id = ? AND status != ? ORDER BY rowid""",
+                (batch_id, EvalStatus.QUEUED.value),
+            ).fetchall()
+        finally:
+            conn.close()
 
-        rows = conn.execute(query, params).fetchall()
-        evals = []
         for r in rows:
+            if r["id"] in finished:
+                continue
             data = row_to_dict(r)
-            data["results"] = [EvalResult(**res) for res in data.get("results", [])]
-            evals.append(EvalRecord(**data))
-        return evals, total
+            results = {res["benchmark"]: res for res in data["results"] or []}
+            for bench, state in ((data["progress"] or {}).get("benchmarks") or {}).items():
+                if state["status"] == "pending" or (r["id"], bench) in seen:
+                    continue
+                seen.add((r["id"], bench))
+                event = {
+                    "event": "result", "eval_id": r["id"], "model_id": r["model_id"],
+                    "benchmark": bench, "status": state["status"],
+                }
+                if bench in results:
+                    event.update(score=results[bench]["score"], passed=results[bench]["passed"])
+                else:
+                    event["error"] = state.get("error")
+                yield serialize_json(event) + "\n"
+            if r["status"] in terminal:
+                finished.add(r["id"])
+                yield serialize_json({
+                    "event": "eval", "eval_id": r["id"], "model_id": r["model_id"],
+                    "status": r["status"], "overall_score": r["overall_score"],
+                }) + "\n"
+
+        if batch["status"] in (EvalBatchStatus.COMPLETED.value, EvalBatchStatus.ERROR.value):
+            yield serialize_json({"event": "batch", **batch}) + "\n"
+            return
+        time.sleep(settings.eval_batch_poll_seconds)
+
+
+def _regression_checks(conn, eval_id: str, baseline_ids: list[str]) -> dict[str, list[dict]]:
+    """Per-benchmark comparison of an eval against each baseline eval.
+
+    Benchmarks with per-sample scores on both sides get a paired bootstrap,
+    all of them in one vectorized pass; evals without per-sample scores fall
+    back to a fixed delta on the aggregate.
+    """
+    marks = ",".join("?" * len(baseline_ids))
+    rows = conn.execute(
+        f"""SELECT b.eval_id AS baseline_id, c.benchmark, c.score AS current,
+                   b.score AS baseline
+            FROM eval_results c
+            JOIN eval_results b ON b.benchmark = c.benchmark AND b.eval_id IN ({marks})
+            WHERE c.eval_id = ?
+            ORDER BY c.rowid""",
+        baseline_ids + [eval_id],
+    ).fetchall()
+    samples = {
+        (r["eval_id"], r["benchmark"]): (
+            deserialize_json(r["sample_ids"]), eval_stats.unpack_scores(r["scores"]),
+        )
+        for r in conn.execute(
+            f"SELECT * FROM eval_samples WHERE eval_id IN ({marks}, ?)",
+            baseline_ids + [eval_id],
+        )
+    }
+
+    paired, diffs = [], []
+    for i, r in enumerate(rows):
+        current = samples.get((eval_id, r["benchmark"]))
+        baseline = samples.get((r["baseline_id"], r["benchmark"]))
+        if current and baseline:
+            diff = eval_stats.align(*current, *baseline)
+            if diff is not None:
+                paired.append(i)
+                diffs.append(diff)
+    alpha = settings.eval_regression_alpha
+    stats = dict(zip(paired, eval_stats.paired_bootstrap(
+        diffs, settings.eval_bootstrap_resamples, alpha,
+    )))
+
+    checks: dict[str, list[dict]] = {b: [] for b in baseline_ids}
+    for i, r in enumerate(rows):
+        lower = r["benchmark"] in LOWER_IS_BETTER
+        delta = r["current"] - r["baseline"]
+        entry = {
+            "benchmark": r["benchmark"], "current": r["current"],
+            "baseline": r["baseline"], "delta": round(delta, 4),
+        }
+        s = stats.get(i)
+        if s is None:
+            entry.update(method="threshold", regressed=delta > 5.0 if lower else delta < -0.05)
+        else:
+            worse = s["delta"] > 0 if lower else s["delta"] < 0
+            entry.update(
+                method="bootstrap",
+                ci_low=round(s["ci_low"], 4), ci_high=round(s["ci_high"], 4),
+                p_value=round(s["p_value"], 4), samples=s["samples"],
+                regressed=worse and s["p_value"] < alpha,
+            )
+        checks[r["baseline_id"]].append(entry)
+    return checks
+
+
+def compare_evals(eval_id: str, baseline_id: str) -> dict:
+    conn = get_connection()
+    try:
+        found = {
+            r["id"] for r in conn.execute(
+                "SELECT id FROM evals WHERE id IN (?, ?)", (eval_id, baseline_id),
+            )
+        }
+        for missing in (eval_id, baseline_id):
+            if missing not in found:
+                raise NotFoundError("Eval", missing)
+        regressions = _regression_checks(conn, eval_id, [baseline_id])[baseline_id]
     finally:
         conn.close()
 
+    return {
+        "eval_id": eval_id,
+        "baseline_id": baseline_id,
+        "regressions": regressions,
+        "regressed_count": sum(r["regressed"] for r in regressions),
+    }
 
-def compare_evals(eval_id: str, baseline_id: str) -> dict:
-    current = get_eval(eval_id)
-    baseline = get_eval(baseline_id)
-
-    comparison = {"eval_id": eval_id, "baseline_id": baseline_id, "regressions": []}
-    baseline_scores = {r.benchmark: r.score for r in baseline.results}
-
-    for result in current.results:
-        baseline_score = baseline_scores.get(result.benchmark)
-        if baseline_score is None:
-            continue
-
-        delta = result.score - baseline_score
-        regressed = delta < -0.05 if result.benchmark != "perplexity" else delta > 5.0
-
-        comparison["regressions"].append({
-            "benchmark": result.benchmark,
-            "current": result.score,
-            "baseline": baseline_score,
-            "delta": round(delta, 4),
-            "regressed": regressed,
+
+def compare_lineage(eval_id: str) -> dict:
+    """Compare an eval against the latest finished eval of each earlier version of its model."""
+    conn = get_connection()
+    try:
+        current = conn.execute(
+            """SELECT e.model_id, e.suite, m.name, m.version, m.created_at
+               FROM evals e JOIN models m ON m.id = e.model_id WHERE e.id = ?""",
+            (eval_id,),
+        ).fetchone()
+        if not current:
+            raise NotFoundError("Eval", eval_id)
+        ancestors = conn.execute(
+            """SELECT m.id AS model_id, m.version,
+                      (SELECT e.id FROM evals e
+                       WHERE e.model_id = m.id AND e.suite = ? AND e.status IN (?, ?)
+                       ORDER BY e.completed_at DESC LIMIT 1) AS baseline_id
+               FROM models m WHERE m.name = ? AND m.created_at < ?
+               ORDER BY m.created_at DESC""",
+            (
+                current["suite"], EvalStatus.PASSED.value, EvalStatus.FAILED.value,
+                current["name"], current["created_at"],
+            ),
+        ).fetchall()
+        baseline_ids = [a["baseline_id"] for a in ancestors if a["baseline_id"]]
+        checks = _regression_checks(conn, eval_id, baseline_ids) if baseline_ids else {}
+    finally:
+        conn.close()
+
+    lineage = []
+    for a in ancestors:
+        regressions = checks.get(a["baseline_id"], [])
+        lineage.append({
+            **dict(a),
+            "regressions": regressions,
+            "regressed_count": sum(r["regressed"] for r in regressions),
         })
+    return {
+        "eval_id": eval_id,
+        "model_id": current["model_id"],
+        "name": current["name"],
+        "version": current["version"],
+        "ancestors": lineage,
+        "regressed_count": sum(a["regressed_count"] for a in lineage),
+    }
+
+
+def benchmark_summary(
+    model_status: Optional[str] = None, since: Optional[str] = None,
+) -> list[dict]:
+    """Per-benchmark aggregates and best model across finished evals."""
+    where = " WHERE 1=1"
+    params = []
+    if model_status:
+        where += " AND m.status = ?"
+        params.append(model_status)
+    if since:
+        where += " AND r.completed_at >= ?"
+        params.append(since)
+
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            """SELECT r.benchmark, COUNT(*) AS evals,
+                      COUNT(DISTINCT r.model_id) AS models,
+                      ROUND(AVG(r.score), 4) AS mean_score,
+                      MIN(r.score) AS min_score, MAX(r.score) AS max_score,
+                      ROUND(AVG(r.passed), 4) AS pass_rate
+               FROM eval_results r JOIN models m ON m.id = r.model_id""" + where
+            + " GROUP BY r.benchmark ORDER BY r.benchmark",
+            params,
+        ).fetchall()
+        best = conn.execute(
+            f"""SELECT benchmark, model_id, name, version, score, eval_id FROM (
+                    SELECT r.benchmark, r.model_id, m.name, m.version, r.score, r.eval_id,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY r.benchmark
+                               ORDER BY CASE WHEN r.benchmark IN ({_lower_is_better_sql()})
+                                             THEN r.score ELSE -r.score END,
+                                        r.completed_at DESC
+                           ) AS rank
+                    FROM eval_results r JOIN models m ON m.id = r.model_id{where}
+                ) WHERE rank = 1""",
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+
+    best_by = {b["benchmark"]: dict(b) for b in best}
+    summary = []
+    for r in rows:
+        top = best_by.get(r["benchmark"], {})
+        top.pop("benchmark", None)
+        summary.append({**dict(r), "best": top or None})
+    return summary
+
+
+def benchmark_trend(
+    benchmark: str, model_id: Optional[str] = None, days: int = 30,
+) -> list[dict]:
+    """Daily score statistics for one benchmark."""
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    query = """SELECT substr(completed_at, 1, 10) AS day, COUNT(*) AS evals,
+                      ROUND(AVG(score), 4) AS mean_score,
+                      MIN(score) AS min_score, MAX(score) AS max_score,
+                      ROUND(AVG(passed), 4) AS pass_rate
+               FROM eval_results WHERE benchmark = ? AND completed_at >= ?"""
+    params = [benchmark, since]
+    if model_id:
+        query += " AND model_id = ?"
+        params.append(model_id)
 
-    return comparison
+    conn = get_connection()
+    try:
+        rows = conn.execute(query + " GROUP BY day ORDER BY day", params).fetchall()
+    finally:
+        conn.close()
+    return [dict(r) for r in rows]
@@ -0,0 +1,81 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+
+def pack_scores(scores) -> bytes:
+    return np.asarray(scores, dtype=np.float64).tobytes()
+
+
+def unpack_scores(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float64)
+
+
+def align(
+    current_ids: list[str], current: np.ndarray,
+    baseline_ids: list[str], baseline: np.ndarray,
+) -> Optional[np.ndarray]:
+    """Per-sample differences over the samples both evals scored, or None."""
+    if current_ids == baseline_ids:
+        return current - baseline
+    _, ci, bi = np.intersect1d(
+        np.asarray(current_ids), np.asarray(baseline_ids),
+        assume_unique=True, return_indices=True,
+    )
+    if len(ci) == 0:
+        return None
+    return current[ci] - baseline[bi]
+
+
+@lru_cache(maxsize=2)
+def _weights(size: int, resamples: int, seed: int) -> np.ndarray:
+    # Poisson(1) draw counts approximate multinomial resampling and, unlike
+    # it, do not depend on the sample count, so one matrix serves every
+    # benchmark. Fixed seeds make it safe to reuse across comparisons.
+    rng = np.random.default_rng(seed)
+    return rng.poisson(1.0, (resamples, size)).astype(np.float32)
+
+
+def paired_bootstrap(
+    diffs: list[np.ndarray],
+    resamples: int = 2000,
+    alpha: float = 0.05,
+    seed: int = 0,
+) -> list[dict]:
+    """Mean difference, percentile CI and two-sided p-value for each paired sample.
+
+    All comparisons are resampled together: the differences are padded into
+    one matrix and each resample's means come out of a single matmul.
+    """
+    if not diffs:
+        return []
+    longest = max(len(d) for d in diffs)
+    size = max(1024, 1 << (longest - 1).bit_length())
+    values = np.zeros((size, len(diffs)), dtype=np.float32)
+    mask = np.zeros((size, len(diffs)), dtype=np.float32)
+    for j, d in enumerate(diffs):
+        values[:len(d), j] = d
+        mask[:len(d), j] = 1.0
+
+    weights = _weights(size, resamples, seed)
+    boot = (weights @ values) / np.maximum(weights @ mask, 1.0)
+    observed = np.array([d.mean() for d in diffs])
+    low, high = np.quantile(boot, [alpha / 2, 1 - alpha / 2], axis=0)
+    # Under the null the resampled deltas centre on zero, so count how often
+    # they stray from the observed delta by at least its size.
+    extreme = (np.abs(boot - observed) >= np.abs(observed)).sum(axis=0)
+    p_values = (extreme + 1) / (resamples + 1)
+    return [
+        {
+            "delta": float(observed[j]),
+            "ci_low": float(low[j]),
+            "ci_high": float(high[j]),
+            "p_value": float(p_values[j]),
+            "samples": len(d),
+        }
+        for j, d in enumerate(diffs)
+    ]
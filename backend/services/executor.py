@@ -0,0 +1,323 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import importlib
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PREWARM_MODULES = ("torch", "transformers", "peft")
+
+EventHandler = Callable[[str, Optional[str], dict], None]
+
+
+def _prewarm():
+    for name in PREWARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def _resolve(target: str):
+    module_name, func_name = target.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+class JobControl:
+    """Stop request delivered to a running job; jobs poll it cooperatively."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.action: Optional[str] = None
+        self.reason: Optional[str] = None
+
+    def request(self, action: str, reason: Optional[str] = None):
+        if self._event.is_set():
+            return
+        self.action = action
+        self.reason = reason
+        self._event.set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        return self._event.wait(timeout)
+
+
+def _listen_for_control(control_queue, current: dict):
+    while True:
+        msg = control_queue.get()
+        if msg is None:
+            return
+        run_id, action, reason = msg
+        control = current.get(run_id)
+        if control is not None:
+            control.request(action, reason)
+
+
+def _worker_main(worker_id: int, inbox, control_queue, events):
+    _prewarm()
+    current: dict[str, JobControl] = {}
+    listener = threading.Thread(
+        target=_listen_for_control, args=(control_queue, current), daemon=True,
+    )
+    listener.start()
+    events.put(("ready", worker_id, None, {"pid": os.getpid()}))
+
+    while True:
+        job = inbox.get()
+        if job is None:
+            control_queue.put(None)
+            listener.join(1.0)
+            break
+
+        run_id = job.get("run_id")
+        control = JobControl()
+        current[run_id] = control
+
+        def emit(kind: str, payload: Optional[dict] = None):
+            events.put((kind, worker_id, run_id, payload or {}))
+
+        try:
+            result = _resolve(job["target"])(job, emit, control)
+            emit("done", result or {})
+        except Exception as exc:
+            emit("failed", {
+                "error": str(exc),
+                "error_type": type(exc).__name__,
+                "traceback": traceback.format_exc(),
+            })
+        finally:
+            current.pop(run_id, None)
+            events.put(("idle", worker_id, run_id, {}))
+
+
+@dataclass
+class WorkerHandle:
+    worker_id: int
+    process: mp.Process
+    inbox: object
+    control: object
+    pid: Optional[int] = None
+    job: Optional[dict] = None
+    ready: bool = False
+
+
+class WorkerPool:
+    """Pre-warmed worker processes that run jobs outside the API process."""
+
+    def __init__(self, size: int, on_event: EventHandler, poll_interval: float = 0.5):
+        self.size = size
+        self.poll_interval = poll_interval
+        self._on_event = on_event
+        self._ctx = mp.get_context("spawn")
+        self._events = self._ctx.Queue()
+        self._workers: dict[int, WorkerHandle] = {}
+        self._backlog: deque[dict] = deque()
+        # run_id -> worker_id for jobs whose outcome hasn't been collected,
+        # and the runs among them whose worker died first
+        self._running: dict[str, int] = {}
+        self._lost: set[str] = set()
+        self._killed: set[str] = set()
+        self._lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self._stopping = False
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.worker_restarts = 0
+
+    def start(self):
+        with self._lock:
+            for worker_id in range(self.size):
+                self._spawn(worker_id)
+        self._collector = threading.Thread(
+            target=self._collect, name="executor-collector", daemon=True,
+        )
+        self._collector.start()
+        logger.info("Started %d executor workers", self.size)
+
+    def _spawn(self, worker_id: int):
+        inbox = self._ctx.Queue()
+        control = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, inbox, control, self._events),
+            name=f"forge-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[worker_id] = WorkerHandle(worker_id, process, inbox, control)
+
+    def submit(self, job: dict):
+        with self._lock:
+            worker = self._idle_worker()
+            if worker is None:
+                self._backlog.append(job)
+            else:
+                self._assign(worker, job)
+
+    def signal(self, run_id: str, action: str, reason: Optional[str] = None) -> bool:
+        with self._lock:
+            worker = self._running_worker(run_id)
+            if worker is not None:
+                worker.control.put((run_id, action, reason))
+                return True
+            for job in self._backlog:
+                if job.get("run_id") == run_id:
+                    self._backlog.remove(job)
+                    break
+            else:
+                return False
+        # Never started: report it stopped through the normal event path.
+        self._events.put(("done", -1, run_id, {
+            "status": "stopped", "action": action, "reason": reason,
+        }))
+        return True
+
+    def kill(self, run_id: str) -> bool:
+        with self._lock:
+            worker = self._running_worker(run_id)
+            if worker is not None:
+                self._killed.add(run_id)
+        if worker is None:
+            return False
+        worker.process.kill()
+        worker.process.join(self.poll_interval)
+        # Reap now: a busy event queue would otherwise delay the respawn.
+        self._reap()
+        return True
+
+    def _running_worker(self, run_id: str) -> Optional[WorkerHandle]:
+        # A worker that has already reported the job's outcome is only
+        # tearing down; stopping it would turn a success into a failure.
+        worker = self._workers.get(self._running.get(run_id, -1))
+        if worker is not None and worker.job is not None and worker.job.get("run_id") == run_id:
+            return worker
+        return None
+
+    def _idle_worker(self) -> Optional[WorkerHandle]:
+        for worker in self._workers.values():
+            if worker.job is None and worker.process.is_alive():
+                return worker
+        return None
+
+    def _assign(self, worker: WorkerHandle, job: dict):
+        worker.job = job
+        self._running[job.get("run_id")] = worker.worker_id
+        worker.inbox.put(job)
+
+    def _dispatch_backlog(self):
+        while self._backlog:
+            worker = self._idle_worker()
+            if worker is None:
+                return
+            self._assign(worker, self._backlog.popleft())
+
+    def _collect(self):
+        while not self._stopping:
+            try:
+                kind, worker_id, run_id, payload = self._events.get(
+                    timeout=self.poll_interval,
+                )
+            except queue.Empty:
+                self._reap()
+                continue
+
+            with self._lock:
+                worker = self._workers.get(worker_id)
+                if kind == "ready" and worker is not None:
+                    worker.ready = True
+                    worker.pid = payload.get("pid")
+                elif kind == "idle" and worker is not None and worker.job is not None:
+                    # A respawned worker keeps its predecessor's id; only its
+                    # own job's idle frees it.
+                    if worker.job.get("run_id") == run_id:
+                        worker.job = None
+                    self._dispatch_backlog()
+                elif kind == "lost":
+                    # Queued behind whatever the dead worker sent, so an
+                    # outcome it reported before dying has been seen by now.
+                    if run_id not in self._lost:
+                        continue
+                    kind = "failed"
+                    payload = {
+                        "error": f"worker process exited with code {payload['exitcode']}",
+                        "exitcode": payload["exitcode"],
+                        "killed": run_id in self._killed,
+                    }
+                if kind in ("done", "failed"):
+                    self._running.pop(run_id, None)
+                    self._lost.discard(run_id)
+                    self._killed.discard(run_id)
+                    if kind == "done":
+                        self.jobs_completed += 1
+                    else:
+                        self.jobs_failed += 1
+
+            if kind not in ("ready", "idle"):
+                self._deliver(kind, run_id, payload)
+
+    def _reap(self):
+        with self._lock:
+            if self._stopping:
+                return
+            for worker_id, worker in list(self._workers.items()):
+                if worker.process.is_alive():
+                    continue
+                logger.warning(
+                    "Worker %d exited with code %s; restarting",
+                    worker_id, worker.process.exitcode,
+                )
+                run_id = worker.job.get("run_id") if worker.job is not None else None
+                if run_id is not None and self._running.get(run_id) == worker_id:
+                    del self._running[run_id]
+                    self._lost.add(run_id)
+                    self._events.put(("lost", worker_id, run_id, {
+                        "exitcode": worker.process.exitcode,
+                    }))
+                self.worker_restarts += 1
+                self._spawn(worker_id)
+            self._dispatch_backlog()
+
+    def _deliver(self, kind: str, run_id: Optional[str], payload: dict):
+        try:
+            self._on_event(kind, run_id, payload)
+        except Exception:
+            logger.exception("Event handler failed for %s on %s", kind, run_id)
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._lock:
+            self._stopping = True
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.inbox.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.terminate()
+        if self._collector is not None:
+            self._collector.join(self.poll_interval * 2)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.size,
+                "alive": sum(1 for w in self._workers.values() if w.process.is_alive()),
+                "busy": sum(1 for w in self._workers.values() if w.job is not None),
+                "backlog": len(self._backlog),
+                "jobs_completed": self.jobs_completed,
+                "jobs_failed": self.jobs_failed,
+                "worker_restarts": self.worker_restarts,
+            }
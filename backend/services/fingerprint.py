@@ -0,0 +1,64 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Optional
+
+from config import settings
+
+RECIPES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "recipes")
+
+# Where a run is placed doesn't change what it trains.
+PLACEMENT_KEYS = {"gpu_type", "min_gpu_memory_gb"}
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    # 1 and 1.0 are the same setting once it reaches the trainer.
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def normalize_config(config: dict) -> dict:
+    return _normalize({k: v for k, v in config.items() if k not in PLACEMENT_KEYS})
+
+
+@lru_cache(maxsize=None)
+def code_version(recipe: str) -> str:
+    h = hashlib.sha256(settings.version.encode())
+    path = os.path.join(RECIPES_DIR, f"{recipe}.py")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return f"{settings.version}+{h.hexdigest()[:12]}"
+
+
+def compute(
+    dataset_checksum: Optional[str],
+    dataset_id: str,
+    base_model: str,
+    recipe: str,
+    config: dict,
+    num_gpus: int,
+) -> str:
+    """Canonical hash of everything that determines what a run produces."""
+    canonical = json.dumps(
+        {
+            # Datasets registered before checksums existed fall back to their id.
+            "dataset": dataset_checksum or dataset_id,
+            "base_model": base_model,
+            "recipe": recipe,
+            "config": normalize_config(config),
+            "num_gpus": num_gpus,
+            "code": code_version(recipe),
+        },
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
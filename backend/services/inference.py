@@ -0,0 +1,347 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import copy
+import json
+import logging
+import math
+import os
+import random
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from config import settings
+from core.db import now_iso
+
+logger = logging.getLogger(__name__)
+
+# Benchmarks the local engine scores for real; the rest stay simulated.
+BENCHMARKS = ("accuracy", "perplexity", "coherence")
+
+
+@dataclass
+class EvalModel:
+    model: object
+    tokenizer: object
+    context_length: int
+    adapter: Optional[str] = None
+    quantized: bool = False
+
+
+@dataclass
+class BatchStats:
+    tokens: int = 0
+    seconds: float = 0.0
+    batches: int = 0
+
+    @property
+    def tokens_per_sec(self) -> float:
+        return round(self.tokens / self.seconds, 1) if self.seconds else 0.0
+
+
+# --- benchmark data ---
+
+_NOUNS = ["river", "engine", "garden", "letter", "market", "window", "forest", "signal"]
+_ADJECTIVES = ["quiet", "bright", "narrow", "ancient", "heavy", "gentle", "sudden", "distant"]
+_VERBS = ["crossed", "followed", "opened", "carried", "watched", "reached", "covered", "joined"]
+
+
+def _builtin_samples(benchmark: str) -> list[dict]:
+    rng = random.Random(benchmark)
+    samples = []
+    for i in range(settings.eval_builtin_samples):
+        sample_id = f"{benchmark}-{i}"
+        if benchmark == "accuracy":
+            a, b = rng.randint(1, 9), rng.randint(1, 9)
+            samples.append({"id": sample_id, "prompt": f"Q: {a}+{b}=? A:", "answer": str(a + b)})
+        elif benchmark == "perplexity":
+            words = [rng.choice(w) for w in (_ADJECTIVES, _NOUNS, _VERBS, _ADJECTIVES, _NOUNS)]
+            samples.append({"id": sample_id, "text": "The {} {} {} the {} {}.".format(*words)})
+        else:
+            samples.append({
+                "id": sample_id,
+                "prompt": f"The {rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)}",
+            })
+    return samples
+
+
+@lru_cache(maxsize=8)
+def load_samples(benchmark: str) -> tuple[dict, ...]:
+    """A benchmark's prompts: `{benchmark}.jsonl` in eval_benchmark_dir, else a built-in set."""
+    if settings.eval_benchmark_dir:
+        path = os.path.join(settings.eval_benchmark_dir, f"{benchmark}.jsonl")
+        if os.path.exists(path):
+            with open(path) as f:
+                return tuple(json.loads(line) for line in f if line.strip())
+    return tuple(_builtin_samples(benchmark))
+
+
+# --- model loading ---
+
+def _resolve_artifact(artifact_path: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+    """(full model dir, LoRA adapter dir) found under a registered artifact."""
+    if not artifact_path or not os.path.isdir(artifact_path):
+        return None, None
+    for candidate in (artifact_path, os.path.join(artifact_path, "lora_adapter")):
+        if os.path.exists(os.path.join(candidate, "adapter_config.json")):
+            return None, candidate
+    if os.path.exists(os.path.join(artifact_path, "config.json")):
+        return artifact_path, None
+    return None, None
+
+
+def _linearize(model):
+    # Dynamic quantization only rewrites nn.Linear; GPT-2 style models use
+    # Conv1D, which is the same op with a transposed weight.
+    import torch.nn as nn
+
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if type(child).__name__ == "Conv1D":
+                linear = nn.Linear(child.weight.shape[0], child.weight.shape[1])
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(module, name, linear)
+    return model
+
+
+def _owned_bytes(model, quantized: bool) -> int:
+    # An unquantized model is a view over cached base weights, which the
+    # base entry already counts; only its adapter weights are new.
+    if quantized:
+        tensors = [t for t in model.state_dict().values() if hasattr(t, "element_size")]
+    else:
+        tensors = [p for name, p in model.named_parameters() if "lora_" in name]
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def _prepare(base_model: str, full_model: Optional[str], adapter: Optional[str], quantize: bool):
+    import torch
+    from recipes.model_cache import load_base_model, load_tokenizer
+
+    source = full_model or base_model
+    model = load_base_model(source, torch_dtype=torch.float32)
+    has_tokenizer = adapter and os.path.exists(os.path.join(adapter, "tokenizer_config.json"))
+    tokenizer = load_tokenizer(adapter if has_tokenizer else source)
+    if adapter:
+        from peft import PeftModel
+
+        model = PeftModel.from_pretrained(model, adapter)
+    if quantize:
+        # Merging writes into the weights, so work on a private copy rather
+        # than the cached base tensors the view shares.
+        model = copy.deepcopy(model)
+        if adapter:
+            model = model.merge_and_unload()
+        model = torch.ao.quantization.quantize_dynamic(
+            _linearize(model), {torch.nn.Linear}, dtype=torch.qint8,
+        )
+    model.eval()
+
+    config = model.config
+    context = getattr(config, "max_position_embeddings", None) or getattr(config, "n_positions", 1024)
+    value = EvalModel(model, tokenizer, context, adapter=adapter, quantized=quantize)
+    return value, _owned_bytes(model, quantize)
+
+
+def load_model(base_model: str, artifact_path: Optional[str], quantize: bool = False) -> EvalModel:
+    """A registered model ready for inference, cached alongside training's base models."""
+    from recipes.model_cache import load_cached
+
+    full_model, adapter = _resolve_artifact(artifact_path)
+    key = ("eval", base_model, full_model, adapter, quantize)
+    return load_cached(key, lambda: _prepare(base_model, full_model, adapter, quantize))
+
+
+# --- batching ---
+
+def plan_batches(lengths: list[int], max_tokens: int, max_batch: int) -> list[list[int]]:
+    """Group sample indexes into batches of similar length under a padded-token budget."""
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    batches, current = [], []
+    for i in order:
+        # Sorted longest first, so the first member sets the padded width.
+        width = lengths[current[0]] if current else lengths[i]
+        if current and (len(current) >= max_batch or (len(current) + 1) * width > max_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _encode(em: EvalModel, texts: list[str], keep: int) -> list[list[int]]:
+    # Keep the tail of over-long inputs; at least one token so empty
+    # prompts still produce a forward pass.
+    ids = [em.tokenizer(t)["input_ids"][-keep:] for t in texts]
+    return [x or [_token_id(em, em.tokenizer.bos_token_id) or 0] for x in ids]
+
+
+def _token_id(em: EvalModel, token_id: Optional[int]) -> Optional[int]:
+    # Some small test models declare special ids outside their vocabulary.
+    return token_id if token_id is not None and token_id < em.model.config.vocab_size else None
+
+
+def generate(em: EvalModel, prompts: list[str], max_new_tokens: int) -> tuple[list[list[int]], list[float], BatchStats]:
+    """Greedy continuations per prompt, per-prompt latency in ms, and throughput."""
+    import torch
+
+    encoded = _encode(em, prompts, max(1, em.context_length - max_new_tokens))
+    pad = _token_id(em, em.tokenizer.pad_token_id) or 0
+    eos = _token_id(em, em.tokenizer.eos_token_id)
+    outputs: list[list[int]] = [[] for _ in prompts]
+    latency = [0.0] * len(prompts)
+    stats = BatchStats()
+
+    for batch in plan_batches(
+        [len(x) for x in encoded], settings.eval_max_batch_tokens, settings.eval_max_batch_size,
+    ):
+        start = time.perf_counter()
+        width = max(len(encoded[i]) for i in batch)
+        # Left padding keeps every prompt's last token in the final column.
+        input_ids = torch.tensor([[pad] * (width - len(encoded[i])) + encoded[i] for i in batch])
+        mask = torch.tensor([[0] * (width - len(encoded[i])) + [1] * len(encoded[i]) for i in batch])
+        positions = (mask.cumsum(-1) - 1).clamp(min=0)
+        done = torch.zeros(len(batch), dtype=torch.bool)
+        past = None
+        generated = 0
+        with torch.inference_mode():
+            for _ in range(max_new_tokens):
+                out = em.model(
+                    input_ids=input_ids, attention_mask=mask, position_ids=positions,
+                    past_key_values=past, use_cache=True,
+                )
+                # The cache holds every earlier position, so each later step
+                # feeds only the token just produced.
+                past = out.past_key_values
+                next_ids = out.logits[:, -1].argmax(-1)
+                for row, i in enumerate(batch):
+                    if not done[row]:
+                        outputs[i].append(int(next_ids[row]))
+                        generated += 1
+                if eos is not None:
+                    done |= next_ids == eos
+                if done.all():
+                    break
+                input_ids = next_ids[:, None]
+                mask = torch.cat([mask, torch.ones(len(batch), 1, dtype=mask.dtype)], dim=1)
+                positions = positions[:, -1:] + 1
+        elapsed = time.perf_counter() - start
+        stats.tokens += generated
+        stats.seconds += elapsed
+        stats.batches += 1
+        for i in batch:
+            latency[i] = round(elapsed * 1000, 2)
+    return outputs, latency, stats
+
+
+def negative_log_likelihood(em: EvalModel, texts: list[str]) -> tuple[list[tuple[float, int]], list[float], BatchStats]:
+    """(summed NLL, predicted tokens) per text, per-text latency in ms, and throughput."""
+    import torch
+    import torch.nn.functional as F
+
+    encoded = _encode(em, texts, em.context_length)
+    pad = _token_id(em, em.tokenizer.pad_token_id) or 0
+    results = [(0.0, 0)] * len(texts)
+    latency = [0.0] * len(texts)
+    stats = BatchStats()
+
+    for batch in plan_batches(
+        [len(x) for x in encoded], settings.eval_max_batch_tokens, settings.eval_max_batch_size,
+    ):
+        start = time.perf_counter()
+        width = max(len(encoded[i]) for i in batch)
+        input_ids = torch.tensor([encoded[i] + [pad] * (width - len(encoded[i])) for i in batch])
+        mask = torch.tensor([[1] * len(encoded[i]) + [0] * (width - len(encoded[i])) for i in batch])
+        with torch.inference_mode():
+            logits = em.model(input_ids=input_ids, attention_mask=mask).logits
+        targets = input_ids[:, 1:]
+        target_mask = mask[:, 1:].float()
+        nll = F.cross_entropy(
+            logits[:, :-1].transpose(1, 2).float(), targets, reduction="none",
+        ) * target_mask
+        elapsed = time.perf_counter() - start
+        for row, i in enumerate(batch):
+            results[i] = (float(nll[row].sum()), int(target_mask[row].sum()))
+            latency[i] = round(elapsed * 1000, 2)
+        stats.tokens += int(mask.sum())
+        stats.seconds += elapsed
+        stats.batches += 1
+    return results, latency, stats
+
+
+# --- scorers ---
+
+def _distinct_bigrams(tokens: list[int]) -> float:
+    if len(tokens) < 2:
+        return 0.0
+    bigrams = list(zip(tokens, tokens[1:]))
+    return len(set(bigrams)) / len(bigrams)
+
+
+def run_benchmark(benchmark: str, model: dict, threshold: float) -> dict:
+    """Score a benchmark by running the model; same result shape as the simulated scorer."""
+    started = now_iso()
+    start = time.perf_counter()
+    samples = load_samples(benchmark)
+    em = load_model(model["base_model"], model.get("artifact_path"), settings.eval_quantize)
+    decode = lambda ids: em.tokenizer.decode(ids, skip_special_tokens=True)
+
+    if benchmark == "perplexity":
+        nll, latency, stats = negative_log_likelihood(em, [s["text"] for s in samples])
+        scores = [math.exp(total / max(count, 1)) for total, count in nll]
+        outputs = [""] * len(samples)
+        total_tokens = sum(count for _, count in nll)
+        score = math.exp(sum(total for total, _ in nll) / max(total_tokens, 1))
+        sample_passed = [s <= threshold for s in scores]
+        passed = score <= threshold
+    else:
+        if benchmark == "accuracy":
+            max_new = max(len(em.tokenizer(" " + s["answer"])["input_ids"]) for s in samples) + 1
+        else:
+            max_new = settings.eval_max_new_tokens
+        tokens, latency, stats = generate(em, [s["prompt"] for s in samples], max_new)
+        outputs = [decode(t) for t in tokens]
+        if benchmark == "accuracy":
+            scores = [
+                float(out.strip().startswith(s["answer"])) for out, s in zip(outputs, samples)
+            ]
+        else:
+            scores = [_distinct_bigrams(t) for t in tokens]
+        score = sum(scores) / len(scores) if scores else 0.0
+        sample_passed = [s >= threshold for s in scores]
+        passed = score >= threshold
+
+    logger.info(
+        "%s on %s: %d samples in %d batches, %.1f tokens/sec%s",
+        benchmark, model["id"], len(samples), stats.batches, stats.tokens_per_sec,
+        " (int8)" if em.quantized else "",
+    )
+    return {
+        "benchmark": benchmark,
+        "score": round(score, 4),
+        "passed": passed,
+        "threshold": threshold,
+        "details": {
+            "samples_evaluated": len(samples),
+            "started_at": started,
+            "completed_at": now_iso(),
+            "seconds": round(time.perf_counter() - start, 3),
+            "backend": "local",
+            "adapter": em.adapter,
+            "quantized": em.quantized,
+            "batches": stats.batches,
+            "tokens": stats.tokens,
+            "tokens_per_sec": stats.tokens_per_sec,
+        },
+        "samples": {
+            "sample_id": [s["id"] for s in samples],
+            "output": outputs,
+            "score": scores,
+            "latency_ms": latency,
+            "passed": sample_passed,
+        },
+    }
@@ -0,0 +1,101 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import sqlite3
+from typing import Optional
+
+from core.db import get_connection
+
+MODEL_COLUMNS = "m.name, m.version, m.base_model, m.recipe, m.status"
+
+
+def record_eval(conn: sqlite3.Connection, eval_id: str):
+    """Fold a finished eval into the leaderboard; runs in the eval's transaction."""
+    # Only a newer result replaces an entry, so out-of-order completions
+    # never roll a model back.
+    conn.execute(
+        f"""INSERT INTO leaderboard
+            (model_id, benchmark, score, eval_id, suite, completed_at,
+             name, version, base_model, recipe, model_status)
+            SELECT r.model_id, r.benchmark, r.score, r.eval_id, r.suite,
+                   r.completed_at, {MODEL_COLUMNS}
+            FROM eval_results r JOIN models m ON m.id = r.model_id
+            WHERE r.eval_id = ? AND r.passed = 1
+            ON CONFLICT (model_id, benchmark) DO UPDATE SET
+                score = excluded.score, eval_id = excluded.eval_id,
+                suite = excluded.suite, completed_at = excluded.completed_at
+            WHERE excluded.completed_at >= leaderboard.completed_at""",
+        (eval_id,),
+    )
+    conn.execute(
+        f"""INSERT INTO leaderboard_overall
+            (model_id, suite, overall_score, eval_id, completed_at,
+             name, version, base_model, recipe, model_status)
+            SELECT e.model_id, e.suite, e.overall_score, e.id, e.completed_at,
+                   {MODEL_COLUMNS}
+            FROM evals e JOIN models m ON m.id = e.model_id
+            WHERE e.id = ? AND e.status = 'passed'
+            ON CONFLICT (model_id, suite) DO UPDATE SET
+                overall_score = excluded.overall_score, eval_id = excluded.eval_id,
+                completed_at = excluded.completed_at
+            WHERE excluded.completed_at >= leaderboard_overall.completed_at""",
+        (eval_id,),
+    )
+
+
+def record_model_status(conn: sqlite3.Connection, model_id: str, status: str):
+    for table in ("leaderboard", "leaderboard_overall"):
+        conn.execute(
+            f"UPDATE {table} SET model_status = ? WHERE model_id = ?", (status, model_id),
+        )
+
+
+def top(
+    benchmark: Optional[str] = None,
+    suite: Optional[str] = None,
+    base_model: Optional[str] = None,
+    recipe: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 10,
+) -> dict:
+    """Top models by one benchmark's latest passing score, or by overall score."""
+    from services.eval_service import LOWER_IS_BETTER
+
+    if benchmark:
+        table, score = "leaderboard", "score"
+        where, params = " WHERE benchmark = ?", [benchmark]
+        direction = "ASC" if benchmark in LOWER_IS_BETTER else "DESC"
+    else:
+        # Overall scores from different suites measure different things, so
+        # the board ranks one suite, one row per model.
+        table, score = "leaderboard_overall", "overall_score"
+        where, params = " WHERE 1=1", []
+        direction = "DESC"
+        suite = suite or "default"
+    for column, value in (
+        ("suite", suite), ("base_model", base_model),
+        ("recipe", recipe), ("model_status", status),
+    ):
+        if value:
+            where += f" AND {column} = ?"
+            params.append(value)
+
+    conn = get_connection()
+    try:
+        # The tables hold one row per model (and benchmark or suite), and
+        # the score indexes serve the ordering, so this reads about `limit`
+        # rows however many evals have run.
+        rows = conn.execute(
+            f"""SELECT model_id, name, version, base_model, recipe, model_status,
+                       suite, {score} AS score, eval_id, completed_at
+                FROM {table}{where} ORDER BY {score} {direction}, completed_at DESC
+                LIMIT ?""",
+            params + [limit],
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return {
+        "benchmark": benchmark or "overall",
+        "entries": [{"rank": i + 1, **dict(r)} for i, r in enumerate(rows)],
+    }
@@ -0,0 +1,118 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+DIVERGED = "diverged"
+PLATEAU = "plateau"
+
+STOP = "stop"
+FLAG = "flag"
+
+# Recipes override these under RECIPE_DEFAULTS[recipe]["early_stopping"],
+# and runs under config_overrides["early_stopping"].
+DEFAULT_POLICY = {
+    "enabled": True,
+    "ewma_alpha": 0.05,
+    "warmup_steps": 20,
+    # Diverged: the smoothed loss is this many times its best value...
+    "divergence_factor": 3.0,
+    # ...or points sit this many deviations above it this many steps running.
+    "spike_sigma": 6.0,
+    "spike_patience": 5,
+    # Plateau: no relative improvement of min_delta within patience steps.
+    "plateau_patience": 300,
+    "plateau_min_delta": 0.01,
+    "on_divergence": STOP,
+    "on_plateau": STOP,
+}
+
+
+@dataclass
+class Verdict:
+    kind: str
+    action: str
+    reason: str
+    step: int
+    ewma: Optional[float] = None
+    best: Optional[float] = None
+
+
+class LossMonitor:
+    """Constant-time per-point loss statistics for one run."""
+
+    def __init__(self, policy: Optional[dict] = None):
+        self.policy = {**DEFAULT_POLICY, **(policy or {})}
+        self.count = 0
+        self.ewma: Optional[float] = None
+        self.variance = 0.0
+        self.best = math.inf
+        self.best_step = 0
+        self.spikes = 0
+        self._reported: set[str] = set()
+
+    def update(self, step: int, loss: Optional[float]) -> Optional[Verdict]:
+        p = self.policy
+        if not p["enabled"]:
+            return None
+        if loss is None or not math.isfinite(loss):
+            return self._verdict(DIVERGED, f"loss is {loss} at step {step}", step)
+
+        if self.ewma is None:
+            self.ewma = loss
+            self.best_step = step
+        else:
+            ceiling = self.ewma + p["spike_sigma"] * math.sqrt(self.variance)
+            if self.variance > 0 and loss > ceiling:
+                self.spikes += 1
+                # One bad batch shouldn't drag the average; a run of them will.
+                loss = ceiling
+            else:
+                self.spikes = 0
+            # Exponentially weighted mean and variance (West, 1979).
+            diff = loss - self.ewma
+            incr = p["ewma_alpha"] * diff
+            self.ewma += incr
+            self.variance = (1 - p["ewma_alpha"]) * (self.variance + diff * incr)
+        self.count += 1
+        if self.count < p["warmup_steps"]:
+            return None
+
+        if self.best == math.inf or self.ewma < self.best - p["plateau_min_delta"] * abs(self.best):
+            self.best = self.ewma
+            self.best_step = step
+        if self.spikes >= p["spike_patience"]:
+            return self._verdict(
+                DIVERGED,
+                f"loss more than {p['spike_sigma']:g} deviations above its average "
+                f"for {self.spikes} steps at step {step}",
+                step,
+            )
+        if self.best > 0 and self.ewma > p["divergence_factor"] * self.best:
+            return self._verdict(
+                DIVERGED,
+                f"average loss {self.ewma:.4g} is {self.ewma / self.best:.1f}x "
+                f"its best {self.best:.4g} at step {step}",
+                step,
+            )
+        if p["plateau_patience"] and step - self.best_step >= p["plateau_patience"]:
+            return self._verdict(
+                PLATEAU,
+                f"average loss has not improved by {p['plateau_min_delta']:.1%} "
+                f"since step {self.best_step} (best {self.best:.4g})",
+                step,
+            )
+        return None
+
+    def _verdict(self, kind: str, reason: str, step: int) -> Optional[Verdict]:
+        # Flags are reported once; a stop ends the run, so it never repeats.
+        if kind in self._reported:
+            return None
+        self._reported.add(kind)
+        action = self.policy["on_divergence"] if kind == DIVERGED else self.policy["on_plateau"]
+        return Verdict(
+            kind=kind, action=action, reason=reason, step=step,
+            ewma=self.ewma, best=self.best if math.isfinite(self.best) else None,
+        )
@@ -12,6 +12,7 @@ from core.schemas import (
     ModelPromote, ModelRecord, PromotionStatus,
 )
 from core.exceptions import NotFoundError, ConflictError, EvalGateError
+from services import leaderboard_service
 
 logger = logging.getLogger(__name__)
 
@@ -145,6 +146,7 @@ def update_model_status(
             "UPDATE models SET status = ?, promoted_at = COALESCE(?, promoted_at) WHERE id = ?",
             (new_status.value, promoted_at, model_id),
         )
+        leaderboard_service.record_model_status(conn, model_id, new_status.value)
         conn.commit()
 
         row = conn.execute(
@@ -0,0 +1,71 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import random
+from typing import Optional
+
+from config import settings
+
+NODE_LOSS = "node_loss"
+OOM = "oom"
+IO = "io"
+STALL = "stall"
+
+OOM_TYPES = {"OutOfMemoryError", "MemoryError"}
+OOM_PATTERNS = ("out of memory", "cublas_status_alloc_failed", "cuda error: out of memory")
+
+IO_TYPES = {
+    "ConnectionError", "ConnectionResetError", "ConnectionAbortedError",
+    "BrokenPipeError", "TimeoutError", "ReadTimeout", "ConnectTimeout",
+    "ChunkedEncodingError", "HfHubHTTPError",
+}
+IO_PATTERNS = (
+    "connection reset", "connection refused", "timed out", "temporarily unavailable",
+    "temporary failure in name resolution", "input/output error", "stale file handle",
+    "nccl",
+)
+
+# The kernel OOM killer ends a worker with SIGKILL; so does the pool's own
+# kill(), which marks the payload "killed" so it isn't mistaken for OOM.
+OOM_EXIT_CODES = {-9, 137}
+
+
+def classify(payload: dict) -> Optional[str]:
+    """Failure class for a worker 'failed' payload, or None if retrying won't help."""
+    if payload.get("exitcode") in OOM_EXIT_CODES and not payload.get("killed"):
+        return OOM
+    error_type = payload.get("error_type") or ""
+    message = (payload.get("error") or "").lower()
+    if error_type in OOM_TYPES or any(p in message for p in OOM_PATTERNS):
+        return OOM
+    if error_type in IO_TYPES or any(p in message for p in IO_PATTERNS):
+        return IO
+    return None
+
+
+def backoff_seconds(kind: str, attempt: int) -> float:
+    # Lost nodes say nothing about the run; healthy capacity can take it now.
+    if kind == NODE_LOSS:
+        return 0.0
+    delay = min(
+        settings.retry_backoff_seconds * 2 ** attempt,
+        settings.retry_backoff_max_seconds,
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+def shrink_batch(config: dict) -> Optional[dict]:
+    """Halve the per-device batch, keeping the effective batch via accumulation."""
+    batch = config.get("batch_size") or 1
+    if batch <= 1:
+        return None
+    accum = config.get("gradient_accumulation_steps") or 1
+    effective = batch * accum
+    # Largest divisor of the effective batch at or below half, so
+    # accumulation keeps it exact.
+    smaller = next(d for d in range(batch // 2, 0, -1) if effective % d == 0)
+    return {
+        **config,
+        "batch_size": smaller,
+        "gradient_accumulation_steps": effective // smaller,
+    }
@@ -0,0 +1,231 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import os
+import sqlite3
+import struct
+import zlib
+from bisect import bisect_left
+from contextlib import closing
+from itertools import islice
+from typing import Iterator, Optional
+
+import numpy as np
+
+from config import settings
+from core.db import get_connection, serialize_json, deserialize_json
+from core.exceptions import NotFoundError, ValidationError
+
+# A sample file is a sequence of blocks, each holding up to
+# eval_sample_block_rows records of one benchmark sorted by sample id:
+#   MAGIC | header length (u32) | JSON header | one zlib payload per column
+# Blocks are only ever appended; eval_sample_blocks indexes them.
+MAGIC = b"FSB1"
+COLUMNS = ("sample_id", "output", "score", "latency_ms", "passed")
+_DTYPES = {"score": np.float64, "latency_ms": np.float64, "passed": np.uint8}
+
+
+def _path(eval_id: str) -> str:
+    return os.path.join(settings.eval_sample_dir, f"{eval_id}.samples")
+
+
+def _encode(column: str, values) -> bytes:
+    if column in _DTYPES:
+        raw = np.asarray(values, dtype=_DTYPES[column]).tobytes()
+    else:
+        raw = serialize_json(values).encode()
+    return zlib.compress(raw, settings.eval_sample_compression)
+
+
+def _decode(column: str, payload: bytes) -> list:
+    raw = zlib.decompress(payload)
+    if column in _DTYPES:
+        return np.frombuffer(raw, dtype=_DTYPES[column]).tolist()
+    return deserialize_json(raw.decode())
+
+
+def append(conn: sqlite3.Connection, eval_id: str, benchmark: str, samples: dict):
+    """Append a benchmark's per-sample records; the index rows join conn's transaction."""
+    ids = samples["sample_id"]
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    size = settings.eval_sample_block_rows
+    os.makedirs(settings.eval_sample_dir, exist_ok=True)
+
+    index = []
+    with open(_path(eval_id), "ab") as f:
+        for start in range(0, len(order), size):
+            rows = order[start:start + size]
+            payloads = [_encode(c, [samples[c][i] for i in rows]) for c in COLUMNS]
+            header = serialize_json({
+                "benchmark": benchmark,
+                "rows": len(rows),
+                "columns": [[c, len(p)] for c, p in zip(COLUMNS, payloads)],
+            }).encode()
+            offset = f.tell()
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for payload in payloads:
+                f.write(payload)
+            index.append((
+                eval_id, eval_id, benchmark, offset, f.tell() - offset, len(rows),
+                sum(1 for i in rows if not samples["passed"][i]),
+                ids[rows[0]], ids[rows[-1]],
+            ))
+        f.flush()
+    conn.executemany(
+        """INSERT INTO eval_sample_blocks
+           (eval_id, file_eval_id, benchmark, offset, length, rows, failed,
+            first_sample, last_sample)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        index,
+    )
+
+
+def link(conn: sqlite3.Connection, eval_id: str, source_eval_id: str, benchmark: str):
+    """Point an eval at another eval's blocks for a benchmark, e.g. for a cached result."""
+    conn.execute(
+        """INSERT INTO eval_sample_blocks
+           (eval_id, file_eval_id, benchmark, offset, length, rows, failed,
+            first_sample, last_sample)
+           SELECT ?, file_eval_id, benchmark, offset, length, rows, failed,
+                  first_sample, last_sample
+           FROM eval_sample_blocks WHERE eval_id = ? AND benchmark = ? ORDER BY id""",
+        (eval_id, source_eval_id, benchmark),
+    )
+
+
+class _Block:
+    """Lazily decoded columns of one block."""
+
+    def __init__(self, f, length: int):
+        data = f.read(length)
+        if data[:4] != MAGIC:
+            raise ValueError("corrupt sample block")
+        (header_len,) = struct.unpack("<I", data[4:8])
+        header = deserialize_json(data[8:8 + header_len].decode())
+        self.benchmark = header["benchmark"]
+        self._payloads = {}
+        pos = 8 + header_len
+        for column, size in header["columns"]:
+            self._payloads[column] = data[pos:pos + size]
+            pos += size
+        self._columns = {}
+
+    def __getitem__(self, column: str) -> list:
+        if column not in self._columns:
+            self._columns[column] = _decode(column, self._payloads[column])
+        return self._columns[column]
+
+    def record(self, row: int) -> dict:
+        return {
+            "benchmark": self.benchmark,
+            **{c: self[c][row] for c in COLUMNS},
+            "passed": bool(self["passed"][row]),
+        }
+
+
+def _blocks(eval_id: str, benchmark: Optional[str], failed: Optional[bool], after: int) -> list:
+    where, params = "eval_id = ? AND id >= ?", [eval_id, after]
+    if benchmark:
+        where += " AND benchmark = ?"
+        params.append(benchmark)
+    # Block failure counts let a filter skip whole blocks unread.
+    if failed is True:
+        where += " AND failed > 0"
+    elif failed is False:
+        where += " AND failed < rows"
+
+    conn = get_connection()
+    try:
+        if not conn.execute("SELECT 1 FROM evals WHERE id = ?", (eval_id,)).fetchone():
+            raise NotFoundError("Eval", eval_id)
+        return conn.execute(
+            f"""SELECT id, file_eval_id, offset, length FROM eval_sample_blocks
+                WHERE {where} ORDER BY id""",
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _parse_cursor(cursor: Optional[str]) -> tuple[int, int]:
+    if not cursor:
+        return 0, 0
+    try:
+        block, row = cursor.split(":")
+        return int(block), int(row)
+    except ValueError:
+        raise ValidationError(f"Invalid cursor '{cursor}'")
+
+
+def iter_samples(
+    eval_id: str,
+    benchmark: Optional[str] = None,
+    failed: Optional[bool] = None,
+    cursor: Optional[str] = None,
+) -> Iterator[tuple[str, dict]]:
+    """(cursor, record) pairs in file order, decoding one block at a time."""
+    start_block, start_row = _parse_cursor(cursor)
+    blocks = _blocks(eval_id, benchmark, failed, start_block)
+    return _iter_blocks(blocks, failed, start_block, start_row)
+
+
+def _iter_blocks(blocks, failed, start_block: int, start_row: int):
+    files = {}
+    try:
+        for b in blocks:
+            f = files.get(b["file_eval_id"])
+            if f is None:
+                f = files[b["file_eval_id"]] = open(_path(b["file_eval_id"]), "rb")
+            f.seek(b["offset"])
+            block = _Block(f, b["length"])
+            first = start_row if b["id"] == start_block else 0
+            passed = block["passed"]
+            for row in range(first, len(passed)):
+                if failed is None or failed == (not passed[row]):
+                    yield f"{b['id']}:{row}", block.record(row)
+    finally:
+        for f in files.values():
+            f.close()
+
+
+def page(
+    eval_id: str,
+    benchmark: Optional[str] = None,
+    failed: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> dict:
+    with closing(iter_samples(eval_id, benchmark, failed, cursor)) as samples:
+        rows = list(islice(samples, limit + 1))
+    return {
+        "items": [record for _, record in rows[:limit]],
+        "next_cursor": rows[limit][0] if len(rows) > limit else None,
+    }
+
+
+def get_sample(eval_id: str, sample_id: str, benchmark: Optional[str] = None) -> dict:
+    where, params = "eval_id = ? AND first_sample <= ? AND last_sample >= ?", [
+        eval_id, sample_id, sample_id,
+    ]
+    if benchmark:
+        where += " AND benchmark = ?"
+        params.append(benchmark)
+    conn = get_connection()
+    try:
+        blocks = conn.execute(
+            f"""SELECT file_eval_id, offset, length FROM eval_sample_blocks
+                WHERE {where} ORDER BY id""",
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+
+    for b in blocks:
+        with open(_path(b["file_eval_id"]), "rb") as f:
+            f.seek(b["offset"])
+            block = _Block(f, b["length"])
+        ids = block["sample_id"]
+        row = bisect_left(ids, sample_id)
+        if row < len(ids) and ids[row] == sample_id:
+            return block.record(row)
+    raise NotFoundError("Sample", sample_id)
@@ -0,0 +1,242 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedRun:
+    run_id: str
+    tenant_id: str
+    priority: int
+    num_gpus: int
+    enqueued_at: float = field(default_factory=time.time)
+    gpu_type: Optional[str] = None
+    min_memory_gb: Optional[float] = None
+    not_before: float = 0.0
+
+
+@dataclass
+class RunningSlot:
+    run_id: str
+    tenant_id: str
+    priority: int
+    num_gpus: int
+    admitted_at: float
+
+
+class Scheduler:
+    """Priority queue of pending runs with aging and per-tenant fair share."""
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        aging_per_minute: float = 1.0,
+        fair_share_weight: float = 2.0,
+        starvation_seconds: float = 600.0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.aging_per_minute = aging_per_minute
+        self.fair_share_weight = fair_share_weight
+        self.starvation_seconds = starvation_seconds
+        self._pending: dict[str, QueuedRun] = {}
+        self._running: dict[str, RunningSlot] = {}
+        self._lock = threading.RLock()
+        self._waits: deque[float] = deque(maxlen=1000)
+        self._admitted = 0
+        self._started_at = time.time()
+        self._busy_slot_seconds = 0.0
+        self._last_change = self._started_at
+        self._preempting: set[str] = set()
+        self._preemptions = 0
+
+    def _account(self, now: float):
+        self._busy_slot_seconds += len(self._running) * (now - self._last_change)
+        self._last_change = now
+
+    def enqueue(self, item: QueuedRun):
+        with self._lock:
+            self._pending[item.run_id] = item
+
+    def remove(self, run_id: str) -> bool:
+        with self._lock:
+            return self._pending.pop(run_id, None) is not None
+
+    def release(self, run_id: str) -> bool:
+        with self._lock:
+            if run_id not in self._running:
+                return False
+            self._account(time.time())
+            del self._running[run_id]
+            self._preempting.discard(run_id)
+            return True
+
+    def is_pending(self, run_id: str) -> bool:
+        with self._lock:
+            return run_id in self._pending
+
+    def pending_ids(self) -> set[str]:
+        with self._lock:
+            return set(self._pending)
+
+    def _tenant_gpus(self) -> dict[str, int]:
+        usage: dict[str, int] = {}
+        for slot in self._running.values():
+            usage[slot.tenant_id] = usage.get(slot.tenant_id, 0) + slot.num_gpus
+        return usage
+
+    def _score(self, item: QueuedRun, now: float, usage: dict[str, int], in_use: int) -> float:
+        waited_min = max(0.0, now - item.enqueued_at) / 60.0
+        share = usage.get(item.tenant_id, 0) / in_use if in_use else 0.0
+        return item.priority + self.aging_per_minute * waited_min - self.fair_share_weight * share
+
+    def ordered(self, now: float | None = None) -> list[QueuedRun]:
+        now = now or time.time()
+        with self._lock:
+            usage = self._tenant_gpus()
+            in_use = sum(usage.values())
+            return sorted(
+                self._pending.values(),
+                key=lambda q: (-self._score(q, now, usage, in_use), q.enqueued_at),
+            )
+
+    def _select_victims(
+        self,
+        head: QueuedRun,
+        fits_after: Callable[[QueuedRun, list[str]], bool],
+    ) -> list[RunningSlot]:
+        candidates = sorted(
+            (
+                s for s in self._running.values()
+                if s.priority < head.priority and s.run_id not in self._preempting
+            ),
+            # Lowest priority first; among equals, the run with the least
+            # progress to checkpoint.
+            key=lambda s: (s.priority, -s.admitted_at),
+        )
+        if fits_after(head, []):
+            # The GPUs are already there, so only a full set of slots keeps
+            # the head out, and any single victim frees one.
+            if len(self._running) >= self.max_concurrent:
+                return candidates[:1]
+            return []
+
+        # Releasing at least one run also frees a slot, so from here GPU fit
+        # is the only thing left to satisfy.
+        chosen: list[RunningSlot] = []
+        for slot in candidates:
+            chosen.append(slot)
+            if fits_after(head, [c.run_id for c in chosen]):
+                break
+        else:
+            return []
+
+        for slot in list(chosen[:-1]):
+            rest = [c.run_id for c in chosen if c is not slot]
+            if fits_after(head, rest):
+                chosen.remove(slot)
+        return chosen
+
+    def schedule(
+        self,
+        try_admit: Callable[[QueuedRun], bool],
+        preempt: Optional[Callable[[RunningSlot, QueuedRun], None]] = None,
+        fits_after: Optional[Callable[[QueuedRun, list[str]], bool]] = None,
+    ) -> list[str]:
+        admitted = []
+        with self._lock:
+            while self._pending and len(self._running) < self.max_concurrent:
+                now = time.time()
+                placed = None
+                for item in self.ordered(now):
+                    if item.not_before > now:
+                        continue
+                    if try_admit(item):
+                        placed = item
+                        break
+                    # Stop backfilling smaller runs past a starved head so it
+                    # can collect the capacity it needs.
+                    if now - item.enqueued_at >= self.starvation_seconds:
+                        break
+                if placed is None:
+                    break
+
+                self._account(now)
+                del self._pending[placed.run_id]
+                self._running[placed.run_id] = RunningSlot(
+                    run_id=placed.run_id,
+                    tenant_id=placed.tenant_id,
+                    priority=placed.priority,
+                    num_gpus=placed.num_gpus,
+                    admitted_at=now,
+                )
+                self._waits.append(now - placed.enqueued_at)
+                self._admitted += 1
+                admitted.append(placed.run_id)
+
+            # One preemption round at a time; the head is admitted on the
+            # pass that follows the victims' release.
+            if preempt and fits_after and self._pending and not self._preempting:
+                # A run backing off can't take the capacity it would free.
+                now = time.time()
+                eligible = [q for q in self.ordered(now) if q.not_before <= now]
+                if not eligible:
+                    return admitted
+                head = eligible[0]
+                for victim in self._select_victims(head, fits_after):
+                    self._preempting.add(victim.run_id)
+                    self._preemptions += 1
+                    preempt(victim, head)
+        return admitted
+
+    def metrics(self) -> dict:
+        with self._lock:
+            now = time.time()
+            self._account(now)
+            elapsed = max(now - self._started_at, 1e-9)
+            waits = sorted(self._waits)
+
+            def pct(p: float) -> float:
+                if not waits:
+                    return 0.0
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3)
+
+            tenants: dict[str, dict] = {}
+            for item in self._pending.values():
+                tenants.setdefault(item.tenant_id, {"pending": 0, "running": 0, "gpus": 0})
+                tenants[item.tenant_id]["pending"] += 1
+            for slot in self._running.values():
+                tenants.setdefault(slot.tenant_id, {"pending": 0, "running": 0, "gpus": 0})
+                tenants[slot.tenant_id]["running"] += 1
+                tenants[slot.tenant_id]["gpus"] += slot.num_gpus
+
+            oldest = min((q.enqueued_at for q in self._pending.values()), default=now)
+            return {
+                "queue_depth": len(self._pending),
+                "backing_off": sum(1 for q in self._pending.values() if q.not_before > now),
+                "running": len(self._running),
+                "max_concurrent": self.max_concurrent,
+                "slot_utilization": round(len(self._running) / self.max_concurrent, 3)
+                if self.max_concurrent else 0.0,
+                "avg_slot_utilization": round(
+                    self._busy_slot_seconds / (elapsed * self.max_concurrent), 3,
+                ) if self.max_concurrent else 0.0,
+                "admitted_total": self._admitted,
+                "preemptions_total": self._preemptions,
+                "preempting": sorted(self._preempting),
+                "wait_seconds": {
+                    "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p50": pct(0.50),
+                    "p95": pct(0.95),
+                    "max": round(waits[-1], 3) if waits else 0.0,
+                    "oldest_pending": round(now - oldest, 3),
+                },
+                "tenants": tenants,
+            }
@@ -0,0 +1,436 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+import itertools
+import math
+import random
+import uuid
+import logging
+from typing import Optional
+
+from core.db import get_connection, now_iso, serialize_json, row_to_dict
+from core.schemas import (
+    SweepCreate, SweepRecord, SweepTrial, SweepStrategy, SweepStatus,
+    TrialStatus, RunLaunch, RunStatus,
+)
+from core.exceptions import ForgeError, NotFoundError, ValidationError
+from services import training_service
+from config import settings, RECIPE_DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+# Trailing metric points averaged into a trial's loss at a rung.
+LOSS_WINDOW = 10
+
+TRIAL_STATUS_FOR_RUN = {
+    RunStatus.COMPLETED.value: TrialStatus.COMPLETED.value,
+    RunStatus.FAILED.value: TrialStatus.FAILED.value,
+    RunStatus.CANCELLED.value: TrialStatus.CANCELLED.value,
+}
+
+
+def _values(key: str, spec) -> list:
+    if isinstance(spec, list):
+        values = spec
+    elif isinstance(spec, dict) and "values" in spec:
+        values = spec["values"]
+    else:
+        raise ValidationError(f"Grid search needs a list of values for '{key}'")
+    if not values:
+        raise ValidationError(f"No values given for '{key}'")
+    return values
+
+
+def _sample(key: str, spec, rng: random.Random):
+    if isinstance(spec, list) or (isinstance(spec, dict) and "values" in spec):
+        return rng.choice(_values(key, spec))
+    if not isinstance(spec, dict) or "min" not in spec or "max" not in spec:
+        raise ValidationError(
+            f"'{key}' needs a list of values or a {{min, max}} range"
+        )
+    low, high = spec["min"], spec["max"]
+    if low > high:
+        raise ValidationError(f"'{key}' has min greater than max")
+    if spec.get("log"):
+        if low <= 0:
+            raise ValidationError(f"'{key}' needs a positive min for a log range")
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    if isinstance(low, int) and isinstance(high, int):
+        return rng.randint(low, high)
+    return rng.uniform(low, high)
+
+
+def expand_search_space(
+    recipe: str,
+    strategy: SweepStrategy,
+    space: dict,
+    num_trials: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> list[dict]:
+    defaults = RECIPE_DEFAULTS.get(recipe, {})
+    tunable = sorted(k for k, v in defaults.items() if not isinstance(v, dict))
+    unknown = sorted(set(space) - set(tunable))
+    if not space:
+        raise ValidationError("Search space is empty")
+    if unknown:
+        raise ValidationError(
+            f"Not tunable for {recipe}: {', '.join(unknown)} "
+            f"(expected one of {', '.join(tunable)})"
+        )
+
+    keys = sorted(space)
+    if strategy == SweepStrategy.GRID:
+        grid = [_values(k, space[k]) for k in keys]
+        size = math.prod(len(v) for v in grid)
+        if size > settings.sweep_max_trials:
+            raise ValidationError(
+                f"Grid has {size} trials; the limit is {settings.sweep_max_trials}"
+            )
+        trials = [dict(zip(keys, combo)) for combo in itertools.product(*grid)]
+        return trials[:num_trials] if num_trials else trials
+
+    if not num_trials or num_trials < 1:
+        raise ValidationError("Random search needs num_trials")
+    if num_trials > settings.sweep_max_trials:
+        raise ValidationError(
+            f"{num_trials} trials requested; the limit is {settings.sweep_max_trials}"
+        )
+    rng = random.Random(seed)
+    return [{k: _sample(k, space[k], rng) for k in keys} for _ in range(num_trials)]
+
+
+def create_sweep(payload: SweepCreate, tenant_id: str = "default") -> SweepRecord:
+    if payload.max_concurrent_trials < 1:
+        raise ValidationError("max_concurrent_trials must be at least 1")
+    if payload.min_steps < 1 or payload.reduction_factor < 2:
+        raise ValidationError("min_steps must be at least 1 and reduction_factor at least 2")
+    trials = expand_search_space(
+        payload.recipe.value, payload.strategy, payload.search_space,
+        num_trials=payload.num_trials, seed=payload.seed,
+    )
+
+    sweep_id = str(uuid.uuid4())[:12]
+    conn = get_connection()
+    try:
+        ds = conn.execute(
+            "SELECT id FROM datasets WHERE id = ?", (payload.dataset_id,)
+        ).fetchone()
+        if not ds:
+            raise NotFoundError("Dataset", payload.dataset_id)
+
+        conn.execute(
+            """INSERT INTO sweeps
+               (id, name, base_model, dataset_id, recipe, strategy, search_space,
+                config, num_gpus, priority, max_concurrent_trials, min_steps,
+                reduction_factor, status, tenant_id, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                sweep_id, payload.name, payload.base_model, payload.dataset_id,
+                payload.recipe.value, payload.strategy.value,
+                serialize_json(payload.search_space),
+                serialize_json(payload.config_overrides), payload.num_gpus,
+                payload.priority, payload.max_concurrent_trials, payload.min_steps,
+                payload.reduction_factor, SweepStatus.RUNNING.value, tenant_id, now_iso(),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO sweep_trials (sweep_id, trial_index, params) VALUES (?, ?, ?)",
+            [(sweep_id, i, serialize_json(params)) for i, params in enumerate(trials)],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info("Sweep %s created with %d trials", sweep_id, len(trials))
+    _launch_pending(sweep_id)
+    return get_sweep(sweep_id)
+
+
+def _launch_pending(sweep_id: str):
+    conn = get_connection()
+    try:
+        # Claim free trial slots under the write lock, so two API processes
+        # finishing trials at once don't overshoot max_concurrent_trials.
+        conn.execute("BEGIN IMMEDIATE")
+        sweep = conn.execute("SELECT * FROM sweeps WHERE id = ?", (sweep_id,)).fetchone()
+        if sweep is None or sweep["status"] != SweepStatus.RUNNING.value:
+            conn.rollback()
+            return
+        running = conn.execute(
+            "SELECT COUNT(*) FROM sweep_trials WHERE sweep_id = ? AND status = ?",
+            (sweep_id, TrialStatus.RUNNING.value),
+        ).fetchone()[0]
+        claimed = conn.execute(
+            """SELECT * FROM sweep_trials WHERE sweep_id = ? AND status = ?
+               ORDER BY trial_index LIMIT ?""",
+            (sweep_id, TrialStatus.PENDING.value,
+             max(0, sweep["max_concurrent_trials"] - running)),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE sweep_trials SET status = ? WHERE id = ?",
+            [(TrialStatus.RUNNING.value, t["id"]) for t in claimed],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    sweep = row_to_dict(sweep)
+    for trial in claimed:
+        trial = row_to_dict(trial)
+        try:
+            run = training_service.launch_run(RunLaunch(
+                name=f"{sweep['name']}-trial-{trial['trial_index']}",
+                base_model=sweep["base_model"],
+                dataset_id=sweep["dataset_id"],
+                recipe=sweep["recipe"],
+                config_overrides={**sweep["config"], **trial["params"]},
+                num_gpus=sweep["num_gpus"],
+                priority=sweep["priority"],
+                tags=[f"sweep:{sweep_id}"],
+            ), tenant_id=sweep["tenant_id"])
+            _update_trial(trial["id"], run_id=run.id)
+        except ForgeError as e:
+            logger.warning(
+                "Sweep %s trial %d could not launch: %s",
+                sweep_id, trial["trial_index"], e.message,
+            )
+            _update_trial(trial["id"], status=TrialStatus.FAILED.value, error_message=e.message)
+    if claimed:
+        _maybe_complete(sweep_id)
+
+
+def _update_trial(trial_id: int, **fields):
+    conn = get_connection()
+    try:
+        conn.execute(
+            f"UPDATE sweep_trials SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+            (*fields.values(), trial_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _recent_loss(conn, run_id: str, up_to_step: int) -> Optional[float]:
+    row = conn.execute(
+        """SELECT AVG(loss) FROM (
+               SELECT loss FROM run_metrics WHERE run_id = ? AND step <= ?
+               ORDER BY step DESC LIMIT ?
+           )""",
+        (run_id, up_to_step, LOSS_WINDOW),
+    ).fetchone()
+    return row[0]
+
+
+def _cutoff(losses: list[float], eta: int) -> float:
+    # Loss at the 1/eta quantile of the rung: trials above it are pruned,
+    # which is ASHA's "promote the top 1/eta" without synchronous rounds.
+    ordered = sorted(losses)
+    pos = (len(ordered) - 1) / eta
+    lower = math.floor(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def _on_metrics(run_id: str, metrics: list[dict]):
+    if not metrics:
+        return
+    step = metrics[-1]["step"]
+    conn = get_connection()
+    try:
+        trial = conn.execute(
+            """SELECT t.*, s.min_steps, s.reduction_factor FROM sweep_trials t
+               JOIN sweeps s ON s.id = t.sweep_id
+               WHERE t.run_id = ? AND t.status = ? AND s.status = ?""",
+            (run_id, TrialStatus.RUNNING.value, SweepStatus.RUNNING.value),
+        ).fetchone()
+        if trial is None:
+            return
+        eta = trial["reduction_factor"]
+        milestone = trial["min_steps"] * eta ** trial["rung"]
+        if step < milestone:
+            return
+        loss = _recent_loss(conn, run_id, milestone)
+        if loss is None:
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            """INSERT OR REPLACE INTO sweep_rungs (sweep_id, rung, trial_index, loss)
+               VALUES (?, ?, ?, ?)""",
+            (trial["sweep_id"], trial["rung"], trial["trial_index"], loss),
+        )
+        losses = [r[0] for r in conn.execute(
+            "SELECT loss FROM sweep_rungs WHERE sweep_id = ? AND rung = ?",
+            (trial["sweep_id"], trial["rung"]),
+        )]
+        cutoff = _cutoff(losses, eta)
+        pruned = loss > cutoff
+        conn.execute(
+            "UPDATE sweep_trials SET status = ?, rung = ?, step = ?, loss = ? WHERE id = ?",
+            (
+                TrialStatus.PRUNED.value if pruned else TrialStatus.RUNNING.value,
+                trial["rung"] if pruned else trial["rung"] + 1,
+                milestone, loss, trial["id"],
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    if pruned:
+        reason = (
+            f"pruned by sweep {trial['sweep_id']} at step {milestone}: "
+            f"loss {loss:.4f} above rung cutoff {cutoff:.4f}"
+        )
+        logger.info("Sweep %s trial %d %s", trial["sweep_id"], trial["trial_index"], reason)
+        try:
+            training_service.cancel_run(run_id, reason=reason)
+        except ValidationError:
+            pass
+
+
+def _on_finish(run_id: str, status: str):
+    conn = get_connection()
+    try:
+        trial = conn.execute(
+            "SELECT * FROM sweep_trials WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if trial is None:
+            return
+        if trial["status"] == TrialStatus.RUNNING.value:
+            fields = {"status": TRIAL_STATUS_FOR_RUN.get(status, TrialStatus.FAILED.value)}
+            if status == RunStatus.COMPLETED.value:
+                last = conn.execute(
+                    "SELECT MAX(step) FROM run_metrics WHERE run_id = ?", (run_id,)
+                ).fetchone()[0]
+                if last is not None:
+                    fields["step"] = last
+                    fields["loss"] = _recent_loss(conn, run_id, last)
+            elif status == RunStatus.FAILED.value:
+                error = conn.execute(
+                    "SELECT error_message FROM runs WHERE id = ?", (run_id,)
+                ).fetchone()
+                fields["error_message"] = error[0] if error else None
+            conn.execute(
+                f"UPDATE sweep_trials SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                (*fields.values(), trial["id"]),
+            )
+            conn.commit()
+    finally:
+        conn.close()
+
+    # The finished trial's GPUs go to the next trial in the sweep.
+    _launch_pending(trial["sweep_id"])
+    _maybe_complete(trial["sweep_id"])
+
+
+training_service.on_metrics(_on_metrics)
+training_service.on_finish(_on_finish)
+
+
+def _maybe_complete(sweep_id: str):
+    conn = get_connection()
+    try:
+        open_trials = conn.execute(
+            "SELECT COUNT(*) FROM sweep_trials WHERE sweep_id = ? AND status IN (?, ?)",
+            (sweep_id, TrialStatus.PENDING.value, TrialStatus.RUNNING.value),
+        ).fetchone()[0]
+        if open_trials:
+            return
+        best = conn.execute(
+            """SELECT run_id FROM sweep_trials
+               WHERE sweep_id = ? AND status = ? AND loss IS NOT NULL
+               ORDER BY loss LIMIT 1""",
+            (sweep_id, TrialStatus.COMPLETED.value),
+        ).fetchone()
+        cur = conn.execute(
+            """UPDATE sweeps SET status = ?, best_run_id = ?, completed_at = ?
+               WHERE id = ? AND status = ?""",
+            (
+                SweepStatus.COMPLETED.value, best[0] if best else None, now_iso(),
+                sweep_id, SweepStatus.RUNNING.value,
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    if cur.rowcount:
+        logger.info("Sweep %s completed; best run %s", sweep_id, best[0] if best else None)
+
+
+def get_sweep(sweep_id: str) -> SweepRecord:
+    conn = get_connection()
+    try:
+        row = conn.execute("SELECT * FROM sweeps WHERE id = ?", (sweep_id,)).fetchone()
+        if not row:
+            raise NotFoundError("Sweep", sweep_id)
+
+        record = SweepRecord(**row_to_dict(row))
+        trial_rows = conn.execute(
+            "SELECT * FROM sweep_trials WHERE sweep_id = ? ORDER BY trial_index",
+            (sweep_id,),
+        ).fetchall()
+        record.trials = [SweepTrial(**row_to_dict(t)) for t in trial_rows]
+        return record
+    finally:
+        conn.close()
+
+
+def list_sweeps(
+    status: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> tuple[list[SweepRecord], int]:
+    conn = get_connection()
+    try:
+        query = "SELECT * FROM sweeps WHERE 1=1"
+        count_query = "SELECT COUNT(*) FROM sweeps WHERE 1=1"
+        params = []
+
+        if status:
+            query += " AND status = ?"
+            count_query += " AND status = ?"
+            params.append(status)
+
+        total = conn.execute(count_query, params).fetchone()[0]
+        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        rows = conn.execute(query, params).fetchall()
+        return [SweepRecord(**row_to_dict(r)) for r in rows], total
+    finally:
+        conn.close()
+
+
+def cancel_sweep(sweep_id: str) -> SweepRecord:
+    conn = get_connection()
+    try:
+        row = conn.execute("SELECT status FROM sweeps WHERE id = ?", (sweep_id,)).fetchone()
+        if not row:
+            raise NotFoundError("Sweep", sweep_id)
+        if row["status"] != SweepStatus.RUNNING.value:
+            raise ValidationError(f"Sweep '{sweep_id}' is already {row['status']}")
+
+        conn.execute(
+            "UPDATE sweeps SET status = ?, completed_at = ? WHERE id = ?",
+            (SweepStatus.CANCELLED.value, now_iso(), sweep_id),
+        )
+        conn.execute(
+            "UPDATE sweep_trials SET status = ? WHERE sweep_id = ? AND status = ?",
+            (TrialStatus.CANCELLED.value, sweep_id, TrialStatus.PENDING.value),
+        )
+        running = [r[0] for r in conn.execute(
+            "SELECT run_id FROM sweep_trials WHERE sweep_id = ? AND status = ? AND run_id IS NOT NULL",
+            (sweep_id, TrialStatus.RUNNING.value),
+        )]
+        conn.commit()
+    finally:
+        conn.close()
+
+    for run_id in running:
+        try:
+            training_service.cancel_run(run_id, reason=f"sweep {sweep_id} cancelled")
+        except ValidationError:
+            pass
+    return get_sweep(sweep_id)
@@ -1,23 +1,73 @@
 # Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
 # https://www.linkedin.com/in/ahmadghazinazer
 
+import math
+import os
+import socket
+import sqlite3
 import uuid
 import threading
 import time
 import logging
-from typing import Optional
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Optional
 
-from core.db import get_connection, now_iso, serialize_json, row_to_dict
+from core.db import (
+    get_connection, now_iso, serialize_json, deserialize_json, row_to_dict,
+)
 from core.schemas import (
-    RunLaunch, RunRecord, RunMetrics, RunStatus, RecipeType,
+    RunLaunch, RunRecord, RunMetrics, RunStatus, RecipeType, CheckpointRecord,
+    RunEvent, ReusePolicy, RunEstimate,
 )
-from core.exceptions import NotFoundError, RunFailedError
+from core.exceptions import NotFoundError, RunFailedError, ValidationError
+from services import cluster_service, estimator, fingerprint, retry
+from services.loss_monitor import LossMonitor, Verdict, DIVERGED, PLATEAU, STOP
+from services.executor import JobControl, WorkerPool
+from services.scheduler import Scheduler, QueuedRun, RunningSlot
+from recipes import memory
 from config import settings, RECIPE_DEFAULTS
 
 logger = logging.getLogger(__name__)
 
+TRAINING_TARGET = "services.training_service:execute_training"
+# Identifies this API process in active_runs; the suffix keeps a reused pid
+# from inheriting a dead process's runs.
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
 _active_runs: dict[str, dict] = {}
 _lock = threading.Lock()
+_pool: Optional[WorkerPool] = None
+_ticker: Optional[threading.Thread] = None
+_stop = threading.Event()
+# run_id -> time its node last heartbeat, until the run is running again
+_recovering: dict[str, float] = {}
+_recovery_times: deque[float] = deque(maxlen=500)
+# run_id -> time a cancel was signalled, until the worker stops
+_cancelling: dict[str, float] = {}
+_cancel_stop_times: deque[float] = deque(maxlen=500)
+_forced_stops = 0
+# run_id -> reason, for workers the watchdog killed for making no progress
+_stalled: dict[str, str] = {}
+_monitors: dict[str, LossMonitor] = {}
+# run_id -> (verdict, estimated GPU-seconds saved), until the worker stops
+_early_stops: dict[str, tuple[Verdict, float]] = {}
+
+TERMINAL_STATUSES = (
+    RunStatus.COMPLETED.value, RunStatus.FAILED.value, RunStatus.CANCELLED.value,
+)
+
+MetricsListener = Callable[[str, list[dict]], None]
+FinishListener = Callable[[str, str], None]
+_metrics_listeners: list[MetricsListener] = []
+_finish_listeners: list[FinishListener] = []
+
+_scheduler = Scheduler(
+    max_concurrent=settings.max_concurrent_runs,
+    aging_per_minute=settings.scheduler_aging_per_minute,
+    fair_share_weight=settings.scheduler_fair_share_weight,
+    starvation_seconds=settings.scheduler_starvation_seconds,
+)
 
 
 def _build_config(recipe: RecipeType, overrides: dict) -> dict:
@@ -26,108 +76,1209 @@ def _build_config(recipe: RecipeType, overrides: dict) -> dict:
     return base
 
 
-def _simulate_training(run_id: str, config: dict):
+def execute_training(job: dict, emit, control: JobControl) -> dict:
     import math
     import random
+    from recipes.checkpoint_manager import CheckpointManager, load_checkpoint
 
+    run_id = job["run_id"]
+    config = job["config"]
     total_steps = config.get("num_epochs", 1) * 100
     initial_loss = 3.5 + random.uniform(-0.5, 0.5)
     lr = config.get("learning_rate", 2e-4)
+    # The simulated job only scales throughput by the allocation; a real
+    # recipe path would hand it to recipes.distributed.train.
+    world_size = sum(len(g) for g in job.get("allocation", {}).values()) or 1
+    start_step = 1
+
+    checkpoint_every = settings.checkpoint_interval_steps
+    checkpoints = CheckpointManager(run_id, on_saved=lambda info: emit("checkpoint", info))
+    resume = job.get("resume")
+    if resume:
+        state = load_checkpoint(resume["checkpoint"])["state.json"]
+        initial_loss = state["initial_loss"]
+        start_step = state["step"] + 1
+
+    emit("status", {"status": RunStatus.RUNNING.value, "resumed_from": start_step - 1})
+
+    batch = []
+    step = start_step - 1
+    for step in range(start_step, total_steps + 1):
+        if control.is_set():
+            step -= 1
+            break
+
+        progress = step / total_steps
+        decay = math.exp(-3.0 * progress)
+        noise = random.gauss(0, 0.02)
+        loss = initial_loss * decay + 0.3 + noise
+        loss = max(0.1, loss)
+
+        current_lr = lr * (1.0 - progress * 0.9)
+        mem = 4000 + random.uniform(-200, 200)
+        # Reported by rank 0 as the sum over data-parallel ranks.
+        throughput = (12.0 + random.uniform(-2, 2)) * world_size
+
+        batch.append({
+            "step": step,
+            "loss": round(loss, 4),
+            "learning_rate": current_lr,
+            "epoch": round(progress * config.get("num_epochs", 1), 2),
+            "gpu_memory_mb": round(mem, 1),
+            "throughput_samples_sec": round(throughput, 1),
+            "timestamp": now_iso(),
+        })
+        if step % 10 == 0:
+            emit("metrics", {"metrics": batch})
+            batch = []
+        if checkpoint_every and step % checkpoint_every == 0:
+            if batch:
+                emit("metrics", {"metrics": batch})
+                batch = []
+            checkpoints.save(step, {
+                "state.json": {"step": step, "initial_loss": initial_loss},
+            }, loss=round(loss, 4))
+
+        time.sleep(0.02)
+
+    if batch:
+        emit("metrics", {"metrics": batch})
+
+    if control.is_set() and control.action == "preempt":
+        checkpoints.save(step, {
+            "state.json": {"step": step, "initial_loss": initial_loss},
+        })
+    checkpoints.close()
+
+    if control.is_set():
+        result = {"status": "stopped", "action": control.action, "reason": control.reason}
+        latest = checkpoints.latest()
+        if control.action == "preempt" and latest is not None:
+            result["checkpoint"] = latest.path
+            result["step"] = latest.step
+        return result
+    return {"status": RunStatus.COMPLETED.value, "checkpoints": checkpoints.stats()}
+
+
+def record_metrics(run_id: str, metrics: list[dict]):
+    conn = get_connection()
+    try:
+        conn.executemany(
+            """INSERT INTO run_metrics
+               (run_id, step, loss, learning_rate, epoch,
+                gpu_memory_mb, throughput_samples_sec, timestamp)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (
+                    run_id, m["step"], m["loss"], m["learning_rate"], m["epoch"],
+                    m.get("gpu_memory_mb"), m.get("throughput_samples_sec"),
+                    m.get("timestamp") or now_iso(),
+                )
+                for m in metrics
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def on_metrics(callback: MetricsListener):
+    _metrics_listeners.append(callback)
+
+
+def on_finish(callback: FinishListener):
+    """Called with (run_id, status) once a run reaches a terminal status."""
+    _finish_listeners.append(callback)
+
+
+def _notify(listeners: list, run_id: str, arg):
+    for callback in listeners:
+        try:
+            callback(run_id, arg)
+        except Exception:
+            logger.exception("Run listener failed for %s", run_id)
+
+
+def _record_event(run_id: str, kind: str, message: str, **details):
+    conn = get_connection()
+    try:
+        conn.execute(
+            """INSERT INTO run_events (run_id, kind, message, details, created_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (run_id, kind, message, serialize_json(details), now_iso()),
+        )
+        conn.commit()
+    finally:
+        conn.close()
 
+
+def _set_status(run_id: str, status: RunStatus, **fields):
+    assignments = ["status = ?"] + [f"{k} = ?" for k in fields]
     conn = get_connection()
     try:
         conn.execute(
-            "UPDATE runs SET status = ?, started_at = ? WHERE id = ?",
-            (RunStatus.RUNNING.value, now_iso(), run_id),
+            f"UPDATE runs SET {', '.join(assignments)} WHERE id = ?",
+            (status.value, *fields.values(), run_id),
         )
         conn.commit()
+    finally:
+        conn.close()
+
+
+def _job_for(run: dict) -> dict:
+    job = {
+        "target": TRAINING_TARGET,
+        "run_id": run["id"],
+        "recipe": run["recipe"],
+        "base_model": run["base_model"],
+        "num_gpus": run["num_gpus"],
+        "config": run["config"],
+        # Node id -> GPU indices; recipes.distributed starts one rank per GPU.
+        "allocation": cluster_service.get_allocation(run["id"]),
+    }
+    if run.get("checkpoint_path"):
+        job["resume"] = {
+            "checkpoint": run["checkpoint_path"],
+            "step": run.get("resume_step") or 0,
+        }
+    return job
+
 
-        for step in range(1, total_steps + 1):
-            progress = step / total_steps
-            decay = math.exp(-3.0 * progress)
-            noise = random.gauss(0, 0.02)
-            loss = initial_loss * decay + 0.3 + noise
-            loss = max(0.1, loss)
+def _seconds_since(iso: Optional[str]) -> float:
+    if not iso:
+        return 0.0
+    return max(0.0, time.time() - datetime.fromisoformat(iso).timestamp())
 
-            current_lr = lr * (1.0 - progress * 0.9)
-            mem = 4000 + random.uniform(-200, 200)
-            throughput = 12.0 + random.uniform(-2, 2)
 
+def _claimed_runs() -> int:
+    conn = get_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM active_runs").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _try_admit(item: QueuedRun) -> bool:
+    # max_concurrent_runs is global across API processes, so count claims
+    # in the database rather than this process's running slots.
+    if _claimed_runs() >= settings.max_concurrent_runs:
+        return False
+
+    nodes = cluster_service.allocate_gpus(
+        item.run_id, item.num_gpus,
+        gpu_type=item.gpu_type, min_memory_gb=item.min_memory_gb,
+    )
+    if not nodes:
+        return False
+
+    claimed = gone = False
+    conn = get_connection()
+    try:
+        # The slot count, the pending check and the ownership row commit
+        # together under the write lock, or not at all.
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM runs WHERE id = ?", (item.run_id,)
+        ).fetchone()
+        active = conn.execute("SELECT COUNT(*) FROM active_runs").fetchone()[0]
+        if row is None or row["status"] != RunStatus.PENDING.value:
+            gone = True
+        elif active < settings.max_concurrent_runs:
             conn.execute(
-                """INSERT INTO run_metrics
-                   (run_id, step, loss, learning_rate, epoch,
-                    gpu_memory_mb, throughput_samples_sec, timestamp)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                """UPDATE runs SET status = ?,
+                   preempted_seconds = preempted_seconds + ?, preempted_at = NULL
+                   WHERE id = ?""",
                 (
-                    run_id, step, round(loss, 4), current_lr,
-                    round(progress * config.get("num_epochs", 1), 2),
-                    round(mem, 1), round(throughput, 1), now_iso(),
+                    RunStatus.PROVISIONING.value,
+                    _seconds_since(row["preempted_at"]), item.run_id,
                 ),
             )
-            if step % 10 == 0:
-                conn.commit()
+            # Anything logged past the checkpoint is replayed on resume.
+            conn.execute(
+                "DELETE FROM run_metrics WHERE run_id = ? AND step > ?",
+                (item.run_id, row["resume_step"] or 0),
+            )
+            conn.execute(
+                """INSERT INTO active_runs
+                   (run_id, owner, nodes, num_gpus, admitted_at, heartbeat_ts)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (
+                    item.run_id, OWNER_ID, serialize_json(nodes),
+                    item.num_gpus, now_iso(), time.time(),
+                ),
+            )
+            claimed = True
+        conn.commit()
+    except sqlite3.IntegrityError:
+        # Still registered to the process that is finishing it.
+        conn.rollback()
+    finally:
+        conn.close()
+
+    if not claimed:
+        cluster_service.release_gpus(item.run_id)
+        if gone:
+            # Cancelled, deleted, or admitted by another API process.
+            _scheduler.remove(item.run_id)
+        return False
+
+    run = row_to_dict(row)
+    policy = {
+        **RECIPE_DEFAULTS.get(run["recipe"], {}).get("early_stopping", {}),
+        **run["config"].get("early_stopping", {}),
+    }
+    with _lock:
+        _monitors[item.run_id] = LossMonitor(policy)
+        _active_runs[item.run_id] = {
+            "nodes": nodes,
+            "num_gpus": item.num_gpus,
+            "admitted": now_iso(),
+            "admitted_ts": time.time(),
+            "checkpoint_ts": time.time(),
+            "last_step": row["resume_step"] or 0,
+            "recipe": run["recipe"],
+            "base_model": run["base_model"],
+            "config": run["config"],
+            "gpu_type": cluster_service.gpu_type_of(nodes),
+        }
+    _get_pool().submit(_job_for(run))
+    return True
+
+
+def _fits_after(item: QueuedRun, run_ids: list[str]) -> bool:
+    return cluster_service.can_place_after_release(
+        item.num_gpus, run_ids,
+        gpu_type=item.gpu_type, min_memory_gb=item.min_memory_gb,
+    )
+
+
+def _preempt(victim: RunningSlot, head: QueuedRun):
+    logger.info(
+        "Preempting run %s (priority %d) for run %s (priority %d)",
+        victim.run_id, victim.priority, head.run_id, head.priority,
+    )
+    with _lock:
+        info = _active_runs.get(victim.run_id)
+        if info is not None:
+            info["preempt_signal_ts"] = time.time()
+    _get_pool().signal(victim.run_id, "preempt", reason=f"preempted by run {head.run_id}")
+
+
+def _schedule():
+    if settings.preemption_enabled:
+        admitted = _scheduler.schedule(_try_admit, preempt=_preempt, fits_after=_fits_after)
+    else:
+        admitted = _scheduler.schedule(_try_admit)
+    if admitted:
+        logger.info("Admitted runs: %s", ", ".join(admitted))
+
+
+def _finish(
+    run_id: str,
+    status: RunStatus,
+    lost_since: Optional[str] = None,
+    **fields,
+):
+    with _lock:
+        info = _active_runs.pop(run_id, None) or {}
+        _monitors.pop(run_id, None)
+        _early_stops.pop(run_id, None)
+
+    # lost_since names the timestamp in the run's info after which its GPU
+    # time produced no retained progress.
+    gpu_seconds = lost_seconds = 0.0
+    if "admitted_ts" in info:
+        now = time.time()
+        gpu_seconds = info["num_gpus"] * (now - info["admitted_ts"])
+        if lost_since and lost_since in info:
+            lost_seconds = info["num_gpus"] * (now - info[lost_since])
+
+    # GPUs go back before the claim does, and the claim goes with the status
+    # change, so no other process sees the run as unowned mid-transition.
+    cluster_service.release_gpus(run_id)
+    assignments = ["status = ?"] + [f"{k} = ?" for k in fields]
+    conn = get_connection()
+    try:
+        # A cancellation recorded meanwhile wins over whatever the worker says,
+        # and a late event never reopens a run that has already finished.
+        cur = conn.execute(
+            f"""UPDATE runs SET {', '.join(assignments)}
+                WHERE id = ? AND status NOT IN ({', '.join('?' * len(TERMINAL_STATUSES))})""",
+            (status.value, *fields.values(), run_id, *TERMINAL_STATUSES),
+        )
+        updated = cur.rowcount > 0
+        conn.execute(
+            """UPDATE runs SET gpu_seconds = gpu_seconds + ?,
+               lost_gpu_seconds = lost_gpu_seconds + ? WHERE id = ?""",
+            (round(gpu_seconds, 3), round(lost_seconds, 3), run_id),
+        )
+        conn.execute(
+            "DELETE FROM active_runs WHERE run_id = ? AND owner = ?",
+            (run_id, OWNER_ID),
+        )
+        conn.commit()
+        row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+    finally:
+        conn.close()
+
+    _scheduler.release(run_id)
+    # A cancelled run's status was set up front; its worker stopping is
+    # what finishes it.
+    if row is not None and (updated or status == RunStatus.CANCELLED):
+        if row["status"] == RunStatus.PENDING.value:
+            _enqueue(row_to_dict(row))
+        elif row["status"] in TERMINAL_STATUSES:
+            _notify(_finish_listeners, run_id, row["status"])
+    _schedule()
+
+
+def _requeue_preempted(run_id: str, payload: dict):
+    now = now_iso()
+    fields = {"queued_at": now, "preempted_at": now}
+    if payload.get("checkpoint"):
+        fields["checkpoint_path"] = payload["checkpoint"]
+        fields["resume_step"] = payload["step"]
+
+    conn = get_connection()
+    try:
+        conn.execute(
+            "UPDATE runs SET preempted_count = preempted_count + 1 WHERE id = ?",
+            (run_id,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    logger.info("Run %s preempted at step %s", run_id, payload.get("step"))
+    _finish(run_id, RunStatus.PENDING, lost_since="preempt_signal_ts", **fields)
+
+
+def _record_checkpoint(run_id: str, payload: dict):
+    with _lock:
+        info = _active_runs.get(run_id)
+        if info is not None:
+            info["checkpoint_ts"] = time.time()
+    created = datetime.fromtimestamp(payload["created_at"], timezone.utc).isoformat()
+    conn = get_connection()
+    try:
+        conn.execute(
+            """INSERT OR REPLACE INTO checkpoints
+               (run_id, step, path, loss, size_bytes, created_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (
+                run_id, payload["step"], payload["path"], payload.get("loss"),
+                payload.get("size_bytes", 0), created,
+            ),
+        )
+        conn.executemany(
+            "DELETE FROM checkpoints WHERE run_id = ? AND path = ?",
+            [(run_id, path) for path in payload.get("removed", [])],
+        )
+        conn.execute(
+            "UPDATE runs SET checkpoint_path = ?, resume_step = ? WHERE id = ?",
+            (payload["path"], payload["step"], run_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _retry_or_fail(run_id: str, kind: Optional[str], error: str):
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT retry_count, config FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+
+    attempt = row["retry_count"] if row else 0
+    fields = {}
+    if kind == retry.OOM and row is not None:
+        config = retry.shrink_batch(deserialize_json(row["config"]))
+        if config is None:
+            kind = None
+        else:
+            fields["config"] = serialize_json(config)
+
+    if kind is None or row is None or attempt >= settings.retry_max_attempts:
+        logger.error("Training run %s failed: %s", run_id, error)
+        _finish(run_id, RunStatus.FAILED, error_message=error)
+        return
+
+    # Keeps its original queued_at so aging puts it back near the front once
+    # the backoff expires; work since the last checkpoint is the loss.
+    delay = retry.backoff_seconds(kind, attempt)
+    logger.warning(
+        "Run %s failed (%s: %s); retry %d/%d in %.0fs",
+        run_id, kind, error, attempt + 1, settings.retry_max_attempts, delay,
+    )
+    retry_after = datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat()
+    _finish(
+        run_id, RunStatus.PENDING, lost_since="checkpoint_ts",
+        retry_count=attempt + 1, retry_after=retry_after,
+        error_message=f"{kind}: {error}", **fields,
+    )
+
+
+def _on_node_offline(node_id: str, run_ids: list[str], last_heartbeat: float):
+    for run_id in run_ids:
+        with _lock:
+            if run_id not in _active_runs:
+                continue
+            _recovering[run_id] = last_heartbeat
+        # Free the run's GPUs on healthy nodes right away; the worker stop
+        # below only has to catch up.
+        cluster_service.release_gpus(run_id)
+        _get_pool().signal(run_id, "node_lost", reason=f"node {node_id} went offline")
+
+
+cluster_service.on_node_offline(_on_node_offline)
+
+
+def _stop_cancelled(run_id: str, reason: Optional[str]):
+    with _lock:
+        if run_id not in _active_runs or run_id in _cancelling:
+            return
+        _cancelling[run_id] = time.time()
+    _get_pool().signal(run_id, "cancel", reason=reason)
+    timer = threading.Timer(settings.cancel_grace_seconds, _force_stop, args=(run_id,))
+    timer.daemon = True
+    timer.start()
+
+
+def _force_stop(run_id: str):
+    global _forced_stops
+    with _lock:
+        if run_id not in _cancelling:
+            return
+        _forced_stops += 1
+    logger.warning(
+        "Run %s did not stop within %ss of cancellation; killing its worker",
+        run_id, settings.cancel_grace_seconds,
+    )
+    if not _get_pool().kill(run_id):
+        # No worker holds it any more; the stop event is already on its way.
+        logger.info("Run %s had already left its worker", run_id)
+
+
+def _stop_cancelled_runs():
+    # Cancellations accepted by other API processes for runs this one owns.
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            """SELECT r.id, r.cancel_reason FROM runs r
+               JOIN active_runs a ON a.run_id = r.id
+               WHERE a.owner = ? AND r.status = ?""",
+            (OWNER_ID, RunStatus.CANCELLED.value),
+        ).fetchall()
+    finally:
+        conn.close()
+    for row in rows:
+        _stop_cancelled(row["id"], row["cancel_reason"])
+
+
+def _mark_cancelled(run_id: str, reason: str) -> bool:
+    conn = get_connection()
+    try:
+        cur = conn.execute(
+            f"""UPDATE runs SET status = ?, cancel_reason = ?, completed_at = ?
+                WHERE id = ? AND status NOT IN ({', '.join('?' * len(TERMINAL_STATUSES))})""",
+            (RunStatus.CANCELLED.value, reason, now_iso(), run_id, *TERMINAL_STATUSES),
+        )
+        conn.commit()
+        return cur.rowcount > 0
+    finally:
+        conn.close()
+
+
+def _time_out(run_id: str, active_seconds: float):
+    reason = f"exceeded run timeout of {settings.run_timeout_seconds}s"
+    if not _mark_cancelled(run_id, reason):
+        return
+    logger.warning("Run %s %s; cancelling", run_id, reason)
+    _record_event(run_id, "timed_out", reason, active_seconds=round(active_seconds, 1))
+    _stop_cancelled(run_id, reason)
+
+
+def _stall(run_id: str, last_step: int, idle_seconds: float):
+    reason = f"no training progress for {idle_seconds:.0f}s after step {last_step}"
+    with _lock:
+        if run_id not in _active_runs:
+            return
+        _stalled[run_id] = reason
+    logger.warning("Run %s made %s; restarting it", run_id, reason)
+    _record_event(
+        run_id, "stalled", reason,
+        last_step=last_step, idle_seconds=round(idle_seconds, 1),
+    )
+    # A hung worker won't see a cooperative stop, so go straight to a kill;
+    # the resulting failure is retried from the last checkpoint.
+    if not _get_pool().kill(run_id):
+        with _lock:
+            _stalled.pop(run_id, None)
+
+
+def _watchdog():
+    now = time.time()
+    with _lock:
+        owned = {
+            run_id: dict(info) for run_id, info in _active_runs.items()
+            if run_id not in _cancelling and run_id not in _stalled
+        }
+    if not owned:
+        return
+
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            f"""SELECT id, status, gpu_seconds, num_gpus FROM runs
+                WHERE id IN ({', '.join('?' * len(owned))})""",
+            list(owned),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    for row in rows:
+        if row["status"] in TERMINAL_STATUSES:
+            continue
+        info = owned[row["id"]]
+        # Admitted time across all attempts; time spent queued doesn't count.
+        active = (row["gpu_seconds"] or 0) / max(row["num_gpus"], 1) + now - info["admitted_ts"]
+        idle = now - info.get("progress_ts", now)
+        if settings.run_timeout_seconds and active > settings.run_timeout_seconds:
+            _time_out(row["id"], active)
+        elif settings.run_stall_seconds and idle > settings.run_stall_seconds:
+            _stall(row["id"], info["last_step"], idle)
+
+
+def _remaining_gpu_seconds(run_id: str, epoch: Optional[float]) -> float:
+    with _lock:
+        info = _active_runs.get(run_id)
+    if info is None or not epoch:
+        return 0.0
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT gpu_seconds, config FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return 0.0
+    done = epoch / (deserialize_json(row["config"]).get("num_epochs") or 1)
+    if done >= 1:
+        return 0.0
+    # Extrapolates the GPU time spent so far over the epochs left.
+    spent = (row["gpu_seconds"] or 0) + info["num_gpus"] * (time.time() - info["admitted_ts"])
+    return spent * (1 - done) / done
+
+
+def _on_verdict(run_id: str, verdict: Verdict, epoch: Optional[float]):
+    details = {
+        "step": verdict.step,
+        "action": verdict.action,
+        "ewma": round(verdict.ewma, 6) if verdict.ewma is not None else None,
+        "best": round(verdict.best, 6) if verdict.best is not None else None,
+    }
+    if verdict.action == STOP:
+        saved = _remaining_gpu_seconds(run_id, epoch)
+        details["saved_gpu_seconds"] = round(saved, 1)
+        with _lock:
+            _early_stops[run_id] = (verdict, saved)
+        logger.warning("Stopping run %s early: %s", run_id, verdict.reason)
+        _get_pool().signal(run_id, "early_stop", reason=verdict.reason)
+    else:
+        logger.warning("Run %s is unhealthy: %s", run_id, verdict.reason)
+
+    if verdict.kind == DIVERGED or verdict.action != STOP:
+        conn = get_connection()
+        try:
+            conn.execute("UPDATE runs SET health = 'unhealthy' WHERE id = ?", (run_id,))
+            conn.commit()
+        finally:
+            conn.close()
+    _record_event(run_id, verdict.kind, verdict.reason, **details)
+
+
+def _analyze(run_id: str, metrics: list[dict]):
+    with _lock:
+        monitor = _monitors.get(run_id)
+        if monitor is None or run_id in _early_stops:
+            return
+    for m in metrics:
+        verdict = monitor.update(m["step"], m["loss"])
+        if verdict is None:
+            continue
+        _on_verdict(run_id, verdict, m.get("epoch"))
+        if verdict.action == STOP:
+            return
+
+
+def _is_cancelled(run_id: str) -> bool:
+    conn = get_connection()
+    try:
+        row = conn.execute("SELECT status FROM runs WHERE id = ?", (run_id,)).fetchone()
+    finally:
+        conn.close()
+    return row is not None and row["status"] == RunStatus.CANCELLED.value
+
+
+def _handle_event(kind: str, run_id: Optional[str], payload: dict):
+    if run_id is None:
+        return
+
+    if kind in ("done", "failed"):
+        with _lock:
+            requested = _cancelling.pop(run_id, None)
+        if requested is not None or _is_cancelled(run_id):
+            if requested is not None:
+                _cancel_stop_times.append(time.time() - requested)
+                logger.info(
+                    "Run %s stopped %.2fs after cancellation", run_id, time.time() - requested,
+                )
+            _finish(run_id, RunStatus.CANCELLED)
+            return
+
+    if kind == "status" and payload.get("status") == RunStatus.RUNNING.value:
+        with _lock:
+            failed_at = _recovering.pop(run_id, None)
+            info = _active_runs.get(run_id)
+            if info is not None:
+                # The stall clock starts once a worker is actually on the job.
+                info["progress_ts"] = time.time()
+        if failed_at is not None:
+            recovery = time.time() - failed_at
+            _recovery_times.append(recovery)
+            logger.info("Run %s resumed %.1fs after node failure", run_id, recovery)
+        conn = get_connection()
+        try:
+            conn.execute(
+                """UPDATE runs SET status = ?, started_at = COALESCE(started_at, ?)
+                   WHERE id = ? AND status != ?""",
+                (RunStatus.RUNNING.value, now_iso(), run_id, RunStatus.CANCELLED.value),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    elif kind == "metrics":
+        _analyze(run_id, payload["metrics"])
+        # NaN can't go in the loss column; the analyzer has already seen it.
+        record_metrics(run_id, [m for m in payload["metrics"] if math.isfinite(m["loss"])])
+        _notify(_metrics_listeners, run_id, payload["metrics"])
+        with _lock:
+            info = _active_runs.get(run_id)
+            if info is not None and payload["metrics"]:
+                info["progress_ts"] = time.time()
+                info["last_step"] = payload["metrics"][-1]["step"]
+        if info is not None and info["gpu_type"]:
+            estimator.record(
+                info["recipe"], info["base_model"], info["gpu_type"],
+                info["config"], info["num_gpus"], payload["metrics"],
+            )
+    elif kind == "checkpoint":
+        _record_checkpoint(run_id, payload)
+    elif kind == "done" and payload.get("status") == "stopped":
+        if payload.get("action") == "preempt":
+            _requeue_preempted(run_id, payload)
+        elif payload.get("action") == "node_lost":
+            _retry_or_fail(run_id, retry.NODE_LOSS, payload.get("reason") or "node lost")
+        elif payload.get("action") == "early_stop":
+            _finish_early(run_id)
+    elif kind == "done":
+        _finish(run_id, RunStatus.COMPLETED, completed_at=now_iso(), error_message=None)
+    elif kind == "failed":
+        with _lock:
+            stalled = _stalled.pop(run_id, None)
+        if stalled is not None:
+            _retry_or_fail(run_id, retry.STALL, stalled)
+        elif run_id in _early_stops:
+            # Failed on the way out of an early stop; retrying won't help.
+            _retry_or_fail(run_id, None, payload.get("error"))
+        else:
+            _retry_or_fail(run_id, retry.classify(payload), payload.get("error"))
+
+
+def _finish_early(run_id: str):
+    with _lock:
+        verdict, saved = _early_stops.get(run_id, (None, 0.0))
+    if verdict is not None and verdict.kind == DIVERGED:
+        logger.error("Training run %s diverged: %s", run_id, verdict.reason)
+        _finish(
+            run_id, RunStatus.FAILED, completed_at=now_iso(),
+            error_message=f"diverged: {verdict.reason}", saved_gpu_seconds=round(saved, 1),
+        )
+    else:
+        # A plateaued run is done; its checkpoints are as good as it gets.
+        _finish(
+            run_id, RunStatus.COMPLETED, completed_at=now_iso(),
+            error_message=None, saved_gpu_seconds=round(saved, 1),
+        )
 
-            time.sleep(0.02)
 
+def _enqueue(run: dict):
+    queued_at = run.get("queued_at") or run["created_at"]
+    _scheduler.enqueue(QueuedRun(
+        run_id=run["id"],
+        tenant_id=run.get("tenant_id") or "default",
+        priority=run["priority"],
+        num_gpus=run["num_gpus"],
+        enqueued_at=datetime.fromisoformat(queued_at).timestamp(),
+        gpu_type=run["config"].get("gpu_type"),
+        min_memory_gb=run["config"].get("min_gpu_memory_gb"),
+        not_before=datetime.fromisoformat(run["retry_after"]).timestamp()
+        if run.get("retry_after") else 0.0,
+    ))
+
+
+def _heartbeat():
+    conn = get_connection()
+    try:
         conn.execute(
-            "UPDATE runs SET status = ?, completed_at = ? WHERE id = ?",
-            (RunStatus.COMPLETED.value, now_iso(), run_id),
+            "UPDATE active_runs SET heartbeat_ts = ?, version = version + 1 WHERE owner = ?",
+            (time.time(), OWNER_ID),
         )
         conn.commit()
-    except Exception as exc:
-        logger.error("Training run %s failed: %s", run_id, exc)
+    finally:
+        conn.close()
+
+
+def _owner_gone(owner: str, heartbeat_ts: float) -> bool:
+    if time.time() - heartbeat_ts > settings.run_owner_stale_seconds:
+        return True
+    host, _, rest = owner.partition(":")
+    if host != socket.gethostname():
+        return False
+    # Same host: a restarted API process need not wait out the stale window.
+    try:
+        os.kill(int(rest.split(":")[0]), 0)
+    except ProcessLookupError:
+        return True
+    except (OSError, ValueError):
+        pass
+    return False
+
+
+def _adopt_orphans():
+    active = (RunStatus.PROVISIONING.value, RunStatus.RUNNING.value)
+    adopted = []
+    conn = get_connection()
+    try:
+        # Admitted runs without an owner row predate the registry.
         conn.execute(
-            "UPDATE runs SET status = ?, error_message = ? WHERE id = ?",
-            (RunStatus.FAILED.value, str(exc), run_id),
+            """UPDATE runs SET status = ? WHERE status IN (?, ?)
+               AND id NOT IN (SELECT run_id FROM active_runs)""",
+            (RunStatus.PENDING.value, *active),
         )
+        rows = conn.execute(
+            "SELECT run_id, owner, heartbeat_ts, version FROM active_runs WHERE owner != ?",
+            (OWNER_ID,),
+        ).fetchall()
+        for row in rows:
+            if not _owner_gone(row["owner"], row["heartbeat_ts"]):
+                continue
+            # Versioned takeover: if the owner heartbeats or another process
+            # adopts first, this update matches nothing.
+            cur = conn.execute(
+                """UPDATE active_runs SET owner = ?, heartbeat_ts = ?, version = version + 1
+                   WHERE run_id = ? AND version = ?""",
+                (OWNER_ID, time.time(), row["run_id"], row["version"]),
+            )
+            if cur.rowcount:
+                adopted.append((row["run_id"], row["owner"]))
         conn.commit()
     finally:
         conn.close()
+
+    for run_id, owner in adopted:
+        logger.warning("Requeuing run %s from lost API process %s", run_id, owner)
+        cluster_service.release_gpus(run_id)
+        conn = get_connection()
+        try:
+            conn.execute(
+                "UPDATE runs SET status = ? WHERE id = ? AND status IN (?, ?)",
+                (RunStatus.PENDING.value, run_id, *active),
+            )
+            conn.execute(
+                "DELETE FROM active_runs WHERE run_id = ? AND owner = ?",
+                (run_id, OWNER_ID),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def _release_unclaimed():
+    allocated = cluster_service.allocated_run_ids()
+    if not allocated:
+        return
+    conn = get_connection()
+    try:
+        claimed = {r[0] for r in conn.execute("SELECT run_id FROM active_runs")}
+        statuses = dict(conn.execute(
+            f"SELECT id, status FROM runs WHERE id IN ({', '.join('?' * len(allocated))})",
+            allocated,
+        ).fetchall())
+    finally:
+        conn.close()
+
+    for run_id in allocated:
+        # A pending run may be between allocation and claim in some process;
+        # if it was orphaned there instead, its next admission reuses the GPUs.
+        if run_id in claimed or statuses.get(run_id) == RunStatus.PENDING.value:
+            continue
+        logger.warning("Releasing GPUs held by unowned run %s", run_id)
+        cluster_service.release_gpus(run_id)
+
+
+def _sync_queue():
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM runs WHERE status = ?", (RunStatus.PENDING.value,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    pending = set()
+    for row in rows:
+        pending.add(row["id"])
         with _lock:
-            _active_runs.pop(run_id, None)
+            if row["id"] in _active_runs:
+                continue
+        if not _scheduler.is_pending(row["id"]):
+            _enqueue(row_to_dict(row))
+    for run_id in _scheduler.pending_ids() - pending:
+        _scheduler.remove(run_id)
+
+
+def _reconcile():
+    # Every API process queues all pending runs; claims decide who runs them.
+    _heartbeat()
+    cluster_service.refresh()
+    _adopt_orphans()
+    _release_unclaimed()
+    _stop_cancelled_runs()
+    _watchdog()
+    _sync_queue()
+
+
+def _scheduler_loop():
+    while not _stop.wait(settings.scheduler_interval_seconds):
+        try:
+            _reconcile()
+            _schedule()
+        except Exception:
+            logger.exception("Scheduler pass failed")
+
+
+def _get_pool() -> WorkerPool:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = WorkerPool(settings.worker_processes, on_event=_handle_event)
+            _pool.start()
+        return _pool
+
+
+def start_workers():
+    global _ticker
+    _get_pool()
+    _reconcile()
+    _stop.clear()
+    _ticker = threading.Thread(target=_scheduler_loop, name="scheduler", daemon=True)
+    _ticker.start()
+    _schedule()
+
+
+def stop_workers():
+    global _pool, _ticker
+    _stop.set()
+    if _ticker is not None:
+        _ticker.join(settings.scheduler_interval_seconds)
+        _ticker = None
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
 
+def worker_stats() -> dict:
+    with _lock:
+        pool = _pool
+    return pool.stats() if pool is not None else {"workers": 0}
+
+
+def queue_status() -> dict:
+    status = _scheduler.metrics()
+    status["pending"] = [
+        {
+            "run_id": q.run_id,
+            "tenant_id": q.tenant_id,
+            "priority": q.priority,
+            "num_gpus": q.num_gpus,
+            "waiting_seconds": round(time.time() - q.enqueued_at, 1),
+        }
+        for q in _scheduler.ordered()
+    ]
+    status["workers"] = worker_stats()
 
-def launch_run(payload: RunLaunch) -> RunRecord:
+    conn = get_connection()
+    try:
+        claimed = conn.execute("SELECT COUNT(*) FROM active_runs").fetchone()[0]
+        totals = conn.execute(
+            """SELECT COALESCE(SUM(gpu_seconds), 0), COALESCE(SUM(lost_gpu_seconds), 0),
+                      COALESCE(SUM(preempted_seconds), 0), COALESCE(SUM(preempted_count), 0),
+                      COALESCE(SUM(retry_count), 0),
+                      COALESCE(SUM(CASE WHEN retry_count > 0 THEN 1 ELSE 0 END), 0),
+                      COALESCE(SUM(saved_gpu_seconds), 0),
+                      COALESCE(SUM(CASE WHEN health = 'unhealthy' THEN 1 ELSE 0 END), 0)
+               FROM runs"""
+        ).fetchone()
+        reused = conn.execute(
+            """SELECT COUNT(*), COALESCE(SUM(json_extract(details, '$.gpu_seconds')), 0)
+               FROM run_events WHERE kind = 'reused'"""
+        ).fetchone()
+        early = dict(conn.execute(
+            """SELECT kind, COUNT(*) FROM run_events
+               WHERE kind IN (?, ?) AND json_extract(details, '$.action') = ?
+               GROUP BY kind""",
+            (DIVERGED, PLATEAU, STOP),
+        ).fetchall())
+    finally:
+        conn.close()
+    (
+        gpu_seconds, lost_seconds, preempted_seconds, preempted_count,
+        retries, retried_runs, saved_seconds, unhealthy,
+    ) = totals
+    with _lock:
+        owned = len(_active_runs)
+    status["registry"] = {
+        "owner": OWNER_ID,
+        "owned_runs": owned,
+        "active_runs": claimed,
+        "max_concurrent": settings.max_concurrent_runs,
+    }
+    status["preemption"] = {
+        "preempted_runs_total": preempted_count,
+        "preempted_wait_seconds": round(preempted_seconds, 1),
+        "gpu_hours": round(gpu_seconds / 3600, 3),
+        "lost_gpu_hours": round(lost_seconds / 3600, 3),
+        "goodput": round(1 - lost_seconds / gpu_seconds, 4) if gpu_seconds else 1.0,
+    }
+
+    with _lock:
+        stop_times = list(_cancel_stop_times)
+        stopping = len(_cancelling)
+        forced = _forced_stops
+    status["cancellation"] = {
+        "stopped": len(stop_times),
+        "stopping": stopping,
+        "forced_stops": forced,
+        "avg_stop_seconds": round(sum(stop_times) / len(stop_times), 3) if stop_times else 0.0,
+        "max_stop_seconds": round(max(stop_times), 3) if stop_times else 0.0,
+    }
+    conn = get_connection()
+    try:
+        events = dict(conn.execute(
+            "SELECT kind, COUNT(*) FROM run_events GROUP BY kind"
+        ).fetchall())
+    finally:
+        conn.close()
+    status["watchdog"] = {
+        "stalled": events.get("stalled", 0),
+        "timed_out": events.get("timed_out", 0),
+        "stall_seconds": settings.run_stall_seconds,
+        "timeout_seconds": settings.run_timeout_seconds,
+    }
+    status["early_stopping"] = {
+        "stopped_diverged": early.get(DIVERGED, 0),
+        "stopped_plateau": early.get(PLATEAU, 0),
+        "unhealthy_runs": unhealthy,
+        "saved_gpu_hours": round(saved_seconds / 3600, 3),
+    }
+    status["reuse"] = {
+        "reused_launches": reused[0],
+        "avoided_gpu_hours": round(reused[1] / 3600, 3),
+    }
+    status["retries"] = {
+        "retries_total": retries,
+        "retried_runs": retried_runs,
+        "max_attempts": settings.retry_max_attempts,
+    }
+
+    with _lock:
+        recoveries = list(_recovery_times)
+        awaiting = len(_recovering)
+    status["node_failures"] = {
+        "recoveries": len(recoveries),
+        "awaiting_recovery": awaiting,
+        "avg_recovery_seconds": round(sum(recoveries) / len(recoveries), 2) if recoveries else 0.0,
+        "max_recovery_seconds": round(max(recoveries), 2) if recoveries else 0.0,
+    }
+    return status
+
+
+def _reuse(conn, source, payload: RunLaunch, run_fingerprint: str, tenant_id: str) -> str:
+    run_id = source["id"]
+    if payload.reuse == ReusePolicy.CLONE:
+        # A completed copy under the new name, sharing the source's
+        # checkpoints; it holds no GPU time of its own.
+        run_id = str(uuid.uuid4())[:12]
+        now = now_iso()
+        conn.execute(
+            """INSERT INTO runs
+               (id, name, base_model, dataset_id, recipe, config, status,
+                num_gpus, priority, tags, tenant_id, queued_at, checkpoint_path,
+                resume_step, fingerprint, reused_from, started_at, completed_at,
+                created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                run_id, payload.name, source["base_model"], source["dataset_id"],
+                source["recipe"], source["config"], RunStatus.COMPLETED.value,
+                payload.num_gpus, payload.priority, serialize_json(payload.tags),
+                tenant_id, now, source["checkpoint_path"], source["resume_step"],
+                run_fingerprint, source["id"], now, now, now,
+            ),
+        )
+        conn.execute(
+            """INSERT INTO run_metrics
+               (run_id, step, loss, learning_rate, epoch,
+                gpu_memory_mb, throughput_samples_sec, timestamp)
+               SELECT ?, step, loss, learning_rate, epoch,
+                      gpu_memory_mb, throughput_samples_sec, timestamp
+               FROM run_metrics WHERE run_id = ?""",
+            (run_id, source["id"]),
+        )
+        conn.execute(
+            """INSERT INTO checkpoints (run_id, step, path, loss, size_bytes, created_at)
+               SELECT ?, step, path, loss, size_bytes, created_at
+               FROM checkpoints WHERE run_id = ?""",
+            (run_id, source["id"]),
+        )
+    conn.execute(
+        """INSERT INTO run_events (run_id, kind, message, details, created_at)
+           VALUES (?, ?, ?, ?, ?)""",
+        (
+            source["id"], "reused",
+            f"launch '{payload.name}' reused this run ({payload.reuse.value})",
+            serialize_json({
+                "mode": payload.reuse.value,
+                "run_id": run_id,
+                "gpu_seconds": source["gpu_seconds"] or 0,
+            }),
+            now_iso(),
+        ),
+    )
+    conn.commit()
+    logger.info(
+        "Launch '%s' matches completed run %s; %s instead of training",
+        payload.name, source["id"],
+        "cloned it" if payload.reuse == ReusePolicy.CLONE else "returning it",
+    )
+    return run_id
+
+
+def _fit_memory(payload: RunLaunch, config: dict) -> Optional[memory.MemoryEstimate]:
+    """Shrink the micro-batch until the run fits a GPU it can be placed on."""
+    if not settings.memory_check_enabled:
+        return None
+    sizes = cluster_service.gpu_memory_options(
+        payload.num_gpus,
+        gpu_type=config.get("gpu_type"),
+        min_memory_gb=config.get("min_gpu_memory_gb"),
+    )
+    if not sizes:
+        # Nothing can hold the run at all; can_fit reports that.
+        return None
+    recipe = memory.recipe_config(payload.recipe.value, payload.base_model, config)
+    fitted, estimate = memory.fit_batch_size(recipe, sizes[-1] * settings.memory_headroom)
+    if estimate is None:
+        return None
+    if fitted is None:
+        raise ValidationError(
+            f"{payload.base_model} needs an estimated {estimate.total_gb:g} GB per GPU "
+            f"at batch size {estimate.batch_size}; the largest eligible GPU has "
+            f"{sizes[-1]} GB"
+        )
+    if fitted.batch_size != recipe.batch_size:
+        logger.info(
+            "Micro-batch %d -> %d (accumulation %d) to fit %s in %d GB",
+            recipe.batch_size, fitted.batch_size, fitted.gradient_accumulation_steps,
+            payload.base_model, sizes[-1],
+        )
+        config["batch_size"] = fitted.batch_size
+        config["gradient_accumulation_steps"] = fitted.gradient_accumulation_steps
+    needed = estimate.total_gb / settings.memory_headroom
+    if needed > sizes[0]:
+        # Keep the scheduler off GPUs the run would not fit on.
+        config["min_gpu_memory_gb"] = min(m for m in sizes if m >= needed)
+    return estimate
+
+
+def launch_run(payload: RunLaunch, tenant_id: str = "default") -> RunRecord:
     conn = get_connection()
     try:
         ds = conn.execute(
-            "SELECT id FROM datasets WHERE id = ?", (payload.dataset_id,)
+            "SELECT id, checksum FROM datasets WHERE id = ?", (payload.dataset_id,)
         ).fetchone()
         if not ds:
             raise NotFoundError("Dataset", payload.dataset_id)
 
         run_id = str(uuid.uuid4())[:12]
         config = _build_config(payload.recipe, payload.config_overrides)
+        mem = _fit_memory(payload, config)
         created = now_iso()
+        run_fingerprint = fingerprint.compute(
+            ds["checksum"], ds["id"], payload.base_model, payload.recipe.value,
+            config, payload.num_gpus,
+        )
+
+        if payload.reuse != ReusePolicy.NEVER:
+            source = conn.execute(
+                """SELECT * FROM runs WHERE fingerprint = ? AND status = ?
+                   ORDER BY completed_at DESC LIMIT 1""",
+                (run_fingerprint, RunStatus.COMPLETED.value),
+            ).fetchone()
+            if source is not None:
+                return get_run(_reuse(conn, source, payload, run_fingerprint, tenant_id))
+
+        if not cluster_service.can_fit(
+            payload.num_gpus,
+            gpu_type=config.get("gpu_type"),
+            min_memory_gb=config.get("min_gpu_memory_gb"),
+        ):
+            raise ValidationError(
+                f"No {config.get('gpu_type') or 'GPU'} capacity in the cluster "
+                f"can hold {payload.num_gpus} GPU(s) for this run"
+            )
 
         conn.execute(
             """INSERT INTO runs
                (id, name, base_model, dataset_id, recipe, config,
-                status, num_gpus, priority, tags, created_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                status, num_gpus, priority, tags, tenant_id, queued_at,
+                fingerprint, estimated_memory_gb, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
             (
                 run_id, payload.name, payload.base_model, payload.dataset_id,
                 payload.recipe.value, serialize_json(config),
                 RunStatus.PENDING.value, payload.num_gpus, payload.priority,
-                serialize_json(payload.tags), created,
+                serialize_json(payload.tags), tenant_id, created,
+                run_fingerprint, mem.total_gb if mem else None, created,
             ),
         )
         conn.commit()
 
-        t = threading.Thread(
-            target=_simulate_training, args=(run_id, config), daemon=True
-        )
-        with _lock:
-            _active_runs[run_id] = {"thread": t, "started": created}
-        t.start()
-
         row = conn.execute(
             "SELECT * FROM runs WHERE id = ?", (run_id,)
         ).fetchone()
-        return RunRecord(**row_to_dict(row))
+        record = RunRecord(**row_to_dict(row))
     finally:
         conn.close()
 
+    _enqueue(record.model_dump())
+    _schedule()
+    return get_run(run_id)
+
 
 def get_run(run_id: str) -> RunRecord:
     conn = get_connection()
@@ -144,11 +1295,49 @@ def get_run(run_id: str) -> RunRecord:
             (run_id,),
         ).fetchall()
         record.metrics = [RunMetrics(**dict(m)) for m in metrics_rows]
+        if record.status == RunStatus.RUNNING:
+            record.progress, record.eta_seconds = estimator.eta(
+                record.metrics, record.config.get("num_epochs") or 1,
+            )
         return record
     finally:
         conn.close()
 
 
+def estimate_run(payload: RunEstimate) -> dict:
+    conn = get_connection()
+    try:
+        ds = conn.execute(
+            "SELECT id, row_count FROM datasets WHERE id = ?", (payload.dataset_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if not ds:
+        raise NotFoundError("Dataset", payload.dataset_id)
+    if not ds["row_count"]:
+        raise ValidationError(
+            f"Dataset '{payload.dataset_id}' has no row_count to estimate from"
+        )
+
+    config = _build_config(payload.recipe, payload.config_overrides)
+    estimates = estimator.predict(
+        payload.recipe.value, payload.base_model, config, payload.num_gpus,
+        ds["row_count"], gpu_types=[payload.gpu_type] if payload.gpu_type else None,
+    )
+    mem = memory.estimate(
+        memory.recipe_config(payload.recipe.value, payload.base_model, config)
+    )
+    return {
+        "recipe": payload.recipe.value,
+        "base_model": payload.base_model,
+        "num_gpus": payload.num_gpus,
+        "samples": ds["row_count"] * (config.get("num_epochs") or 1),
+        "seq_len": estimator.seq_len(config),
+        "estimates": estimates,
+        "memory": mem.to_dict() if mem else None,
+    }
+
+
 def get_run_metrics(
     run_id: str, last_n: Optional[int] = None
 ) -> list[RunMetrics]:
@@ -173,9 +1362,44 @@ def get_run_metrics(
         conn.close()
 
 
+def get_run_checkpoints(run_id: str) -> list[CheckpointRecord]:
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT id FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if not row:
+            raise NotFoundError("Run", run_id)
+
+        rows = conn.execute(
+            "SELECT * FROM checkpoints WHERE run_id = ? ORDER BY step", (run_id,)
+        ).fetchall()
+        return [CheckpointRecord(**dict(r)) for r in rows]
+    finally:
+        conn.close()
+
+
+def get_run_events(run_id: str) -> list[RunEvent]:
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT id FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if not row:
+            raise NotFoundError("Run", run_id)
+
+        rows = conn.execute(
+            "SELECT * FROM run_events WHERE run_id = ? ORDER BY id", (run_id,)
+        ).fetchall()
+        return [RunEvent(**row_to_dict(r)) for r in rows]
+    finally:
+        conn.close()
+
+
 def list_runs(
     status: Optional[str] = None,
     recipe: Optional[str] = None,
+    fingerprint: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
 ) -> tuple[list[RunRecord], int]:
@@ -193,6 +1417,10 @@ def list_runs(
             query += " AND recipe = ?"
             count_query += " AND recipe = ?"
             params.append(recipe)
+        if fingerprint:
+            query += " AND fingerprint = ?"
+            count_query += " AND fingerprint = ?"
+            params.append(fingerprint)
 
         total = conn.execute(count_query, params).fetchone()[0]
         query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
@@ -205,7 +1433,8 @@ def list_runs(
         conn.close()
 
 
-def cancel_run(run_id: str) -> RunRecord:
+def cancel_run(run_id: str, reason: Optional[str] = None) -> RunRecord:
+    reason = reason or "cancelled by user"
     conn = get_connection()
     try:
         row = conn.execute(
@@ -214,15 +1443,21 @@ def cancel_run(run_id: str) -> RunRecord:
         if not row:
             raise NotFoundError("Run", run_id)
 
-        conn.execute(
-            "UPDATE runs SET status = ?, completed_at = ? WHERE id = ?",
-            (RunStatus.CANCELLED.value, now_iso(), run_id),
-        )
-        conn.commit()
+        previous = row["status"]
+        _scheduler.remove(run_id)
+        if not _mark_cancelled(run_id, reason):
+            raise ValidationError(f"Run '{run_id}' is already {row['status']}")
 
         row = conn.execute(
             "SELECT * FROM runs WHERE id = ?", (run_id,)
         ).fetchone()
-        return RunRecord(**row_to_dict(row))
     finally:
         conn.close()
+
+    # Admitted runs stop cooperatively and give their GPUs back when the
+    # worker acknowledges; another API process may own it instead, in which
+    # case that process picks the cancellation up on its next pass.
+    _stop_cancelled(run_id, reason)
+    if previous == RunStatus.PENDING.value:
+        _notify(_finish_listeners, run_id, RunStatus.CANCELLED.value)
+    return RunRecord(**row_to_dict(row))
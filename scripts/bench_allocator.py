@@ -0,0 +1,100 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+"""
+Simulate a large cluster and measure GPU placement latency and utilization.
+Run: python scripts/bench_allocator.py [--nodes 4000] [--jobs 50000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from services import cluster_service
+
+NODE_SHAPES = [(8, "A100-80GB"), (8, "H100"), (4, "A100-40GB")]
+JOB_SIZES = [1, 1, 1, 2, 2, 4, 4, 8, 16, 32]
+
+
+def build_cluster(num_nodes: int):
+    configs = []
+    for i in range(num_nodes):
+        gpus, gpu_type = NODE_SHAPES[i % len(NODE_SHAPES)]
+        configs.append((f"node-{i:05d}", gpus, gpu_type))
+    cluster_service.init_cluster(configs)
+
+
+def fragmentation() -> float:
+    status = cluster_service._cluster
+    free_on_partial = sum(
+        n.free_gpus for n in status.nodes.values()
+        if 0 < n.free_gpus < n.gpu_count
+    )
+    return free_on_partial / status.available_gpus if status.available_gpus else 0.0
+
+
+def run(num_nodes: int, num_jobs: int, seed: int):
+    random.seed(seed)
+    build_cluster(num_nodes)
+    total = cluster_service._cluster.total_gpus
+
+    live: list[str] = []
+    latencies = []
+    placed = rejected = 0
+    util_samples = []
+
+    for i in range(num_jobs):
+        # Keep the cluster near saturation: release a random run about as
+        # often as a new one arrives once it is mostly full.
+        busy = 1 - cluster_service._cluster.available_gpus / total
+        if live and (busy > 0.9 or random.random() < 0.45):
+            cluster_service.release_gpus(live.pop(random.randrange(len(live))))
+
+        size = random.choice(JOB_SIZES)
+        gpu_type = random.choice([None, None, "A100-80GB", "H100"])
+        run_id = f"job-{i}"
+
+        start = time.perf_counter()
+        nodes = cluster_service.allocate_gpus(run_id, size, gpu_type=gpu_type)
+        latencies.append(time.perf_counter() - start)
+
+        if nodes:
+            placed += 1
+            live.append(run_id)
+        else:
+            rejected += 1
+        util_samples.append(1 - cluster_service._cluster.available_gpus / total)
+
+    latencies.sort()
+    steady = util_samples[len(util_samples) // 2:]
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6
+
+    print(f"nodes={num_nodes} gpus={total} jobs={num_jobs}")
+    print(f"  placed={placed} rejected={rejected}")
+    print(f"  steady-state utilization: {sum(steady) / len(steady):.1%}")
+    print(f"  free capacity on partially used nodes: {fragmentation():.1%}")
+    print(
+        f"  placement latency (us): p50={pct(0.5):.1f} "
+        f"p95={pct(0.95):.1f} p99={pct(0.99):.1f} max={latencies[-1] * 1e6:.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 4000])
+    parser.add_argument("--jobs", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for n in args.nodes:
+        run(n, args.jobs, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Copyright (c) 2025-2026 Ahmad Al-Nazer. All rights reserved.
+# https://www.linkedin.com/in/ahmadghazinazer
+
+"""
+Train a tiny GPT-2 data-parallel on CPU (gloo) and measure how throughput
+scales with the number of ranks. Each rank keeps the same micro-batch, so
+ideal scaling is linear in the world size.
+Run: python scripts/bench_ddp.py [--world-sizes 1 2 4] [--steps 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from recipes import distributed
+
+VOCAB = 512
+
+
+def train(ctx, stop, steps: int, micro_batch: int, seq_len: int, hidden: int):
+    import torch
+    import torch.distributed as dist
+    from torch.nn.parallel import DistributedDataParallel
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    torch.manual_seed(0)
+    model = GPT2LMHeadModel(GPT2Config(
+        vocab_size=VOCAB, n_positions=seq_len, n_embd=hidden, n_layer=4, n_head=4,
+        bos_token_id=0, eos_token_id=0,
+    ))
+    ddp = DistributedDataParallel(model)
+    optimizer = torch.optim.AdamW(ddp.parameters(), lr=1e-4)
+
+    # Every rank builds the same global data and trains on its own shard.
+    data = torch.randint(0, VOCAB, ((steps + 2) * micro_batch * ctx.world_size, seq_len))
+    local = distributed.shard(data, ctx)
+
+    def step(i: int) -> float:
+        batch = local[i * micro_batch:(i + 1) * micro_batch]
+        loss = ddp(input_ids=batch, labels=batch).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        return loss.item()
+
+    for i in range(2):
+        loss = step(i)
+    dist.barrier()
+    start = time.perf_counter()
+    # A stop can end the loop early, so rates use the steps actually timed.
+    done = 0
+    for i in range(2, steps + 2):
+        if distributed.should_stop(stop):
+            break
+        loss = step(i)
+        done += 1
+    elapsed = time.perf_counter() - start
+
+    # Gradient sync keeps replicas identical; any drift is a launcher bug.
+    checksum = torch.tensor([sum(p.detach().double().sum().item() for p in model.parameters())])
+    spread = checksum.clone()
+    dist.all_reduce(checksum, op=dist.ReduceOp.MAX)
+    dist.all_reduce(spread, op=dist.ReduceOp.MIN)
+
+    metrics = distributed.reduce_metrics(ctx, {
+        "loss": loss,
+        "throughput_samples_sec": done * micro_batch / elapsed if done else 0.0,
+        "step_seconds": elapsed / done if done else 0.0,
+    })
+    if metrics is not None:
+        metrics["replica_drift"] = (checksum - spread).item()
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--world-sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--micro-batch", type=int, default=8)
+    parser.add_argument("--seq-len", type=int, default=128)
+    parser.add_argument("--hidden", type=int, default=128)
+    args = parser.parse_args()
+
+    print(f"cpu cores={os.cpu_count()} backend=gloo")
+    baseline = None
+    for world_size in args.world_sizes:
+        m = distributed.launch(
+            train,
+            (args.steps, args.micro_batch, args.seq_len, args.hidden),
+            world_size=world_size, backend="gloo",
+        )
+        baseline = baseline or m["throughput_samples_sec"] / world_size
+        efficiency = m["throughput_samples_sec"] / (baseline * world_size)
+        print(
+            f"  ranks={world_size} samples/sec={m['throughput_samples_sec']:.1f} "
+            f"step={m['step_seconds'] * 1000:.0f}ms scaling efficiency={efficiency:.0%} "
+            f"loss={m['loss']:.3f} replica drift={m['replica_drift']:.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -87,7 +87,7 @@ def seed():
         record = launch_run(run_cfg)
         print(f"  Launched run: {record.name} [{record.id}]")
 
-    print("\nSeed complete. Runs are executing in background threads.")
+    print("\nSeed complete. Runs are executing in background worker processes.")
     print("Wait a few seconds and query /runs to see metrics.")
 
 